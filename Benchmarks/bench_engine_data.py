@@ -0,0 +1,196 @@
+"""
+Compare the single pass engine data parser of AutoPSDUI with the parser of psd_tools.
+
+Engine data of text layers is generated with a few text lengths and style runs, like the text layers
+of localized UI PSDs, and parsed by both parsers, the outputs must be identical. The text layers of
+PSD files given with -i are parsed too:
+    python Benchmarks/bench_engine_data.py [-r repeat] [-i file.psd,...]
+"""
+import os
+import sys
+import time
+import getopt
+
+import numpy as np
+
+plugin_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(plugin_dir, "Content", "Python"))
+if sys.platform == "win32":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Win64"))
+elif sys.platform == "darwin":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Mac"))
+
+from psd_tools import PSDImage
+from psd_tools.constants import Tag
+from psd_tools.psd.engine_data import EngineData, Dict, List
+
+from AutoPSDUI.engine_data import parse_engine_data, python_frombytes
+from synthetic_psd import engine_string
+
+# name: (characters of the text, style runs)
+text_sizes = (
+    ("label", 16, 1),
+    ("paragraph", 400, 4),
+    ("page", 4000, 32),
+)
+
+# Style properties written by Photoshop for every style sheet and style run
+style_properties = (
+    b"/Font %d", b"/FontSize %.1f", b"/FauxBold false", b"/FauxItalic false", b"/AutoLeading true",
+    b"/Leading %.1f", b"/HorizontalScale 1.0", b"/VerticalScale 1.0", b"/Tracking 0", b"/AutoKerning true",
+    b"/Kerning 0", b"/BaselineShift 0.0", b"/FontCaps 0", b"/FontBaseline 0", b"/Underline false",
+    b"/Strikethrough false", b"/Ligatures true", b"/DLigatures false", b"/BaselineDirection 2",
+    b"/Tsume 0.0", b"/StyleRunAlignment 2", b"/Language 0", b"/NoBreak false", b"/OutlineWidth 1.0",
+    b"/CharacterDirection 0", b"/HindiNumbers false", b"/Kashida 1", b"/DiacriticPos 2",
+)
+
+
+def make_style(rng, font_count):
+    color = b" ".join(b"%.5f" % value for value in (1.0,) + tuple(rng.random(3)))
+    size = float(rng.integers(12, 48))
+    values = (int(rng.integers(0, font_count)), size, size * 1.2)
+    lines = [style_properties[0] % values[0], style_properties[1] % values[1], style_properties[5] % values[2]]
+    lines += [prop for index, prop in enumerate(style_properties) if index not in (0, 1, 5)]
+    lines.append(b"/FillColor << /Type 1 /Values [ %s ] >>" % color)
+    lines.append(b"/StrokeColor << /Type 1 /Values [ 1.0 0.0 0.0 0.0 ] >>")
+    return b"<<\n" + b"\n".join(lines) + b"\n>>"
+
+
+def make_text(rng, length):
+    """
+    Text with the characters Photoshop escapes, and some that are not latin
+    """
+    words = ["Start", "(Options)", "Quit\\Back", "設定", "Звук", "été"]
+    text = []
+    while sum(len(word) + 1 for word in text) < length:
+        text.append(words[int(rng.integers(0, len(words)))])
+    return " ".join(text)
+
+
+def make_engine_data(rng, length, run_count):
+    text = make_text(rng, length) + "\r"
+    fonts = ("ArialMT", "Arial-BoldMT", "MyriadPro-Regular", "AdobeInvisFont")
+    run_lengths = np.diff(np.linspace(0, len(text), run_count + 1).astype(int))
+    font_set = b"\n".join(
+        b"<<\n/Name %s\n/Script 0\n/FontType 1\n/Synthetic 0\n>>" % engine_string(font) for font in fonts)
+    resources = b"".join([
+        b"<<\n/KinsokuSet [\n<<\n/Name ", engine_string("PhotoshopKinsokuHard"),
+        b"\n/NoStart ", engine_string("、。，．・：；？！ー)]}"),
+        b"\n/NoEnd ", engine_string("（［｛「『([{"),
+        b"\n/Keep ", engine_string("―‥"), b"\n/Hanging ", engine_string("、。.,"),
+        b"\n>>\n]\n/MojiKumiSet [\n<<\n/InternalName ", engine_string("Photoshop6MojiKumiSet1"),
+        b"\n>>\n]\n/TheNormalStyleSheet 0\n/TheNormalParagraphSheet 0\n/ParagraphSheetSet [\n<<\n/Name ",
+        engine_string("Normal RGB"), b"\n/DefaultStyleSheet 0\n/Properties\n<<\n/Justification 0\n",
+        b"/FirstLineIndent 0.0\n/StartIndent 0.0\n/EndIndent 0.0\n/SpaceBefore 0.0\n/SpaceAfter 0.0\n",
+        b"/AutoHyphenate true\n/HyphenatedWordSize 6\n/PreHyphen 2\n/PostHyphen 2\n/ConsecutiveHyphens 8\n",
+        b"/Zone 36.0\n/WordSpacing [ .8 1.0 1.33 ]\n/LetterSpacing [ 0.0 0.0 0.0 ]\n/GlyphSpacing [ 1.0 1.0 1.0 ]\n",
+        b"/AutoLeading 1.2\n/LeadingType 0\n/Hanging false\n/Burasagari false\n/KinsokuOrder 0\n",
+        b"/EveryLineComposer false\n>>\n>>\n]\n/StyleSheetSet [\n<<\n/Name ", engine_string("Normal RGB"),
+        b"\n/StyleSheetData\n", make_style(rng, len(fonts)), b"\n>>\n]\n/FontSet [\n", font_set,
+        b"\n]\n/SuperscriptSize .583\n/SuperscriptPosition .333\n/SubscriptSize .583\n",
+        b"/SubscriptPosition .333\n/SmallCapSize .7\n>>",
+    ])
+    style_runs = b"\n".join(
+        b"<<\n/StyleSheet\n<<\n/StyleSheetData\n%s\n>>\n>>" % make_style(rng, len(fonts)) for _ in run_lengths)
+    return b"".join([
+        b"\n\n<<\n/EngineDict\n<<\n/Editor\n<<\n/Text ", engine_string(text),
+        b"\n>>\n/ParagraphRun\n<<\n/DefaultRunData\n<<\n/ParagraphSheet\n<<\n/DefaultStyleSheet 0\n",
+        b"/Properties\n<<\n>>\n>>\n/Adjustments\n<<\n/Axis [ 1.0 0.0 1.0 ]\n/XY [ 0.0 0.0 ]\n>>\n>>\n",
+        b"/RunArray [\n<<\n/ParagraphSheet\n<<\n/DefaultStyleSheet 0\n/Properties\n<<\n/Justification 2\n>>\n>>\n",
+        b"/Adjustments\n<<\n/Axis [ 1.0 0.0 1.0 ]\n/XY [ 0.0 0.0 ]\n>>\n>>\n]\n",
+        b"/RunLengthArray [ %d ]\n/IsJoinable 1\n>>\n" % len(text),
+        b"/StyleRun\n<<\n/DefaultRunData\n<<\n/StyleSheet\n<<\n/StyleSheetData\n<<\n>>\n>>\n>>\n/RunArray [\n",
+        style_runs, b"\n]\n/RunLengthArray [ ", b" ".join(b"%d" % length for length in run_lengths),
+        b" ]\n/IsJoinable 2\n>>\n/GridInfo\n<<\n/GridIsOn false\n/ShowGrid false\n/GridSize 18.0\n",
+        b"/GridLeading 22.0\n/GridColor\n<<\n/Type 1\n/Values [ 0.0 0.0 0.0 1.0 ]\n>>\n>>\n",
+        b"/AntiAlias 4\n/UseFractionalGlyphWidths true\n/Rendered\n<<\n/Version 1\n/Shapes\n<<\n",
+        b"/WritingDirection 0\n/Children [\n<<\n/ShapeType 0\n/Procession 0\n/Lines\n<<\n",
+        b"/WritingDirection 0\n/Children [ ]\n>>\n/Cookie\n<<\n/Photoshop\n<<\n/ShapeType 0\n",
+        b"/PointBase [ 0.0 0.0 ]\n/Base\n<<\n/ShapeType 0\n/TransformPoint0 [ 1.0 0.0 ]\n",
+        b"/TransformPoint1 [ 0.0 1.0 ]\n/TransformPoint2 [ 0.0 0.0 ]\n>>\n>>\n>>\n>>\n]\n>>\n>>\n>>\n",
+        b"/ResourceDict\n", resources, b"\n/DocumentResources\n", resources, b"\n>>\x00",
+    ])
+
+
+def read_engine_data(psd_files):
+    """
+    The engine data of the text layers of the PSDs, written back as bytes
+    """
+    engine_data = []
+    for psd_file in psd_files:
+        psd = PSDImage.open(psd_file)
+        for layer in psd.descendants():
+            if layer.kind != "type":
+                continue
+            setting = layer.tagged_blocks.get_data(Tag.TYPE_TOOL_OBJECT_SETTING)
+            engine_data.append(setting.text_data[b"EngineData"].value.tobytes())
+    return engine_data
+
+
+def same_element(a, b):
+    """
+    Same element types and values, down to the leaves
+    """
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, Dict):
+        return list(a.keys()) == list(b.keys()) and all(
+            type(key_a) is type(key_b) for key_a, key_b in zip(a.keys(), b.keys())) and all(
+            same_element(a[key], b[key]) for key in a.keys())
+    if isinstance(a, List):
+        return len(a) == len(b) and all(same_element(x, y) for x, y in zip(a, b))
+    return type(a.value) is type(b.value) and a.value == b.value
+
+
+def best_time(func, args, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def parse_all(parser, engine_data):
+    return [parser(EngineData, data) for data in engine_data]
+
+
+def single_pass(cls, data):
+    return parse_engine_data(data, cls)
+
+
+def main():
+    opts, _ = getopt.getopt(sys.argv[1:], "r:i:", ["repeat=", "input="])
+    repeat = 3
+    psd_files = []
+    for k, v in opts:
+        if k in ("-r", "--repeat"):
+            repeat = max(1, int(v))
+        elif k in ("-i", "--input"):
+            psd_files = [psd_file for psd_file in v.split(",") if psd_file]
+
+    rng = np.random.default_rng(0)
+    cases = [(name, [make_engine_data(rng, length, run_count) for _ in range(20)])
+             for name, length, run_count in text_sizes]
+    if psd_files:
+        cases.append(("psd", read_engine_data(psd_files)))
+
+    print("%-10s %7s %10s %14s %16s %8s" % (
+        "Text", "Layers", "KB/layer", "psd_tools (ms)", "Single pass (ms)", "Speedup"))
+    for name, engine_data in cases:
+        if not engine_data:
+            continue
+        python_time, python_result = best_time(parse_all, (python_frombytes, engine_data), repeat)
+        fast_time, fast_result = best_time(parse_all, (single_pass, engine_data), repeat)
+        if not all(same_element(a, b) for a, b in zip(python_result, fast_result)):
+            print("%s: parsed engine data differs" % name)
+            return 1
+        print("%-10s %7d %10.1f %14.1f %16.1f %7.1fx" % (
+            name, len(engine_data), sum(len(data) for data in engine_data) / len(engine_data) / 1024,
+            python_time * 1000, fast_time * 1000, python_time / fast_time))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Time the editor independent phases of the import on synthetic PSDs.
+
+PSDs of a few sizes are generated with synthetic_psd.py into the work directory (kept between runs,
+AutoPSDUIBench in the temp directory unless -w is given),
+each one is loaded, parsed, its images exported (from scratch, then again with nothing changed)
+and its layout written, the same steps as auto_psd_batch.py. The phases run without unreal,
+like the batch converter. The best and median time of each phase are written to a json file,
+compare two runs with -c to find the regressions:
+    python Benchmarks/bench_import.py [-s small,medium] [-r repeat] [-w work_dir] [-o results.json] [-c baseline.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import getopt
+import platform
+import statistics
+import tempfile
+import subprocess
+
+benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+plugin_dir = os.path.normpath(os.path.join(benchmark_dir, ".."))
+sys.path.append(os.path.join(plugin_dir, "Content", "Python"))
+if sys.platform == "win32":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Win64"))
+elif sys.platform == "darwin":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Mac"))
+
+import numpy as np
+from psd_tools.version import __version__ as psd_tools_version
+
+from AutoPSDUI import psd_utils
+from AutoPSDUI.layout import save_layout
+from AutoPSDUI.layout_nodes import visit_layout
+from synthetic_psd import generate_psd
+
+# name: (layer count, group depth, ratio of text layers)
+scenarios = {
+    "small": (50, 2, 0.2),
+    "medium": (300, 4, 0.2),
+    "large": (1000, 6, 0.2),
+    "text": (300, 3, 0.8),
+    "deep": (300, 12, 0.2)
+}
+phases = ("Load", "Parse", "Export", "ExportUnchanged", "Layout")
+regression_threshold = 0.1
+# Smaller changes are timer noise
+regression_min_delta = 0.002
+
+
+def get_environment():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=plugin_dir,
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "Python": platform.python_version(),
+        "psd_tools": psd_tools_version,
+        "numpy": np.__version__,
+        "Platform": platform.platform(),
+        "Processor": platform.processor(),
+        "CPUs": os.cpu_count(),
+        "Commit": commit
+    }
+
+
+def run_import(psd_file, texture_dir, layout_file, timings):
+    """
+    One import of the PSD, add the time of every phase to timings
+    """
+    start = time.perf_counter()
+    psd = psd_utils.load_psd(psd_file)
+    timings["Load"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    content = psd_utils.parse_psd(psd)
+    content["Name"] = os.path.splitext(os.path.basename(psd_file))[0]
+    timings["Parse"].append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    export_report = psd_utils.flush_exports()
+    psd_utils.close_psd(psd)
+    export_time = time.perf_counter() - start
+    if all(record["Skipped"] for record in export_report):
+        timings["ExportUnchanged"].append(export_time)
+    else:
+        timings["Export"].append(export_time)
+
+    start = time.perf_counter()
+    visit_layout(content, set())
+    save_layout(layout_file, content)
+    timings["Layout"].append(time.perf_counter() - start)
+
+    errors = [record["Error"] for record in export_report if record["Error"]]
+    return len(export_report), errors
+
+
+def run_scenario(name, work_dir, repeat):
+    layer_count, depth, text_ratio = scenarios[name]
+    psd_file = os.path.join(work_dir, "PSD", "Synthetic_%s_%d_%d.psd" % (name, layer_count, depth))
+    if not os.path.exists(psd_file):
+        generate_psd(psd_file, layer_count, depth, text_ratio)
+    texture_dir = os.path.join(work_dir, "Textures", name)
+    layout_file = os.path.join(work_dir, "Layouts", name + ".json")
+
+    timings = dict((phase, []) for phase in phases)
+    image_count = 0
+    for _ in range(repeat):
+        # A cold import exports every image, the next one finds them all unchanged
+        shutil.rmtree(texture_dir, ignore_errors=True)
+        psd_utils.set_texture_src_dir(texture_dir)
+        for _ in range(2):
+            image_count, errors = run_import(psd_file, texture_dir, layout_file, timings)
+            if errors:
+                raise RuntimeError("%s: %s" % (name, errors[0]))
+
+    result = {
+        "Layers": layer_count,
+        "Depth": depth,
+        "TextRatio": text_ratio,
+        "Images": image_count,
+        "FileSize": os.path.getsize(psd_file),
+        "Phases": {}
+    }
+    for phase in phases:
+        samples = timings[phase]
+        result["Phases"][phase] = {"Min": min(samples), "Median": statistics.median(samples), "Samples": samples}
+    result["Total"] = sum(result["Phases"][phase]["Min"] for phase in phases if phase != "ExportUnchanged")
+    return result
+
+
+def compare_results(results, baseline):
+    """
+    Print the change of the best times against the baseline, return the regressed phases
+    """
+    regressions = []
+    print("\n%-10s %-16s %10s %10s %8s" % ("Scenario", "Phase", "Base (s)", "Now (s)", "Change"))
+    for name, result in results["Scenarios"].items():
+        base_result = baseline["Scenarios"].get(name)
+        if not base_result:
+            continue
+        for phase in phases:
+            base_time = base_result["Phases"][phase]["Min"]
+            current_time = result["Phases"][phase]["Min"]
+            change = (current_time - base_time) / base_time if base_time else 0.0
+            flag = ""
+            if change > regression_threshold and current_time - base_time > regression_min_delta:
+                flag = " REGRESSION"
+                regressions.append((name, phase))
+            print("%-10s %-16s %10.4f %10.4f %+7.1f%%%s" % (name, phase, base_time, current_time, change * 100, flag))
+    return regressions
+
+
+def main():
+    opts, _ = getopt.getopt(sys.argv[1:], "s:r:w:o:c:t:",
+                            ["scenarios=", "repeat=", "work-dir=", "output=", "compare=", "threshold="])
+    names = ["small", "medium", "large"]
+    repeat = 3
+    work_dir = os.path.join(tempfile.gettempdir(), "AutoPSDUIBench")
+    output_file = None
+    baseline_file = None
+    global regression_threshold
+    for k, v in opts:
+        if k in ("-s", "--scenarios"):
+            names = [name for name in v.split(",") if name]
+        elif k in ("-r", "--repeat"):
+            repeat = max(1, int(v))
+        elif k in ("-w", "--work-dir"):
+            work_dir = os.path.abspath(v)
+        elif k in ("-o", "--output"):
+            output_file = os.path.abspath(v)
+        elif k in ("-c", "--compare"):
+            baseline_file = os.path.abspath(v)
+        elif k in ("-t", "--threshold"):
+            regression_threshold = float(v) / 100.0
+    unknown_names = [name for name in names if name not in scenarios]
+    if unknown_names:
+        print("Unknown scenarios %s, choose from %s" % (", ".join(unknown_names), ", ".join(scenarios)))
+        return 2
+
+    results = {"Environment": get_environment(), "Repeat": repeat, "Scenarios": {}}
+    print("%-10s %7s %7s" % ("Scenario", "Layers", "Images") + "".join(" %15s" % phase for phase in phases))
+    for name in names:
+        result = run_scenario(name, work_dir, repeat)
+        results["Scenarios"][name] = result
+        print("%-10s %7d %7d" % (name, result["Layers"], result["Images"]) +
+              "".join(" %15.4f" % result["Phases"][phase]["Min"] for phase in phases))
+        sys.stdout.flush()
+
+    if not output_file:
+        output_file = os.path.join(work_dir, "Results", "bench_import_%s.json" % time.strftime("%Y%m%d_%H%M%S"))
+    if not os.path.exists(os.path.dirname(output_file)):
+        os.makedirs(os.path.dirname(output_file))
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    print("Results written to %s" % output_file)
+
+    if baseline_file:
+        with open(baseline_file, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline)
+        if regressions:
+            print("%d phases regressed by more than %.0f%%." % (len(regressions), regression_threshold * 100))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Compare the vectorized RLE decoder of AutoPSDUI with the pure python decoder of psd_tools.
+
+Channels of a few sizes are generated, RLE encoded by psd_tools and decoded by both decoders,
+the outputs must be identical:
+    python Benchmarks/bench_rle.py [-r repeat]
+"""
+import os
+import sys
+import time
+import getopt
+
+import numpy as np
+
+plugin_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(plugin_dir, "Content", "Python"))
+if sys.platform == "win32":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Win64"))
+elif sys.platform == "darwin":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Mac"))
+
+from psd_tools.compression import encode_rle
+from psd_tools.compression import rle as python_rle
+
+from AutoPSDUI.rle import decode_rle
+
+channel_sizes = ((256, 256), (1024, 1024), (2048, 2048))
+
+
+def make_channel(width, height, seed):
+    """
+    A channel looking like UI art: flat panels, a gradient and some noise
+    """
+    rng = np.random.default_rng(seed)
+    channel = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(16):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        channel[y:y + height // 4, x:x + width // 4] = rng.integers(0, 256)
+    gradient_rows = slice(height // 3, height // 2)
+    channel[gradient_rows] = (np.arange(width) * 256 // width).astype(np.uint8)
+    channel[rng.random((height, width)) < 0.02] = 255
+    return channel.tobytes()
+
+
+def python_decode_rle(data, width, height, depth, version):
+    """
+    psd_tools.compression.decode_rle with its pure python decoder
+    """
+    row_size = max(width * depth // 8, 1)
+    counts_size = (2, 4)[version - 1] * height
+    counts = np.frombuffer(data, dtype=(">u2", ">u4")[version - 1], count=height).tolist()
+    rows = []
+    offset = counts_size
+    for count in counts:
+        rows.append(python_rle.decode(data[offset:offset + count], row_size))
+        offset += count
+    return b"".join(rows)
+
+
+def best_time(func, args, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    opts, _ = getopt.getopt(sys.argv[1:], "r:", ["repeat="])
+    repeat = 3
+    for k, v in opts:
+        if k in ("-r", "--repeat"):
+            repeat = max(1, int(v))
+
+    print("%-12s %10s %12s %12s %8s" % ("Channel", "RLE bytes", "Python (ms)", "NumPy (ms)", "Speedup"))
+    for index, (width, height) in enumerate(channel_sizes):
+        channel = make_channel(width, height, index)
+        data = encode_rle(channel, width, height, 8, 1)
+        python_time, python_result = best_time(python_decode_rle, (data, width, height, 8, 1), repeat)
+        numpy_time, numpy_result = best_time(decode_rle, (data, width, height, 8, 1), repeat)
+        if python_result != numpy_result or numpy_result != channel:
+            print("%dx%d: decoded data differs" % (width, height))
+            return 1
+        print("%-12s %10d %12.1f %12.1f %7.1fx" % (
+            "%dx%d" % (width, height), len(data), python_time * 1000, numpy_time * 1000, python_time / numpy_time))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
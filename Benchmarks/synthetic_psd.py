@@ -0,0 +1,340 @@
+"""
+Generate synthetic PSD files shaped like UI mockups, for the benchmarks.
+
+psd_tools can only create an empty document (PSDImage.new), so the layer records are built here:
+pixel layers with RLE channels, groups, and type layers with their engine data, stroke and drop shadow.
+The layer tree follows the naming rules of AutoPSDUI: Button_ groups with _normal/_hovered/_pressed/_disabled
+images, Progress_ groups with _background/_fill images, List_ groups holding a child group.
+The same parameters and seed always give the same file:
+    python Benchmarks/synthetic_psd.py -o out.psd [-l layers] [-d depth] [-t text ratio] [-s seed]
+"""
+import os
+import sys
+import getopt
+
+import numpy as np
+
+plugin_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+if sys.platform == "win32":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Win64"))
+elif sys.platform == "darwin":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Mac"))
+
+from psd_tools import PSDImage
+from psd_tools.constants import ChannelID, Compression, SectionDivider, Tag
+from psd_tools.psd.descriptor import Bool, Descriptor, DescriptorBlock, DescriptorBlock2, Double, \
+    Enumerated, RawData, String, UnitFloat
+from psd_tools.psd.layer_and_mask import ChannelData, ChannelDataList, ChannelImageData, ChannelInfo, \
+    LayerAndMaskInformation, LayerInfo, LayerRecord, LayerRecords
+from psd_tools.psd.tagged_blocks import TaggedBlock, TaggedBlocks, TypeToolObjectSetting
+from psd_tools.terminology import Enum, Key, Klass, Type, Unit
+
+rgba_channels = (ChannelID.TRANSPARENCY_MASK, ChannelID.CHANNEL_0, ChannelID.CHANNEL_1, ChannelID.CHANNEL_2)
+
+
+class Node(object):
+    """
+    A layer of the tree to generate, kind is "pixel", "type" or "group"
+    """
+
+    def __init__(self, kind, name, bbox=None, pixels=None, children=None, text=None):
+        self.kind = kind
+        self.name = name
+        self.bbox = bbox
+        self.pixels = pixels
+        self.children = children or []
+        self.text = text
+
+
+def make_pixels(rng, width, height):
+    """
+    UI like bitmap: a rounded panel with a vertical gradient, a flat border and some noise
+    """
+    y, x = np.mgrid[0:height, 0:width]
+    radius = max(1, min(width, height) // 6)
+    dx = np.maximum(np.maximum(radius - x, x - (width - 1 - radius)), 0)
+    dy = np.maximum(np.maximum(radius - y, y - (height - 1 - radius)), 0)
+    inside = dx * dx + dy * dy <= radius * radius
+
+    base = rng.integers(0, 256, 3)
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    gradient = (y * 64 // max(height, 1)).astype(np.int32)
+    for channel in range(3):
+        pixels[..., channel] = np.clip(int(base[channel]) - gradient, 0, 255)
+    border = (x < 2) | (y < 2) | (x >= width - 2) | (y >= height - 2)
+    pixels[border, :3] = 255 - base
+    noise = rng.random((height, width)) < 0.01
+    pixels[noise, :3] = rng.integers(0, 256, (int(noise.sum()), 3))
+    pixels[..., 3] = np.where(inside, 255, 0)
+    return pixels
+
+
+def rle_channels(pixels):
+    width, height = pixels.shape[1], pixels.shape[0]
+    channels = ChannelDataList()
+    infos = []
+    for channel_id, index in zip(rgba_channels, (3, 0, 1, 2)):
+        channel = ChannelData(compression=Compression.RLE)
+        channel.set_data(np.ascontiguousarray(pixels[..., index]).tobytes(), width, height, 8)
+        channels.append(channel)
+        infos.append(ChannelInfo(id=channel_id, length=channel._length))
+    return channels, infos
+
+
+def empty_channels():
+    channels = ChannelDataList()
+    infos = []
+    for channel_id in rgba_channels:
+        channels.append(ChannelData(compression=Compression.RAW))
+        infos.append(ChannelInfo(id=channel_id, length=2))
+    return channels, infos
+
+
+def pixel_record(node):
+    left, top = node.bbox[:2]
+    height, width = node.pixels.shape[:2]
+    record = LayerRecord(top=top, left=left, bottom=top + height, right=left + width, name=node.name)
+    channels, record.channel_info = rle_channels(node.pixels)
+    return record, channels
+
+
+def group_record(name, divider):
+    record = LayerRecord(name=name)
+    blocks = TaggedBlocks()
+    blocks.set_data(Tag.SECTION_DIVIDER_SETTING, divider)
+    record.tagged_blocks = blocks
+    channels, record.channel_info = empty_channels()
+    return record, channels
+
+
+def engine_string(value):
+    data = ("﻿" + value).encode("utf-16-be")
+    data = data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    return b"(" + data + b")"
+
+
+def make_engine_data(text, font, size, color, justification):
+    """
+    The parts of the text engine data read by psd_utils.parse_text
+    """
+    color_values = b" ".join(b"%.4f" % value for value in (1.0,) + tuple(color))
+    return b"".join([
+        b"\n\n<<\n\t/EngineDict\n\t<<\n\t\t/Editor\n\t\t<<\n\t\t\t/Text ", engine_string(text + "\r"),
+        b"\n\t\t>>\n\t\t/ParagraphRun\n\t\t<<\n\t\t\t/RunArray [\n\t\t\t<<\n\t\t\t\t/ParagraphSheet\n\t\t\t\t<<\n",
+        b"\t\t\t\t\t/Properties\n\t\t\t\t\t<<\n\t\t\t\t\t\t/Justification %d\n" % justification,
+        b"\t\t\t\t\t>>\n\t\t\t\t>>\n\t\t\t>>\n\t\t\t]\n\t\t\t/RunLengthArray [ %d ]\n\t\t>>\n\t>>\n" % (len(text) + 1),
+        b"\t/ResourceDict\n\t<<\n\t\t/FontSet [\n\t\t<<\n\t\t\t/Name ", engine_string(font),
+        b"\n\t\t\t/Script 0\n\t\t\t/FontType 1\n\t\t>>\n\t\t]\n\t\t/StyleSheetSet [\n\t\t<<\n",
+        b"\t\t\t/Name ", engine_string("Normal RGB"),
+        b"\n\t\t\t/StyleSheetData\n\t\t\t<<\n\t\t\t\t/Font 0\n\t\t\t\t/FontSize %.1f\n" % size,
+        b"\t\t\t\t/FillColor\n\t\t\t\t<<\n\t\t\t\t\t/Type 1\n\t\t\t\t\t/Values [ ", color_values,
+        b" ]\n\t\t\t\t>>\n\t\t\t>>\n\t\t>>\n\t\t]\n\t>>\n>>\n"
+    ])
+
+
+def make_color(rgb):
+    color = Descriptor(classID=Klass.RGBColor.value)
+    for key, value in zip((b"Rd  ", b"Grn ", b"Bl  "), rgb):
+        color[key] = Double(float(value))
+    return color
+
+
+def make_effects(rng):
+    """
+    Object based effects with a stroke and a drop shadow
+    """
+    stroke = Descriptor(classID=Klass.FrameFX.value)
+    stroke[Key.Enabled] = Bool(True)
+    stroke[Key.Style] = Enumerated(Type.FrameStyle.value, Enum.OutsetFrame.value)
+    stroke[Key.PaintType] = Enumerated(Type.FrameFill.value, Enum.SolidColor.value)
+    stroke[Key.Mode] = Enumerated(Type.BlendMode.value, Enum.Normal.value)
+    stroke[Key.Opacity] = UnitFloat(unit=Unit.Percent, value=100.0)
+    stroke[Key.SizeKey] = UnitFloat(unit=Unit.Pixels, value=float(rng.integers(1, 4)))
+    stroke[Key.Color] = make_color(rng.integers(0, 256, 3))
+
+    shadow = Descriptor(classID=Klass.DropShadow.value)
+    shadow[Key.Enabled] = Bool(True)
+    shadow[Key.Mode] = Enumerated(Type.BlendMode.value, Enum.Multiply.value)
+    shadow[Key.Color] = make_color((0, 0, 0))
+    shadow[Key.Opacity] = UnitFloat(unit=Unit.Percent, value=75.0)
+    shadow[Key.UseGlobalAngle] = Bool(False)
+    shadow[Key.LocalLightingAngle] = UnitFloat(unit=Unit.Angle, value=120.0)
+    shadow[Key.Distance] = UnitFloat(unit=Unit.Pixels, value=float(rng.integers(1, 6)))
+    shadow[Key.ChokeMatte] = UnitFloat(unit=Unit.Pixels, value=0.0)
+    shadow[Key.Blur] = UnitFloat(unit=Unit.Pixels, value=3.0)
+
+    effects = DescriptorBlock2()
+    effects[Key.Scale] = UnitFloat(unit=Unit.Percent, value=100.0)
+    effects[b"masterFXSwitch"] = Bool(True)
+    effects[Key.FrameFX] = stroke
+    effects[Key.DropShadow] = shadow
+    return effects
+
+
+def type_record(node, rng):
+    left, top, right, bottom = node.bbox
+    text_data = DescriptorBlock(classID=b"TxLr")
+    text_data[b"Txt "] = String(node.text + "\r")
+    text_data[b"EngineData"] = RawData(make_engine_data(
+        node.text, "ArialMT", float(rng.integers(12, 48)), rng.random(3), int(rng.integers(0, 3))))
+    type_setting = TypeToolObjectSetting(
+        version=1,
+        transform=(1.0, 0.0, 0.0, 1.0, float(left), float(bottom)),
+        text_version=50,
+        text_data=text_data,
+        warp_version=1,
+        warp=DescriptorBlock(classID=b"warp"),
+        left=0, top=0, right=right - left, bottom=bottom - top
+    )
+    blocks = TaggedBlocks()
+    for key, data in ((Tag.TYPE_TOOL_OBJECT_SETTING, type_setting),
+                      (Tag.OBJECT_BASED_EFFECTS_LAYER_INFO, make_effects(rng))):
+        blocks[key] = TaggedBlock(key=key, data=data)
+
+    # The rasterized text is a bitmap like the others
+    width, height = right - left, bottom - top
+    record = LayerRecord(top=top, left=left, bottom=bottom, right=right, name=node.name, tagged_blocks=blocks)
+    channels, record.channel_info = rle_channels(make_pixels(rng, width, height))
+    return record, channels
+
+
+def random_rect(rng, canvas_size, min_size, max_size):
+    width = int(rng.integers(min_size, max_size + 1))
+    height = int(rng.integers(min_size, max_size + 1))
+    left = int(rng.integers(0, max(1, canvas_size[0] - width)))
+    top = int(rng.integers(0, max(1, canvas_size[1] - height)))
+    return left, top, width, height
+
+
+def make_image(rng, name, canvas_size, min_size=16, max_size=256, rect=None):
+    left, top, width, height = rect or random_rect(rng, canvas_size, min_size, max_size)
+    return Node("pixel", name, (left, top, left + width, top + height), make_pixels(rng, width, height))
+
+
+def make_text(rng, name, canvas_size):
+    left, top, width, height = random_rect(rng, canvas_size, 24, 64)
+    width = height * int(rng.integers(2, 8))
+    return Node("type", name, (left, top, left + width, top + height), text="%s %d" % (name, rng.integers(1000)))
+
+
+def make_widget(rng, index, canvas_size, text_ratio):
+    """
+    One widget of the mockup, return the node and its number of layers
+    """
+    kind = rng.random()
+    if kind < text_ratio:
+        return make_text(rng, "Text_%d" % index, canvas_size), 1
+    kind = rng.random()
+    if kind < 0.2:
+        name = "Button_%d" % index
+        rect = random_rect(rng, canvas_size, 32, 160)
+        # The state suffix is cut off to name the image, keep the names distinct without it
+        states = [make_image(rng, "%s_btn%d_%s" % (state, index, state), canvas_size, rect=rect)
+                  for state in ("normal", "hovered", "pressed", "disabled")]
+        label = make_text(rng, "Label_%d" % index, canvas_size)
+        return Node("group", name, children=[label] + states), 6
+    if kind < 0.3:
+        rect = random_rect(rng, canvas_size, 16, 320)
+        rect = (rect[0], rect[1], rect[2], max(8, rect[3] // 4))
+        parts = [make_image(rng, "bar%d_progress_%s" % (index, part), canvas_size, rect=rect)
+                 for part in ("background", "fill")]
+        return Node("group", "Progress_%d" % index, children=parts), 3
+    if kind < 0.35:
+        entry = Node("group", "child", children=[
+            make_image(rng, "cell_%d" % index, canvas_size, 32, 96), make_text(rng, "CellText_%d" % index, canvas_size)
+        ])
+        return Node("group", "List_%d" % index, children=[entry]), 5
+    return make_image(rng, "Image_%d" % index, canvas_size), 1
+
+
+def make_tree(layer_count, depth, text_ratio, canvas_size, seed):
+    """
+    Widgets spread over panels nested depth levels deep, until layer_count layers
+    """
+    rng = np.random.default_rng(seed)
+    root = Node("group", "root")
+    panels = [root]
+    count = 0
+    index = 0
+    while count < layer_count:
+        parent = panels[int(rng.integers(len(panels)))]
+        if len(panels) < depth * 4 and rng.random() < 0.1 and count + 1 < layer_count:
+            level = 1
+            panel_parent = parent
+            while panel_parent is not root and level < depth:
+                level += 1
+                panel_parent = next(p for p in panels if panel_parent in p.children)
+            if level < depth:
+                panel = Node("group", "Panel_%d" % index)
+                parent.children.append(panel)
+                panels.append(panel)
+                count += 1
+                index += 1
+                continue
+        node, node_layers = make_widget(rng, index, canvas_size, text_ratio)
+        parent.children.append(node)
+        count += node_layers
+        index += 1
+    return root.children
+
+
+def build_records(nodes, rng, records):
+    """
+    Layer records from bottom to top, a group is closed by a divider record below its layers
+    """
+    for node in reversed(nodes):
+        if node.kind == "pixel":
+            records.append(pixel_record(node))
+        elif node.kind == "type":
+            records.append(type_record(node, rng))
+        else:
+            records.append(group_record("</Layer group>", SectionDivider.BOUNDING_SECTION_DIVIDER))
+            build_records(node.children, rng, records)
+            records.append(group_record(node.name, SectionDivider.OPEN_FOLDER))
+    return records
+
+
+def generate_psd(psd_file, layer_count=100, depth=3, text_ratio=0.2, canvas_size=(1920, 1080), seed=0):
+    """
+    Write a synthetic PSD with about layer_count layers
+    """
+    tree = make_tree(layer_count, depth, text_ratio, canvas_size, seed)
+    records = build_records(tree, np.random.default_rng(seed + 1), [])
+
+    psd = PSDImage.new("RGB", canvas_size)
+    layer_info = LayerInfo(
+        layer_count=len(records),
+        layer_records=LayerRecords([record for record, _ in records]),
+        channel_image_data=ChannelImageData([channels for _, channels in records])
+    )
+    psd._record.layer_and_mask_information = LayerAndMaskInformation(layer_info=layer_info)
+    base_dir = os.path.dirname(psd_file)
+    if base_dir and not os.path.exists(base_dir):
+        os.makedirs(base_dir)
+    with open(psd_file, "wb") as f:
+        psd._record.write(f)
+
+
+def main():
+    opts, _ = getopt.getopt(sys.argv[1:], "o:l:d:t:s:", ["output=", "layers=", "depth=", "text-ratio=", "seed="])
+    options = {"psd_file": None, "layer_count": 100, "depth": 3, "text_ratio": 0.2, "seed": 0}
+    for k, v in opts:
+        if k in ("-o", "--output"):
+            options["psd_file"] = v
+        elif k in ("-l", "--layers"):
+            options["layer_count"] = int(v)
+        elif k in ("-d", "--depth"):
+            options["depth"] = int(v)
+        elif k in ("-t", "--text-ratio"):
+            options["text_ratio"] = float(v)
+        elif k in ("-s", "--seed"):
+            options["seed"] = int(v)
+    if not options["psd_file"]:
+        print(__doc__)
+        return 2
+    generate_psd(**options)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
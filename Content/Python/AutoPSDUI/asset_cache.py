@@ -0,0 +1,45 @@
+"""
+Assets loaded while building WBPs, so that a texture used by many widgets is loaded once per run.
+"""
+import unreal
+
+
+def get_asset_path(p_path):
+    """
+    The package path of an asset, object paths like /Game/Dir/Name.Name are reduced to /Game/Dir/Name
+    """
+    return p_path.split(".")[0]
+
+
+class AssetCache(object):
+    """
+    Assets keyed by asset path, with the number of loads served from the cache (hits) or loaded (misses)
+    """
+
+    def __init__(self):
+        self.assets = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add_assets(self, p_assets):
+        """
+        Add assets already loaded, such as the textures returned by an import, keyed by asset or object path
+        """
+        for path, asset in p_assets.items():
+            if asset:
+                self.assets[get_asset_path(path)] = asset
+
+    def load(self, p_path):
+        asset_path = get_asset_path(p_path)
+        asset = self.assets.get(asset_path)
+        if asset:
+            self.hits += 1
+            return asset
+        self.misses += 1
+        asset = unreal.EditorAssetLibrary.load_asset(asset_path)
+        if asset:
+            self.assets[asset_path] = asset
+        return asset
+
+    def log_stats(self):
+        unreal.log("Asset cache: %d assets, %d hits, %d misses." % (len(self.assets), self.hits, self.misses))
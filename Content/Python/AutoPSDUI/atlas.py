@@ -0,0 +1,217 @@
+"""
+Pack the exported layer images of a layout into texture atlases.
+
+The images are packed with the MaxRects algorithm (best short side fit) into atlases of at most
+max_size pixels, each atlas is shrunk to the smallest power of two size holding its images.
+The image links of the layout are replaced by the atlas file, with the region of the image in
+the atlas stored next to the link:
+    "Link": atlas file, "LinkAtlas": {"UVMin": [u, v], "UVMax": [u, v], "Size": [width, height]}
+"""
+import io
+import os
+import re
+
+from PIL import Image
+
+from AutoPSDUI.layout import gather_image_links
+
+# Transparent pixels between images, the image edges are extruded into it so that filtering
+# at the edges does not sample the neighbour images
+atlas_padding = 2
+
+
+class MaxRectsBin(object):
+    """
+    A bin keeping the list of maximal free rectangles, as (x, y, width, height)
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free_rects = [(0, 0, width, height)]
+        self.used_width = 0
+        self.used_height = 0
+
+    def insert(self, width, height):
+        """
+        Place a rectangle, return its position or None if it does not fit
+        """
+        best = None
+        best_score = None
+        for free_x, free_y, free_width, free_height in self.free_rects:
+            if width <= free_width and height <= free_height:
+                leftover_x = free_width - width
+                leftover_y = free_height - height
+                score = (min(leftover_x, leftover_y), max(leftover_x, leftover_y))
+                if best_score is None or score < best_score:
+                    best = (free_x, free_y)
+                    best_score = score
+        if best is None:
+            return None
+
+        placed = (best[0], best[1], width, height)
+        self.split_free_rects(placed)
+        self.prune_free_rects()
+        self.used_width = max(self.used_width, placed[0] + width)
+        self.used_height = max(self.used_height, placed[1] + height)
+        return best
+
+    def split_free_rects(self, placed):
+        x, y, width, height = placed
+        new_rects = []
+        for rect in self.free_rects:
+            free_x, free_y, free_width, free_height = rect
+            if x >= free_x + free_width or x + width <= free_x or \
+                    y >= free_y + free_height or y + height <= free_y:
+                new_rects.append(rect)
+                continue
+            # Keep the parts of the free rectangle around the placed one
+            if x > free_x:
+                new_rects.append((free_x, free_y, x - free_x, free_height))
+            if x + width < free_x + free_width:
+                new_rects.append((x + width, free_y, free_x + free_width - x - width, free_height))
+            if y > free_y:
+                new_rects.append((free_x, free_y, free_width, y - free_y))
+            if y + height < free_y + free_height:
+                new_rects.append((free_x, y + height, free_width, free_y + free_height - y - height))
+        self.free_rects = new_rects
+
+    def prune_free_rects(self):
+        """
+        Remove the free rectangles contained in another one
+        """
+        rects = sorted(set(self.free_rects), key=lambda r: r[2] * r[3], reverse=True)
+        kept = []
+        for rect in rects:
+            x, y, width, height = rect
+            if not any(x >= k[0] and y >= k[1] and x + width <= k[0] + k[2] and y + height <= k[1] + k[3]
+                       for k in kept):
+                kept.append(rect)
+        self.free_rects = kept
+
+
+def next_power_of_two(value):
+    size = 1
+    while size < value:
+        size *= 2
+    return size
+
+
+def previous_power_of_two(value):
+    size = 1
+    while size * 2 <= value:
+        size *= 2
+    return size
+
+
+def pack_images(p_sizes, p_max_size):
+    """
+    Pack images of the given sizes, keyed by image file, into as few atlases as possible.
+    Return a list of atlases as (width, height, {image file: (x, y)}),
+    images larger than an atlas and atlases holding a single image are left out.
+    The max size is rounded down to a power of two, the atlases are rounded up to one.
+    """
+    p_max_size = previous_power_of_two(p_max_size)
+    remaining = sorted(p_sizes.items(), key=lambda item: (max(item[1]), min(item[1])), reverse=True)
+    remaining = [(image, size) for image, size in remaining
+                 if size[0] + 2 * atlas_padding <= p_max_size and size[1] + 2 * atlas_padding <= p_max_size]
+
+    atlases = []
+    while remaining:
+        atlas_bin = MaxRectsBin(p_max_size, p_max_size)
+        placements = {}
+        not_placed = []
+        for image, (width, height) in remaining:
+            pos = atlas_bin.insert(width + 2 * atlas_padding, height + 2 * atlas_padding)
+            if pos is None:
+                not_placed.append((image, (width, height)))
+            else:
+                placements[image] = (pos[0] + atlas_padding, pos[1] + atlas_padding)
+        if len(placements) > 1:
+            atlases.append((next_power_of_two(atlas_bin.used_width), next_power_of_two(atlas_bin.used_height), placements))
+        remaining = not_placed
+    return atlases
+
+
+def paste_extruded(p_atlas, p_image, x, y):
+    """
+    Paste the image and repeat its border pixels into the padding around it
+    """
+    width, height = p_image.size
+    p_atlas.paste(p_image, (x, y))
+    edges = (
+        ((0, 0, width, 1), (width, atlas_padding), (x, y - atlas_padding)),
+        ((0, height - 1, width, height), (width, atlas_padding), (x, y + height)),
+        ((0, 0, 1, height), (atlas_padding, height), (x - atlas_padding, y)),
+        ((width - 1, 0, width, height), (atlas_padding, height), (x + width, y))
+    )
+    for crop_box, size, pos in edges:
+        p_atlas.paste(p_image.crop(crop_box).resize(size, Image.NEAREST), pos)
+
+
+def save_atlas(p_atlas, p_atlas_file):
+    """
+    Save the atlas as png, the file is left untouched if its content did not change.
+    Return whether the file changed.
+    """
+    with io.BytesIO() as fp:
+        p_atlas.save(fp, "PNG")
+        data = fp.getvalue()
+    if os.path.exists(p_atlas_file):
+        with open(p_atlas_file, "rb") as f:
+            if f.read() == data:
+                return False
+    with open(p_atlas_file, "wb") as f:
+        f.write(data)
+    return True
+
+
+def remove_stale_atlases(p_atlas_dir, p_name, p_count):
+    """
+    Delete the atlases of the layout numbered from p_count on, left by a previous packing into more atlases
+    """
+    pattern = re.compile(r"Atlas_%s_(\d+)\.png$" % re.escape(p_name))
+    for file_name in os.listdir(p_atlas_dir):
+        match = pattern.match(file_name)
+        if match and int(match.group(1)) >= p_count:
+            os.remove(os.path.join(p_atlas_dir, file_name))
+
+
+def pack_layout_atlases(p_content, p_atlas_dir, p_max_size):
+    """
+    Pack the images linked by the layout into atlases named after the layout and link them instead.
+    Return the atlas files whose content did not change.
+    """
+    links = gather_image_links(p_content, [])
+    sizes = {}
+    for layer, key in links:
+        if layer[key] not in sizes:
+            with Image.open(layer[key]) as image:
+                sizes[layer[key]] = image.size
+
+    if not os.path.exists(p_atlas_dir):
+        os.makedirs(p_atlas_dir)
+
+    unchanged_atlases = []
+    image_regions = {}
+    atlases = pack_images(sizes, p_max_size)
+    for index, (width, height, placements) in enumerate(atlases):
+        atlas_file = os.path.join(p_atlas_dir, "Atlas_%s_%d.png" % (p_content["Name"], index))
+        atlas = Image.new("RGBA", (width, height), (255, 255, 255, 0))
+        for image_file, (x, y) in placements.items():
+            with Image.open(image_file) as image:
+                paste_extruded(atlas, image.convert("RGBA"), x, y)
+            image_width, image_height = sizes[image_file]
+            image_regions[image_file] = (atlas_file, {
+                "UVMin": [x / width, y / height],
+                "UVMax": [(x + image_width) / width, (y + image_height) / height],
+                "Size": [image_width, image_height]
+            })
+        if not save_atlas(atlas, atlas_file):
+            unchanged_atlases.append(atlas_file)
+    remove_stale_atlases(p_atlas_dir, p_content["Name"], len(atlases))
+
+    for layer, key in links:
+        if layer[key] in image_regions:
+            layer[key], layer[key + "Atlas"] = image_regions[layer[key]]
+    return unchanged_atlases
@@ -0,0 +1,42 @@
+"""
+The converter kept for the whole editor session.
+
+init_unreal.py registers it with the C++ module when the editor starts, the module calls import_job
+on it for every batch of reimported PSDs instead of running auto_psd_ui.py as a new script.
+The AutoPSDUI modules and psd_tools are imported on the first job and stay loaded,
+the settings are read again for every job.
+"""
+import traceback
+
+import unreal
+
+# auto_psd_ui imported as a module, once its dependencies are loaded
+auto_psd_ui = None
+
+
+def get_auto_psd_ui():
+    global auto_psd_ui
+    if auto_psd_ui is None:
+        import auto_psd_ui as auto_psd_ui_module
+        if not auto_psd_ui_module.load_dependencies():
+            return None
+        auto_psd_ui = auto_psd_ui_module
+    return auto_psd_ui
+
+
+@unreal.uclass()
+class AutoPSDUIPythonConverter(unreal.AutoPSDUIConverter):
+
+    @unreal.ufunction(override=True)
+    def import_job(self, job_file):
+        converter = get_auto_psd_ui()
+        if not converter:
+            return
+        try:
+            converter.run(job_file=job_file)
+        except Exception:
+            unreal.log_error("Import job '%s' failed:\n%s" % (job_file, traceback.format_exc()))
+
+
+def register_converter():
+    unreal.AutoPSDUIConverter.register_converter(unreal.new_object(AutoPSDUIPythonConverter))
@@ -0,0 +1,109 @@
+"""
+Defer the heavy imports of psd_tools.composite until a layer needs them.
+
+psd_tools.composite imports scipy.interpolate (vector shapes and masks) and skimage (layer effects) when it is
+imported, the first layer that is not a plain pixel layer would pay for all of them. Stand-in modules are put in
+sys.modules instead, the real module is imported on the first access to one of its attributes.
+Functions imported by name ("from skimage.morphology import disk") are wrapped, the module is imported
+when the function is called.
+The time spent in every deferred import is kept in import_times for the diagnostics.
+"""
+import sys
+import time
+import threading
+import importlib
+import importlib.util
+import types
+
+from AutoPSDUI import profiler
+
+# Module name: functions imported by name from it by psd_tools.composite
+deferred_modules = {
+    "scipy.interpolate": (),
+    "skimage.filters": (),
+    "skimage.morphology": ("disk",),
+}
+
+# Module name: seconds spent importing it
+import_times = {}
+import_lock = threading.RLock()
+
+
+class DeferredModule(types.ModuleType):
+    """
+    Stand-in of a module that is not imported yet
+    """
+
+    def __init__(self, name, p_functions):
+        super(DeferredModule, self).__init__(name)
+        self.__dict__["_deferred_functions"] = p_functions
+
+    def __getattr__(self, name):
+        # Only called for the attributes the stand-in does not have
+        if name.startswith("__"):
+            raise AttributeError(name)
+        if name in self._deferred_functions and not is_module_loaded(self.__name__):
+            return make_deferred_function(self.__name__, name)
+        return getattr(load_module(self.__name__), name)
+
+
+def is_module_loaded(p_name):
+    module = sys.modules.get(p_name)
+    return module is not None and not isinstance(module, DeferredModule)
+
+
+def load_module(p_name):
+    """
+    Import the real module in place of its stand-in
+    """
+    with import_lock:
+        module = sys.modules.get(p_name)
+        if isinstance(module, DeferredModule):
+            del sys.modules[p_name]
+            start = time.perf_counter()
+            with profiler.span("DeferredImport", {"Module": p_name}):
+                module = importlib.import_module(p_name)
+            import_times[p_name] = time.perf_counter() - start
+        elif module is None:
+            module = importlib.import_module(p_name)
+        return module
+
+
+def make_deferred_function(p_module_name, p_function_name):
+    def deferred_function(*args, **kwargs):
+        return getattr(load_module(p_module_name), p_function_name)(*args, **kwargs)
+    deferred_function.__name__ = p_function_name
+    return deferred_function
+
+
+def install_deferred_imports():
+    """
+    Put the stand-ins in sys.modules, before psd_tools.composite is imported.
+    Modules already imported, or that are not installed, are left alone.
+    """
+    if "psd_tools.composite" in sys.modules:
+        return
+    for name, functions in deferred_modules.items():
+        if name in sys.modules:
+            continue
+        parent_name, _, child_name = name.rpartition(".")
+        try:
+            parent = importlib.import_module(parent_name)
+            if importlib.util.find_spec(name) is None:
+                continue
+        except ImportError:
+            continue
+        module = DeferredModule(name, functions)
+        sys.modules[name] = module
+        setattr(parent, child_name, module)
+
+
+def get_import_report():
+    """
+    The deferred modules imported so far with their import time, and those still deferred
+    """
+    lines = ["%s imported in %.2fs" % (name, seconds) for name, seconds in sorted(import_times.items())]
+    deferred = sorted(name for name, module in sys.modules.items() if isinstance(module, DeferredModule))
+    if deferred:
+        lines.append("Not imported: %s" % ", ".join(deferred))
+    return lines
@@ -0,0 +1,170 @@
+"""
+Single pass parsing of the engine data of text layers.
+
+The Tokenizer of psd_tools copies the rest of the engine data for every token, then tries the regex
+of every token type on it, so the time spent on a text layer grows with the square of its engine data.
+parse_engine_data scans the data once with a single regex matched at the current position,
+the group that matched gives the token type. The output is made of the same Dict, List, String,
+Integer, Float, Bool, Property and Tag elements as psd_tools.psd.engine_data.
+Data the scanner does not accept is parsed again by psd_tools, which raises its usual errors.
+"""
+import re
+
+from psd_tools.psd.engine_data import (
+    EngineData, EngineData2, EngineToken, Tokenizer, TOKEN_CLASSES,
+    Dict, List, String, Integer, Float, Bool, Property
+)
+
+# The parser of psd_tools, EngineData.frombytes and EngineData2.frombytes are Dict.frombytes
+python_frombytes = Dict.frombytes.__func__
+
+# Tokens are separated by spaces, tabs or newlines, UTF-16 strings end at the first unescaped ')'
+token_end = rb"(?=[ \n\t]|\Z)"
+token_re = re.compile(
+    rb"[ \n\t]*(?:"
+    rb"(?P<string>\(\xfe\xff\)|\(\xfe\xff.*?[^\\]\))"
+    rb"|(?P<property>/[A-Za-z0-9_]+)" + token_end +
+    rb"|(?P<integer>-?[0-9]+)" + token_end +
+    rb"|(?P<float>-?[0-9]*\.[0-9]+)" + token_end +
+    rb"|(?P<dict_start><<)" + token_end +
+    rb"|(?P<dict_end>>>\x00*)" + token_end +
+    rb"|(?P<array_start>\[)" + token_end +
+    rb"|(?P<array_end>\])" + token_end +
+    rb"|(?P<bool>true|false)" + token_end +
+    rb"|(?P<other>(?!\(\xfe\xff)[^ \n\t]+)"
+    rb"|(?P<end>\Z))",
+    re.S)
+
+# Property keys are frozen and compared by value, the same names are used in every text layer
+properties = {}
+
+
+class EngineDataError(ValueError):
+    """
+    The scanner can not parse the data like psd_tools would
+    """
+    pass
+
+
+def get_property(p_token):
+    prop = properties.get(p_token)
+    if prop is None:
+        prop = Property.frombytes(p_token)
+        properties[p_token] = prop
+    return prop
+
+
+def make_string(p_data, p_start, p_end):
+    value = p_data[p_start + 1:p_end - 1]
+    if b"\\" in value:
+        for c in String._ESCAPED_CHARS:
+            value = value.replace(b"\\" + c, c)
+    return String(value.decode("utf-16"))
+
+
+def make_other(p_token):
+    """
+    Tokens without a group of their own: unknown tags like (hwid)
+    """
+    for token_type in EngineToken:
+        if token_type.value.search(p_token):
+            kls = TOKEN_CLASSES.get(token_type)
+            if kls is None:
+                raise EngineDataError("Invalid token: %r" % p_token)
+            return kls.frombytes(p_token)
+    raise EngineDataError("Unknown token: %r" % p_token)
+
+
+def parse_engine_data(p_data, p_cls=EngineData):
+    """
+    Same as p_cls.frombytes(p_data) of psd_tools, p_cls is EngineData or EngineData2
+    """
+    match = token_re.match
+    root = p_cls()
+    # Items of the open containers, a key is pending in a dict when its property was read
+    items = root._items
+    is_dict = True
+    key = None
+    stack = []
+    pos = 0
+    while True:
+        m = match(p_data, pos)
+        if m is None:
+            raise EngineDataError("Unexpected data at %d" % pos)
+        kind = m.lastgroup
+        pos = m.end()
+
+        if kind == "end":
+            if is_dict and key is not None:
+                raise EngineDataError("Missing value of /%s" % key.value)
+            return root
+
+        if is_dict and key is None:
+            # Dicts only read properties and their end, other tokens are skipped like psd_tools does
+            if kind == "property":
+                key = get_property(m.group(kind))
+            elif kind == "dict_end":
+                if not stack:
+                    return root
+                items, is_dict, key = stack.pop()
+            elif kind == "other":
+                make_other(m.group(kind))
+            continue
+
+        if kind == "dict_start" or kind == "array_start":
+            container = Dict() if kind == "dict_start" else List()
+            if is_dict:
+                items[key] = container
+            else:
+                items.append(container)
+            stack.append((items, is_dict, None))
+            items = container._items
+            is_dict = kind == "dict_start"
+            key = None
+            continue
+
+        if kind == "array_end" and not is_dict:
+            items, is_dict, key = stack.pop()
+            continue
+
+        if kind == "string":
+            value = make_string(p_data, m.start(kind), pos)
+        elif kind == "integer":
+            value = Integer(int(m.group(kind)))
+        elif kind == "float":
+            value = Float(float(m.group(kind)))
+        elif kind == "property":
+            value = get_property(m.group(kind))
+        elif kind == "bool":
+            value = Bool(m.group(kind) == b"true")
+        elif kind == "other":
+            value = make_other(m.group(kind))
+        else:
+            raise EngineDataError("Invalid token: %r" % m.group(kind))
+
+        if is_dict:
+            items[key] = value
+            key = None
+        else:
+            items.append(value)
+
+
+def engine_data_frombytes(cls, data, **kwargs):
+    """
+    Dict.frombytes of EngineData and EngineData2
+    """
+    if isinstance(data, Tokenizer):
+        return python_frombytes(cls, data, **kwargs)
+    try:
+        return parse_engine_data(bytes(data), cls)
+    except EngineDataError:
+        return python_frombytes(cls, data, **kwargs)
+
+
+def install_engine_data_parser():
+    """
+    Parse the engine data of the text layers with parse_engine_data when a PSD is read
+    """
+    EngineData.frombytes = classmethod(engine_data_frombytes)
+    EngineData2.frombytes = classmethod(engine_data_frombytes)
+
@@ -0,0 +1,42 @@
+"""
+Lock files guarding the read-modify-write of files shared by the batch conversion processes.
+
+The lock is a <file>.lock created exclusively next to the guarded file, the other processes wait until
+it is removed. A lock older than stale_lock_time was left by a killed process and is taken over.
+"""
+import os
+import time
+import logging
+from contextlib import contextmanager
+
+# Seconds between two attempts to take the lock
+lock_retry_delay = 0.05
+# Seconds after which a lock is considered left by a killed process
+stale_lock_time = 30.0
+
+
+@contextmanager
+def locked_file(p_file):
+    """
+    Hold the lock of the file for the body of the with statement
+    """
+    lock_file = p_file + ".lock"
+    while True:
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_file) > stale_lock_time:
+                    logging.warning("Remove stale lock file '%s'" % lock_file)
+                    os.remove(lock_file)
+                    continue
+            except OSError:
+                # Released meanwhile
+                continue
+            time.sleep(lock_retry_delay)
+    try:
+        os.close(fd)
+        yield
+    finally:
+        os.remove(lock_file)
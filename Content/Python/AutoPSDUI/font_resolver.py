@@ -0,0 +1,93 @@
+"""
+Fonts of the text layers, resolved from the Font Map of the settings once per run.
+
+The Photoshop font names found by parse_text ("Arial-BoldMT") are compared with the font map keys without case,
+quotes, separators and the MT suffix of Monotype fonts, then by family ("Arial"), then the default font is used.
+The font of every name is resolved once, and the SlateFontInfo of every (font, size, outline) is built once:
+TextBlock.set_font copies it, so the widgets can share it.
+"""
+import re
+
+import unreal
+
+
+def normalize_font_name(p_name):
+    """
+    "Arial-Bold MT" -> "arialbold"
+    """
+    name = re.sub(r"[\s'\"_\-]", "", str(p_name)).lower()
+    if name.endswith("mt"):
+        name = name[:-2]
+    return name
+
+
+def get_font_family(p_name):
+    """
+    "Arial-BoldMT" -> "arial"
+    """
+    return normalize_font_name(str(p_name).strip("'\"").split("-")[0])
+
+
+class FontResolver(object):
+    """
+    Font objects keyed by Photoshop font name, and SlateFontInfo templates keyed by (font name, size, outline)
+    """
+
+    def __init__(self, p_font_map, p_default_font):
+        self.font_map = p_font_map
+        self.default_font = p_default_font
+        # Normalized names and families of the font map keys, the first key wins
+        self.names = {}
+        self.families = {}
+        for key in p_font_map.keys():
+            self.names.setdefault(normalize_font_name(key), key)
+            self.families.setdefault(get_font_family(key), key)
+        self.fonts = {}
+        self.font_infos = {}
+        self.hits = 0
+        self.misses = 0
+
+    def find_font_key(self, p_font_name):
+        if p_font_name in self.font_map:
+            return p_font_name
+        key = self.names.get(normalize_font_name(p_font_name))
+        if key is None:
+            key = self.families.get(get_font_family(p_font_name))
+        return key
+
+    def get_font(self, p_font_name):
+        if p_font_name in self.fonts:
+            return self.fonts[p_font_name]
+        key = self.find_font_key(p_font_name)
+        # Accessing the soft pointer of the settings loads the font
+        font = self.font_map[key] if key is not None else None
+        if font is None:
+            unreal.log_warning("Font '%s' is not in the font map, use the default font." % p_font_name)
+            font = self.default_font
+        self.fonts[p_font_name] = font
+        return font
+
+    def get_font_info(self, p_font_name, p_size, p_outline_color=None, p_outline_size=0):
+        """
+        The font info of a text, p_outline_color is (r, g, b, a) or None without outline
+        """
+        info_key = (p_font_name, p_size, p_outline_color, p_outline_size)
+        font_info = self.font_infos.get(info_key)
+        if font_info is not None:
+            self.hits += 1
+            return font_info
+        self.misses += 1
+
+        font_info = unreal.SlateFontInfo()
+        font_info.font_object = self.get_font(p_font_name)
+        font_info.size = p_size
+        if p_outline_color:
+            font_info.outline_settings.outline_color = unreal.LinearColor(*p_outline_color)
+            font_info.outline_settings.outline_size = p_outline_size
+        self.font_infos[info_key] = font_info
+        return font_info
+
+    def log_stats(self):
+        if self.hits or self.misses:
+            unreal.log("Font resolver: %d fonts, %d font infos, %d hits." % (
+                len(self.fonts), len(self.font_infos), self.hits))
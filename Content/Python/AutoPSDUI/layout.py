@@ -0,0 +1,175 @@
+"""
+Layout files store the layout tree parsed from a PSD, so that WBPs can be built without opening the PSD again.
+
+A layout file is compact JSON:
+    {
+        "Version": layout_version,
+        "Info": {"Source": psd file, "SourceSize": bytes, "SourceMTime": ns, "Asset": WBP asset,
+                 the layout_options it was converted with, ...},
+        "Root": layout tree returned by parse_psd, with fixed names and the image links to the exported files,
+                or to the atlases with the regions of the images, see atlas.py,
+                or to the sliced images with their box margins, see nine_slice.py
+    }
+The nodes of the tree are stored as JSON objects, and loaded as the typed nodes of layout_nodes.py.
+Bump layout_version whenever the layout tree produced by psd_utils changes, older files are then ignored.
+"""
+import os
+import json
+import hashlib
+import logging
+
+from AutoPSDUI.layout_nodes import node_to_dict, node_from_dict, visit_layout
+
+layout_version = 2
+
+# Conversion options stored in the layout info, a layout converted with other options is not reused:
+# the max size of the texture atlases (0 if not packed), whether images are shared between PSDs,
+# whether images are sliced to nine-slice sources and whether single color images are drawn without texture
+layout_options = ("AtlasSize", "ShareTextures", "NineSlice", "SolidColor")
+
+
+def save_layout(p_layout_file, p_content, p_info=None):
+    """
+    Save the layout tree built from a PSD, with the information needed to build its WBP
+    """
+    base_dir = os.path.dirname(p_layout_file)
+    if base_dir and not os.path.exists(base_dir):
+        os.makedirs(base_dir)
+    document = {"Version": layout_version, "Info": p_info or {}, "Root": p_content}
+    tmp_file = "%s.%d.tmp" % (p_layout_file, os.getpid())
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, separators=(",", ":"), default=node_to_dict)
+    os.replace(tmp_file, p_layout_file)
+
+
+def load_layout(p_layout_file):
+    """
+    Load a layout saved by save_layout, return the layout tree and its information.
+    Return (None, None) if it does not exist or was saved by another layout version.
+    """
+    if not os.path.exists(p_layout_file):
+        return None, None
+    try:
+        with open(p_layout_file, "r", encoding="utf-8") as f:
+            document = json.load(f)
+        if document.get("Version") != layout_version:
+            return None, None
+        return node_from_dict(document["Root"]), document["Info"]
+    except (OSError, ValueError) as e:
+        logging.warning("Ignore broken layout file '%s': %s" % (p_layout_file, e))
+        return None, None
+
+
+def get_path_hash(p_path):
+    """
+    First 8 hex digits of the sha1 of the lower case path, with / separators
+    """
+    return hashlib.sha1(p_path.replace("\\", "/").lower().encode("utf-8")).hexdigest()[:8]
+
+
+def get_layout_name(p_psd_file):
+    """
+    File name of the layout of a PSD converted by auto_psd_batch.py, unique per PSD path:
+    <PSD name>_<path hash of the absolute path>.json
+    FAutoPSDUIModule::ConvertOutOfProcess names the layouts the same way.
+    """
+    content_name = os.path.splitext(os.path.basename(p_psd_file))[0]
+    return "%s_%s.json" % (content_name, get_path_hash(os.path.abspath(p_psd_file)))
+
+
+def get_source_info(p_psd_file):
+    """
+    Identify the version of the PSD a layout is parsed from
+    """
+    stat = os.stat(p_psd_file)
+    return {
+        "Source": os.path.abspath(p_psd_file),
+        "SourceSize": stat.st_size,
+        "SourceMTime": stat.st_mtime_ns
+    }
+
+
+def gather_image_links(p_layer, p_links):
+    """
+    Collect (layer, link key) of every link to an existing image in the layer and its child layers
+    """
+    for key in p_layer.link_keys:
+        link = getattr(p_layer, key)
+        if link and os.path.exists(link):
+            p_links.append((p_layer, key))
+    for child in p_layer.get("Children", ()):
+        gather_image_links(child, p_links)
+    if p_layer.get("Child"):
+        gather_image_links(p_layer.Child, p_links)
+    return p_links
+
+
+def is_layout_current(p_content, p_info, p_psd_file, p_options=None):
+    """
+    Whether the layout was parsed from the PSD as it is now, with the same layout options,
+    and its exported images still exist
+    """
+    if not p_content or not p_info:
+        return False
+    for key, value in (p_options or {}).items():
+        if p_info.get(key) != value:
+            return False
+    source_info = get_source_info(p_psd_file)
+    for key, value in source_info.items():
+        if p_info.get(key) != value:
+            return False
+    return not visit_layout(p_content).invalid_images
+
+
+def get_layer_properties(p_layer):
+    """
+    The properties of the layer itself, without its child layers
+    """
+    return dict((k, v) for k, v in p_layer.items() if k not in ("Children", "Child"))
+
+
+def index_layout(p_layer, p_index, p_parent_name=None):
+    """
+    Map every layer name to the layer and the name of its parent, the child of List and Tile View included
+    """
+    p_index[p_layer["Name"]] = (p_layer, p_parent_name)
+    if "Children" in p_layer:
+        for child in p_layer["Children"]:
+            index_layout(child, p_index, p_layer["Name"])
+    if "Child" in p_layer and p_layer["Child"]:
+        index_layout(p_layer["Child"], p_index, p_layer["Name"])
+    return p_index
+
+
+def diff_layout(p_previous, p_current):
+    """
+    Compare two layout trees by widget name, return the names of the widgets that are new,
+    moved to another parent or whose properties changed
+    """
+    previous_index = index_layout(p_previous, {})
+    current_index = index_layout(p_current, {})
+
+    changed_names = set()
+    for name, (layer, parent_name) in current_index.items():
+        if name not in previous_index:
+            changed_names.add(name)
+            continue
+        previous_layer, previous_parent_name = previous_index[name]
+        if previous_parent_name != parent_name or \
+                get_layer_properties(previous_layer) != get_layer_properties(layer):
+            changed_names.add(name)
+    return changed_names
+
+
+def gather_widget_names(p_layer, p_names):
+    """
+    Collect the names of the widgets built for the layer in one WBP,
+    the child of List and Tile View lives in its own WBP and is skipped
+    """
+    p_names.add(p_layer["Name"])
+    if p_layer["Type"] == "Button" and p_layer["Children"]:
+        p_names.add(p_layer["Name"] + "_canvas")
+    if "Children" in p_layer:
+        for child in p_layer["Children"]:
+            gather_widget_names(child, p_names)
+    return p_names
@@ -0,0 +1,322 @@
+"""
+Typed nodes of the layout tree returned by parse_psd and stored in the layout files.
+
+Every node type declares its fields once as __slots__, named after the keys of the layout files,
+so a tree of thousands of layers takes much less memory than dicts. The nodes can still be read
+and written like dicts (node["X"], "Child" in node, node.items()), and are saved as the same JSON.
+Optional fields, such as the atlas region ("LinkAtlas") or box margins ("LinkMargin") and size ("LinkSize") of a link,
+are not set until they are used.
+
+LayoutVisitor walks a tree once to fix the widget names, collect the images, map the image links
+to texture assets and find the children of List and Tile View.
+"""
+import os
+
+# Type of the layout files: node class
+node_classes = {}
+
+button_states = ("Normal", "Hovered", "Pressed", "Disabled")
+
+
+def layout_node(p_type):
+    """
+    Register the node class of a layout type, its fields are the slots of the class and its bases
+    """
+    def register(cls):
+        fields = ["Type"]
+        for klass in reversed(cls.__mro__):
+            fields.extend(klass.__dict__.get("__slots__", ()))
+        cls.Type = p_type
+        cls.fields = tuple(fields)
+        cls.field_set = frozenset(fields)
+        node_classes[p_type] = cls
+        return cls
+    return register
+
+
+class LayoutNode(object):
+    """
+    A layer of the layout tree, placed in its parent
+    """
+    __slots__ = ("Name", "X", "Y", "AbsX", "AbsY", "Width", "Height")
+
+    Type = None
+    fields = ()
+    field_set = frozenset()
+    # Fields holding the exported image files of the layer
+    link_keys = ()
+
+    def __init__(self, p_name=None, x=0, y=0, abs_x=0, abs_y=0, width=0, height=0):
+        if p_name is not None:
+            self.Name = p_name
+        self.X = x
+        self.Y = y
+        self.AbsX = abs_x
+        self.AbsY = abs_y
+        self.Width = width
+        self.Height = height
+
+    def __getitem__(self, key):
+        if key not in self.field_set:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.field_set:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.field_set and hasattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self.field_set:
+            return default
+        return getattr(self, key, default)
+
+    def keys(self):
+        return [key for key in self.fields if hasattr(self, key)]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.fields if hasattr(self, key)]
+
+    def to_dict(self):
+        """
+        The JSON object of the layout files, child nodes are left as nodes
+        """
+        return dict(self.items())
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, getattr(self, "Name", None))
+
+
+@layout_node("Canvas")
+class CanvasNode(LayoutNode):
+    __slots__ = ("Children",)
+
+    def __init__(self, *args):
+        LayoutNode.__init__(self, *args)
+        self.Children = []
+
+
+@layout_node("Image")
+class ImageNode(LayoutNode):
+    __slots__ = ("Link", "bColorOverlay", "ColorOverlayR", "ColorOverlayG", "ColorOverlayB", "ColorOverlayA",
+                 "LinkAtlas", "LinkMargin", "LinkSize")
+
+    link_keys = ("Link",)
+
+    def __init__(self, *args):
+        LayoutNode.__init__(self, *args)
+        self.Link = None
+        self.bColorOverlay = False
+        self.ColorOverlayR = 1.0
+        self.ColorOverlayG = 1.0
+        self.ColorOverlayB = 1.0
+        self.ColorOverlayA = 1.0
+
+
+@layout_node("Text")
+class TextNode(LayoutNode):
+    __slots__ = ("Text", "ColorR", "ColorG", "ColorB", "ColorA", "Size", "Font", "Alignment",
+                 "StrokeEnabled", "StrokeColorR", "StrokeColorG", "StrokeColorB", "StrokeColorA", "StrokeSize",
+                 "ShadowEnabled", "ShadowColorR", "ShadowColorG", "ShadowColorB", "ShadowColorA",
+                 "ShadowOffsetX", "ShadowOffsetY")
+
+    def __init__(self, *args):
+        LayoutNode.__init__(self, *args)
+        self.Text = ""
+        self.ColorR = 1.0
+        self.ColorG = 1.0
+        self.ColorB = 1.0
+        self.ColorA = 1.0
+        self.Size = 0
+        self.Font = None
+        self.Alignment = "Left"
+        self.StrokeEnabled = False
+        self.StrokeColorR = 1.0
+        self.StrokeColorG = 1.0
+        self.StrokeColorB = 1.0
+        self.StrokeColorA = 1.0
+        self.StrokeSize = 1
+        self.ShadowEnabled = False
+        self.ShadowColorR = 1.0
+        self.ShadowColorG = 1.0
+        self.ShadowColorB = 1.0
+        self.ShadowColorA = 1.0
+        self.ShadowOffsetX = 0
+        self.ShadowOffsetY = 0
+
+
+def get_button_state_keys(p_state):
+    """
+    Fields of a button state: link, color overlay flag and color
+    """
+    return ("Link" + p_state, "b%sColorOverlay" % p_state,
+            "Link%sColorR" % p_state, "Link%sColorG" % p_state, "Link%sColorB" % p_state, "Link%sColorA" % p_state)
+
+
+@layout_node("Button")
+class ButtonNode(CanvasNode):
+    __slots__ = tuple(key for state in button_states for key in get_button_state_keys(state)) + \
+        tuple("Link%sAtlas" % state for state in button_states) + \
+        tuple("Link%sMargin" % state for state in button_states) + \
+        tuple("Link%sSize" % state for state in button_states)
+
+    link_keys = tuple("Link" + state for state in button_states)
+
+    def __init__(self, *args):
+        CanvasNode.__init__(self, *args)
+        for state in button_states:
+            self.set_state(state, None)
+
+    def set_state(self, p_state, p_link, p_overlay_color=None):
+        """
+        Set the link of a state, and its color overlay (r, g, b, a) if any
+        """
+        link_key, overlay_key, r_key, g_key, b_key, a_key = get_button_state_keys(p_state)
+        setattr(self, link_key, p_link)
+        setattr(self, overlay_key, p_overlay_color is not None)
+        for key, value in zip((r_key, g_key, b_key, a_key), p_overlay_color or (None,) * 4):
+            setattr(self, key, value)
+
+
+@layout_node("ProgressBar")
+class ProgressBarNode(CanvasNode):
+    __slots__ = ("BgLink", "bBgColorOverlay", "BgColorR", "BgColorG", "BgColorB", "BgColorA",
+                 "FLink", "bFColorOverlay", "FColorR", "FColorG", "FColorB", "FColorA",
+                 "BgLinkAtlas", "FLinkAtlas", "BgLinkMargin", "FLinkMargin", "BgLinkSize", "FLinkSize")
+
+    link_keys = ("BgLink", "FLink")
+
+    def __init__(self, *args):
+        CanvasNode.__init__(self, *args)
+        self.BgLink = None
+        self.bBgColorOverlay = False
+        self.BgColorR = 0.0
+        self.BgColorG = 0.0
+        self.BgColorB = 0.0
+        self.BgColorA = 0.0
+        self.FLink = None
+        self.bFColorOverlay = False
+        self.FColorR = 0.0
+        self.FColorG = 0.0
+        self.FColorB = 0.0
+        self.FColorA = 0.0
+
+
+@layout_node("ListView")
+class ListViewNode(CanvasNode):
+    """
+    The child is the layout of the entry WBP
+    """
+    __slots__ = ("Child",)
+
+    def __init__(self, *args):
+        CanvasNode.__init__(self, *args)
+        self.Child = None
+
+
+@layout_node("TileView")
+class TileViewNode(ListViewNode):
+    __slots__ = ()
+
+
+def node_to_dict(p_node):
+    """
+    json default of the layout files.
+    The nodes are recognized by their to_dict, nodes of a module reloaded in the editor session are still nodes.
+    """
+    if hasattr(p_node, "to_dict"):
+        return p_node.to_dict()
+    raise TypeError("%s is not JSON serializable" % type(p_node).__name__)
+
+
+def node_from_dict(p_dict):
+    """
+    The node of a JSON object of a layout file, raise ValueError if it is not a layout node
+    """
+    cls = node_classes.get(p_dict.get("Type"))
+    if cls is None:
+        raise ValueError("Unknown layout node type '%s'" % p_dict.get("Type"))
+    node = cls()
+    for key, value in p_dict.items():
+        if key == "Type":
+            continue
+        if key not in cls.field_set:
+            raise ValueError("Unknown field '%s' of layout node type '%s'" % (key, cls.Type))
+        if key == "Children":
+            value = [node_from_dict(child) for child in value]
+        elif key == "Child" and value:
+            value = node_from_dict(value)
+        setattr(node, key, value)
+    return node
+
+
+class LayoutVisitor(object):
+    """
+    One walk of a layout tree.
+    With a name set, the widget names are made unique: a name already in the set gets a suffix.
+    With a link mapper, the image links are mapped to their texture assets in asset_links.
+    The linked images are collected in images, or in invalid_images if their file does not exist,
+    the children of List and Tile View in list_children, the nested ones before their parents.
+    """
+    __slots__ = ("name_set", "link_mapper", "images", "invalid_images", "asset_links", "list_children")
+
+    def __init__(self, p_name_set=None, p_link_mapper=None):
+        self.name_set = p_name_set
+        self.link_mapper = p_link_mapper
+        self.images = set()
+        self.invalid_images = set()
+        self.asset_links = {}
+        self.list_children = []
+
+    def visit(self, p_node, b_rename=True):
+        """
+        Walk the node and its child nodes, the children of List and Tile View are not renamed
+        """
+        if b_rename and self.name_set is not None:
+            self.fix_name(p_node)
+
+        for key in p_node.link_keys:
+            link = getattr(p_node, key)
+            if link:
+                self.visit_link(link)
+
+        children = getattr(p_node, "Children", None)
+        if children:
+            for child in children:
+                self.visit(child, b_rename)
+
+        child = getattr(p_node, "Child", None)
+        if child:
+            self.visit(child, False)
+            self.list_children.append(child)
+        return self
+
+    def fix_name(self, p_node):
+        name = p_node.Name
+        if name in self.name_set:
+            name = name + "_1"
+            p_node.Name = name
+        self.name_set.add(name)
+
+    def visit_link(self, p_link):
+        if p_link in self.images or p_link in self.invalid_images:
+            return
+        if os.path.exists(p_link):
+            self.images.add(p_link)
+        else:
+            self.invalid_images.add(p_link)
+        if self.link_mapper:
+            self.asset_links[p_link] = self.link_mapper(p_link)
+
+
+def visit_layout(p_root, p_name_set=None, p_link_mapper=None):
+    """
+    Walk the layout tree once, return the LayoutVisitor with the images and List and Tile View children
+    """
+    return LayoutVisitor(p_name_set, p_link_mapper).visit(p_root)
@@ -0,0 +1,128 @@
+"""
+Open PSD files without reading their channel image data.
+
+PSDImage.open reads the compressed channels of every layer and the merged image into memory.
+open_lazy_psd only records where they are in the file, a channel is read from a memory map
+of the file when its data is used, so only the layers being composited are in memory.
+"""
+import mmap
+import threading
+
+from psd_tools import PSDImage
+from psd_tools.constants import Compression
+from psd_tools.psd.image_data import ImageData
+from psd_tools.psd.layer_and_mask import ChannelData
+from psd_tools.utils import read_fmt
+
+# The readers of psd_tools are replaced while a PSD is opened, one PSD at a time
+open_lock = threading.Lock()
+reading_file = None
+reading_buffer = None
+
+
+class LazyChannelData(ChannelData):
+    """
+    Channel data read from the mapped file when it is used, it is not kept in memory
+    """
+
+    def __init__(self, compression, p_buffer, offset, length):
+        ChannelData.__init__(self, compression)
+        self._data_buffer = p_buffer
+        self._data_offset = offset
+        self._data_length = length
+
+    @property
+    def data(self):
+        if self._data_buffer is None:
+            return self._data
+        return self._data_buffer[self._data_offset:self._data_offset + self._data_length]
+
+    @data.setter
+    def data(self, value):
+        self._data_buffer = None
+        self._data = value
+
+
+class LazyImageData(ImageData):
+    """
+    Merged image data read from the mapped file when it is used
+    """
+
+    def __init__(self, compression, p_buffer, offset, length):
+        ImageData.__init__(self, compression)
+        self._data_buffer = p_buffer
+        self._data_offset = offset
+        self._data_length = length
+
+    @property
+    def data(self):
+        if self._data_buffer is None:
+            return self._data
+        return self._data_buffer[self._data_offset:self._data_offset + self._data_length]
+
+    @data.setter
+    def data(self, value):
+        self._data_buffer = None
+        self._data = value
+
+
+def read_lazy_channel_data(cls, fp, length=0, **kwargs):
+    compression = Compression(read_fmt('H', fp)[0])
+    if fp is not reading_file:
+        # Layers of 16 and 32 bit documents are parsed from a copy of their tagged block
+        return ChannelData(compression, fp.read(length))
+    offset = fp.tell()
+    fp.seek(length, 1)
+    return LazyChannelData(compression, reading_buffer, offset, min(length, len(reading_buffer) - offset))
+
+
+def read_lazy_image_data(cls, fp):
+    compression = Compression(read_fmt('H', fp)[0])
+    if fp is not reading_file:
+        return ImageData(compression, fp.read())
+    offset = fp.tell()
+    fp.seek(0, 2)
+    return LazyImageData(compression, reading_buffer, offset, fp.tell() - offset)
+
+
+def open_lazy_psd(p_psd_file: str):
+    """
+    Open the PSD with its channel data left in the file, call close_lazy_psd when it is no longer used
+    """
+    global reading_file, reading_buffer
+
+    with open(p_psd_file, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return PSDImage.open(f)
+
+        with open_lock:
+            original_readers = (ChannelData.__dict__["read"], ImageData.__dict__["read"])
+            reading_file = f
+            reading_buffer = buffer
+            ChannelData.read = classmethod(read_lazy_channel_data)
+            ImageData.read = classmethod(read_lazy_image_data)
+            try:
+                psd_content = PSDImage.open(f)
+            except Exception:
+                buffer.close()
+                raise
+            finally:
+                ChannelData.read, ImageData.read = original_readers
+                reading_file = None
+                reading_buffer = None
+
+    psd_content.lazy_buffer = buffer
+    return psd_content
+
+
+def close_lazy_psd(p_psd_content: PSDImage):
+    """
+    Unmap the file of a PSD opened by open_lazy_psd, its channel data can not be read any more
+    """
+    buffer = getattr(p_psd_content, "lazy_buffer", None)
+    if buffer is not None:
+        buffer.close()
+        p_psd_content.lazy_buffer = None
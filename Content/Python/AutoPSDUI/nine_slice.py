@@ -0,0 +1,122 @@
+"""
+Shrink the exported images of stretchable panels to nine-slice sources.
+
+Panel backgrounds and frames are exported at the size of their layer, while most of their rows and columns
+are copies of their neighbours. The longest run of identical columns and the longest run of identical rows
+are cut down to a few pixels, the image is saved next to the exported one as <name>_9s.png and linked instead.
+The brush draws it as a box, with the margins of the parts around the runs and its size stored next to the link:
+    "Link": sliced file, "LinkMargin": [left, top, right, bottom], "LinkSize": [width, height]
+The margins are fractions of the sliced image, as the Margin of a SlateBrush, which draws the borders
+ImageSize * Margin pixels thick: the size of the brush must be the one of the sliced image.
+"""
+import io
+import os
+
+import numpy as np
+from PIL import Image
+
+from AutoPSDUI.layout import gather_image_links
+
+sliced_suffix = "_9s"
+# Pixels kept of a run, more than one so that filtering at the edges of the run samples the same color
+slice_center_size = 2
+# Shorter runs are not worth a box brush
+min_stretch_size = 8
+# Slice the image only if it keeps at most this part of the pixels
+max_sliced_ratio = 0.5
+
+
+def find_stretch_run(p_pixels):
+    """
+    The longest run of identical columns as (first, last) column, or None if it is shorter than min_stretch_size
+    """
+    if p_pixels.shape[1] < min_stretch_size:
+        return None
+    same = np.all(p_pixels[:, 1:] == p_pixels[:, :-1], axis=(0, 2))
+    # Edges of the runs of identical neighbour pairs, pair i joins the columns i and i + 1
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], same.astype(np.int8), [0]))))
+    if not len(edges):
+        return None
+    starts, ends = edges[::2], edges[1::2]
+    longest = int(np.argmax(ends - starts))
+    first, last = int(starts[longest]), int(ends[longest])
+    if last - first + 1 < min_stretch_size:
+        return None
+    return first, last
+
+
+def cut_run(p_pixels, p_run):
+    """
+    Keep slice_center_size columns of the run, return the pixels and the left and right margins in pixels
+    """
+    width = p_pixels.shape[1]
+    if p_run is None:
+        return p_pixels, 0, 0
+    first, last = p_run
+    keep = min(slice_center_size, last - first + 1)
+    return np.concatenate((p_pixels[:, :first + keep], p_pixels[:, last + 1:]), axis=1), first, width - last - 1
+
+
+def slice_pixels(p_pixels):
+    """
+    Cut the stretchable runs of the RGBA pixels, return the sliced pixels and the margins in pixels
+    (left, top, right, bottom), or None if the image is not worth slicing
+    """
+    column_run = find_stretch_run(p_pixels)
+    row_run = find_stretch_run(p_pixels.transpose(1, 0, 2))
+    if column_run is None and row_run is None:
+        return None
+    pixels, left, right = cut_run(p_pixels, column_run)
+    pixels, top, bottom = cut_run(pixels.transpose(1, 0, 2), row_run)
+    pixels = pixels.transpose(1, 0, 2)
+    if pixels.shape[0] * pixels.shape[1] > max_sliced_ratio * p_pixels.shape[0] * p_pixels.shape[1]:
+        return None
+    return np.ascontiguousarray(pixels), (left, top, right, bottom)
+
+
+def save_sliced_image(p_image, p_image_file):
+    """
+    Save the image as png, the file is left untouched if its content did not change.
+    It is replaced instead of overwritten, it may be a hard link to a shared image, see texture_store.py.
+    Return whether the file changed.
+    """
+    with io.BytesIO() as fp:
+        p_image.save(fp, "PNG")
+        data = fp.getvalue()
+    if os.path.exists(p_image_file):
+        with open(p_image_file, "rb") as f:
+            if f.read() == data:
+                return False
+    tmp_file = "%s.%d.tmp" % (p_image_file, os.getpid())
+    with open(tmp_file, "wb") as f:
+        f.write(data)
+    os.replace(tmp_file, p_image_file)
+    return True
+
+
+def slice_layout_images(p_content):
+    """
+    Link the sliced images of the layout images that can be drawn as a box instead.
+    Return the sliced image files whose content did not change.
+    """
+    slices = {}
+    unchanged_images = []
+    for layer, key in gather_image_links(p_content, []):
+        image_file = layer[key]
+        if image_file not in slices:
+            with Image.open(image_file) as image:
+                sliced = slice_pixels(np.asarray(image.convert("RGBA")))
+            if sliced is None:
+                slices[image_file] = None
+            else:
+                pixels, margins = sliced
+                sliced_file = os.path.splitext(image_file)[0] + sliced_suffix + ".png"
+                if not save_sliced_image(Image.fromarray(pixels, "RGBA"), sliced_file):
+                    unchanged_images.append(sliced_file)
+                height, width = pixels.shape[:2]
+                left, top, right, bottom = margins
+                slices[image_file] = (sliced_file, [left / width, top / height, right / width, bottom / height],
+                                      [width, height])
+        if slices[image_file]:
+            layer[key], layer[key + "Margin"], layer[key + "Size"] = slices[image_file]
+    return unchanged_images
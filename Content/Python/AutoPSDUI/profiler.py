@@ -0,0 +1,139 @@
+"""
+Timing spans of the import pipeline.
+
+When profiling is started, every span records its begin time and duration with the thread it ran on,
+spans opened inside another span are nested in the trace. Counters count things like exported
+layers or created widgets, and the traced memory (tracemalloc) is sampled at the end of the phases.
+save_trace writes the Chrome trace event format, open it in chrome://tracing or https://ui.perfetto.dev.
+When profiling is not started spans cost a function call.
+"""
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+enabled = False
+trace_events = []
+counters = {}
+start_time = 0.0
+counters_lock = threading.Lock()
+
+
+def start_profile():
+    """
+    Clear the recorded spans and start recording, memory tracing makes allocations slower
+    """
+    global enabled, start_time
+    del trace_events[:]
+    counters.clear()
+    start_time = time.perf_counter()
+    # Restart the tracing to reset its peak
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    tracemalloc.start()
+    enabled = True
+
+
+def stop_profile():
+    global enabled
+    enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def get_timestamp():
+    return (time.perf_counter() - start_time) * 1e6
+
+
+@contextmanager
+def span(p_name, p_args=None, b_sample_memory=False):
+    """
+    Record the time spent in the with block, b_sample_memory for the phases of the pipeline
+    """
+    if not enabled:
+        yield
+        return
+    begin = get_timestamp()
+    try:
+        yield
+    finally:
+        event = {
+            "name": p_name,
+            "cat": "AutoPSDUI",
+            "ph": "X",
+            "ts": begin,
+            "dur": get_timestamp() - begin,
+            "pid": os.getpid(),
+            "tid": threading.get_ident()
+        }
+        if p_args:
+            event["args"] = p_args
+        trace_events.append(event)
+        if b_sample_memory:
+            sample_memory()
+
+
+def count(p_name, p_value=1):
+    if enabled:
+        with counters_lock:
+            counters[p_name] = counters.get(p_name, 0) + p_value
+
+
+def sample_memory():
+    """
+    Record the current traced memory and its peak since the profile started, in MB
+    """
+    if not enabled or not tracemalloc.is_tracing():
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    trace_events.append({
+        "name": "Memory",
+        "ph": "C",
+        "ts": get_timestamp(),
+        "pid": os.getpid(),
+        "args": {"Current MB": current / 1048576.0, "Peak MB": peak / 1048576.0}
+    })
+
+
+def get_summary():
+    """
+    Total, count and max duration in seconds of the spans of each name,
+    and the peak traced memory in MB
+    """
+    summary = {}
+    peak_memory = 0.0
+    for event in trace_events:
+        if event["ph"] == "C":
+            peak_memory = max(peak_memory, event["args"]["Peak MB"])
+            continue
+        total, span_count, max_duration = summary.get(event["name"], (0.0, 0, 0.0))
+        duration = event["dur"] / 1e6
+        summary[event["name"]] = (total + duration, span_count + 1, max(max_duration, duration))
+    return summary, peak_memory
+
+
+def get_summary_lines():
+    summary, peak_memory = get_summary()
+    lines = ["%-24s %10s %8s %10s" % ("Span", "Total (s)", "Count", "Max (s)")]
+    for name, (total, span_count, max_duration) in summary.items():
+        lines.append("%-24s %10.3f %8d %10.3f" % (name, total, span_count, max_duration))
+    for name, value in sorted(counters.items()):
+        lines.append("%-24s %10d" % (name, value))
+    lines.append("Peak traced memory: %.1f MB" % peak_memory)
+    return lines
+
+
+def save_trace(p_trace_file):
+    """
+    Write the recorded spans and counters as a Chrome trace
+    """
+    base_dir = os.path.dirname(p_trace_file)
+    if base_dir and not os.path.exists(base_dir):
+        os.makedirs(base_dir)
+    events = list(trace_events)
+    for name, value in sorted(counters.items()):
+        events.append({"name": name, "ph": "C", "ts": get_timestamp(), "pid": os.getpid(), "args": {name: value}})
+    with open(p_trace_file, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
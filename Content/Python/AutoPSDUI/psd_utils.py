@@ -1,79 +1,454 @@
+import io
 import os
+import json
 import math
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from PIL import Image
 from psd_tools import PSDImage
+from psd_tools.constants import ColorMode, Tag
 from psd_tools.api import layers as Layers
 from psd_tools.api import effects as Effects
+from psd_tools.api.shape import Rectangle
+from psd_tools.terminology import Enum, Key, Klass
+
+from AutoPSDUI.file_lock import locked_file
+from AutoPSDUI.lazy_psd import open_lazy_psd, close_lazy_psd
+from AutoPSDUI.rle import install_rle_decoder
+from AutoPSDUI.deferred_imports import install_deferred_imports
+from AutoPSDUI.engine_data import install_engine_data_parser
+from AutoPSDUI.layout_nodes import CanvasNode, ImageNode, TextNode, ButtonNode, ProgressBarNode
+from AutoPSDUI.layout_nodes import ListViewNode, TileViewNode
+from AutoPSDUI import profiler
+
+try:
+    import unreal
+except ImportError:
+    # Running headless, see auto_psd_batch.py
+    unreal = None
+
+texture_src_dir = None
+export_workers = 0
+lazy_load_psd = True
+solid_color_images = False
+
+# psd_tools has no compiled RLE decoder on Linux
+install_rle_decoder()
+# scipy and skimage are only imported when a layer needs them
+install_deferred_imports()
+# The engine data of the text layers is parsed in a single pass
+install_engine_data_parser()
+
+
+def log_warning(message):
+    if unreal:
+        unreal.log_warning(message)
+    else:
+        logging.warning(message)
+
+
+def set_texture_src_dir(p_dir):
+    """
+    Set the directory of exported images, used when running without unreal
+    """
+    global texture_src_dir
+    texture_src_dir = p_dir
+    if not os.path.exists(texture_src_dir):
+        os.makedirs(texture_src_dir)
+
+
+def load_settings():
+    """
+    Read the settings of the editor, again before every import of the editor session
+    """
+    global texture_src_dir, export_workers, lazy_load_psd, solid_color_images
+    setting = unreal.AutoPSDUISetting.get()
+    texture_src_dir = setting.texture_src_dir.path
+    export_workers = setting.export_workers
+    lazy_load_psd = setting.lazy_load_psd
+    solid_color_images = setting.solid_color_images
+    if texture_src_dir and not os.path.exists(texture_src_dir):
+        os.makedirs(texture_src_dir)
+
+
+if unreal:
+    load_settings()
+
+# (layer, dst_path, image node) collected while parsing, exported by flush_exports.
+# The image node is tinted instead if the layer is a single color, it is None for the links of other nodes
+pending_exports = []
+
+# Hashes of exported layers, stored next to the exported textures, as {"Hash": layer hash,
+# "SolidColor": whether the layer was tested for a single color, "Color": its color, None if it was written as png}
+manifest_name = "AutoPSDUIManifest.json"
+# Bump it when the exported pixels or the manifest entries change for the same layer data
+manifest_version = 3
+
+
+def export_image(p_layer: Layers.PixelLayer, dst_path, p_image_node=None):
+    """
+    Queue the layer for exporting, the pixel work is done later by flush_exports.
+    With solid_color_images, p_image_node is drawn with the color of the layer instead if it has a single color.
+    """
+    base_dir = os.path.dirname(dst_path)
+    if not os.path.exists(base_dir):
+        os.makedirs(base_dir)
+    pending_exports.append((p_layer, dst_path, p_image_node if solid_color_images else None))
+
+
+def srgb_to_linear(p_value):
+    """
+    The linear value of an sRGB value in [0, 1], widget colors are linear while the textures are sRGB
+    """
+    if p_value <= 0.04045:
+        return p_value / 12.92
+    return ((p_value + 0.055) / 1.055) ** 2.4
+
+
+def set_solid_color(p_image_node: ImageNode, p_color):
+    """
+    Draw the image node without texture, tinted with the sRGB (r, g, b, a) color
+    """
+    r, g, b, a = p_color
+    p_image_node.Link = None
+    p_image_node.bColorOverlay = True
+    p_image_node.ColorOverlayR = srgb_to_linear(r)
+    p_image_node.ColorOverlayG = srgb_to_linear(g)
+    p_image_node.ColorOverlayB = srgb_to_linear(b)
+    p_image_node.ColorOverlayA = a
+
+
+def get_image_color(p_image: Image.Image):
+    """
+    The (r, g, b, a) of an RGBA image whose pixels all have the same color, None if they do not
+    """
+    extrema = p_image.getextrema()
+    if any(low != high for low, high in extrema):
+        return None
+    return tuple(low / 255 for low, _ in extrema)
 
-import unreal
-
-texture_src_dir = unreal.AutoPSDUISetting.get().texture_src_dir.path
 
+def get_fill_color(p_layer: Layers.Layer):
+    """
+    The (r, g, b, a) of a rectangle shape layer filled with a solid color, read from its fill descriptor.
+    None if the layer has a stroke, effects, masks or clipping layers, or another shape or fill.
+    """
+    if p_layer.kind != "shape" or not p_layer.is_visible() or p_layer._psd.color_mode != ColorMode.RGB or \
+            p_layer.has_mask() or p_layer.has_effects() or p_layer.has_clip_layers():
+        return None
+    origination = p_layer.origination
+    if len(origination) != 1 or type(origination[0]) is not Rectangle:
+        return None
+    vector_mask = p_layer.vector_mask
+    if vector_mask is None or vector_mask.inverted or vector_mask.disabled or len(vector_mask.paths) != 1:
+        return None
+    stroke = p_layer.stroke
+    if stroke is not None and (stroke.enabled or not stroke.fill_enabled):
+        return None
 
-if not os.path.exists(texture_src_dir):
-    os.makedirs(texture_src_dir)
+    blocks = p_layer.tagged_blocks
+    setting = blocks.get_data(Tag.VECTOR_STROKE_CONTENT_DATA) or blocks.get_data(Tag.SOLID_COLOR_SHEET_SETTING)
+    if setting is None or Enum.Pattern in setting or Key.Gradient in setting:
+        return None
+    color = setting.get(Key.Color)
+    if color is None or color.classID != Klass.RGBColor.value:
+        return None
+    opacity = p_layer.opacity / 255 * blocks.get_data(Tag.BLEND_FILL_OPACITY, 255) / 255
+    return float(color[b'Rd  ']) / 255, float(color[b'Grn ']) / 255, float(color[b'Bl  ']) / 255, opacity
+
+
+def get_layer_hash(p_layer: Layers.PixelLayer):
+    """
+    Hash all the data the exported image depends on.
+    The layer record holds the bbox, blend mode, mask and effects descriptor,
+    the channel data is hashed as stored in the PSD without decompressing.
+    """
+    sha = hashlib.sha1()
+    for layer in [p_layer] + list(p_layer.clip_layers):
+        with io.BytesIO() as fp:
+            layer._record.write(fp)
+            sha.update(fp.getvalue())
+        for channel in layer._channels:
+            sha.update(channel.data)
+    return sha.hexdigest()
+
+
+def get_manifest_key(dst_path):
+    return os.path.relpath(dst_path, texture_src_dir).replace("\\", "/")
+
+
+def load_export_manifest():
+    """
+    Load the layer entries of the last export, keyed by the image path relative to texture_src_dir
+    """
+    manifest_file = os.path.join(texture_src_dir, manifest_name)
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        log_warning("Ignore broken export manifest '%s': %s" % (manifest_file, e))
+        return {}
+    if manifest.get("Version") != manifest_version:
+        return {}
+    return manifest.get("Layers", {})
+
+
+def save_export_manifest(p_updated_entries, p_removed_keys):
+    """
+    Apply the changes to the manifest on disk, it is reloaded first because batch conversions may share it.
+    The reload and the replace hold the lock of the manifest, so that concurrent changes are not lost.
+    """
+    manifest_file = os.path.join(texture_src_dir, manifest_name)
+    with locked_file(manifest_file):
+        layer_entries = load_export_manifest()
+        layer_entries.update(p_updated_entries)
+        for key in p_removed_keys:
+            layer_entries.pop(key, None)
+
+        tmp_file = "%s.%d.tmp" % (manifest_file, os.getpid())
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"Version": manifest_version, "Layers": layer_entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, manifest_file)
+
+
+def is_plain_pixel_layer(p_layer: Layers.Layer):
+    """
+    Whether compositing the layer gives its own pixels: a visible 8 bit RGB pixel layer at full opacity,
+    without masks, effects or clipping layers.
+    The blend mode does not matter, the layer is composited on a transparent backdrop.
+    """
+    return p_layer.kind == "pixel" and p_layer.is_visible() and p_layer.has_pixels() and \
+        p_layer._psd.color_mode == ColorMode.RGB and p_layer._psd.depth == 8 and \
+        p_layer.opacity == 255 and p_layer.tagged_blocks.get_data(Tag.BLEND_FILL_OPACITY, 255) == 255 and \
+        not p_layer.has_mask() and not p_layer.has_vector_mask() and \
+        not p_layer.has_effects() and not p_layer.has_clip_layers()
+
+
+def composite_layer(p_layer: Layers.Layer):
+    """
+    Same as layer.composite(), plain pixel layers are built straight from their channels at the layer bbox
+    instead of being composited in float
+    """
+    if not is_plain_pixel_layer(p_layer):
+        return p_layer.composite()
+    pixels = np.array(p_layer.topil().convert("RGBA"))
+    # composite() leaves the color of transparent pixels white
+    pixels[pixels[:, :, 3] == 0, :3] = 255
+    return Image.fromarray(pixels, "RGBA")
+
+
+def is_export_unchanged(p_last_entry, p_layer_hash, dst_path, b_solid_color):
+    """
+    Whether the last export of the layer, its manifest entry, is still valid:
+    same layer hash, tested for a single color the same way, and the png still exists unless a color was found
+    """
+    if not p_last_entry or p_last_entry.get("Hash") != p_layer_hash or \
+            p_last_entry.get("SolidColor", False) != b_solid_color:
+        return False
+    return bool(p_last_entry.get("Color")) or os.path.exists(dst_path)
+
+
+def save_layer_image(p_layer: Layers.PixelLayer, dst_path, p_last_entry=None, b_solid_color=False):
+    """
+    Composite the layer and write it as png, return the export record.
+    The layer is skipped if it is unchanged since its last export, see is_export_unchanged.
+    With b_solid_color, a layer of a single color is not written and its png is removed,
+    its color is returned in the record, also when it is skipped.
+    """
+    start = time.perf_counter()
+    error = None
+    skipped = False
+    layer_hash = None
+    color = None
+    with profiler.span("ExportLayer", {"Layer": p_layer.name}):
+        try:
+            with profiler.span("HashLayer"):
+                layer_hash = get_layer_hash(p_layer)
+            if is_export_unchanged(p_last_entry, layer_hash, dst_path, b_solid_color):
+                skipped = True
+                color = p_last_entry.get("Color")
+                if color:
+                    color = tuple(color)
+                profiler.count("SkippedLayers")
+            else:
+                with profiler.span("CompositeLayer"):
+                    image = composite_layer(p_layer)
+                if b_solid_color:
+                    color = get_image_color(image.convert("RGBA"))
+                if color:
+                    profiler.count("SolidColorLayers")
+                    # A png of an earlier export would be linked again by a later export skipping the layer
+                    if os.path.exists(dst_path):
+                        os.remove(dst_path)
+                else:
+                    with profiler.span("WritePNG"):
+                        # Replaced instead of overwritten, it may be a hard link to a shared image, see texture_store.py
+                        tmp_file = "%s.%d.tmp" % (dst_path, os.getpid())
+                        image.save(tmp_file, "PNG")
+                        os.replace(tmp_file, dst_path)
+                    profiler.count("ExportedLayers")
+        except Exception as e:
+            error = "%s: %s" % (type(e).__name__, e)
+    return {
+        "Layer": p_layer.name,
+        "Path": dst_path,
+        "Hash": layer_hash,
+        "Skipped": skipped,
+        "Color": color,
+        "Time": time.perf_counter() - start,
+        "Error": error
+    }
 
 
-def export_image(p_layer: Layers.PixelLayer, dst_path):
-    base_dir = os.path.dirname(dst_path)
-    if not os.path.exists(base_dir):
-        os.mkdir(base_dir)
-    p_layer.composite().save(dst_path)
+def flush_exports(p_workers=None, p_progress=None):
+    """
+    Export all pending layers on a thread pool.
+    A process pool is not used because every layer references the whole parsed PSD.
+    p_progress is called with the number of finished and total layers after every layer.
+    Return one record per exported layer with its time and error.
+    The image nodes of the layers of a single color are tinted with it and unlinked.
+    """
+    # Layers exported to the same path overwrite each other, keep the last one like a serial export
+    exports = dict((dst_path, layer) for layer, dst_path, _ in pending_exports)
+    # A path is left without png only if all the nodes linking it are image nodes
+    image_nodes = {}
+    for _, dst_path, image_node in pending_exports:
+        image_nodes.setdefault(dst_path, []).append(image_node)
+    del pending_exports[:]
+
+    layer_entries = load_export_manifest()
+    jobs = [(layer, dst_path, layer_entries.get(get_manifest_key(dst_path)),
+             None not in image_nodes[dst_path])
+            for dst_path, layer in exports.items()]
+
+    workers = p_workers if p_workers is not None else export_workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1 or len(jobs) <= 1:
+        export_report = []
+        for job in jobs:
+            export_report.append(save_layer_image(*job))
+            if p_progress:
+                p_progress(len(export_report), len(jobs))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(save_layer_image, *job) for job in jobs]
+            if p_progress:
+                for index, _ in enumerate(as_completed(futures)):
+                    p_progress(index + 1, len(jobs))
+            export_report = [future.result() for future in futures]
+
+    for record in export_report:
+        if record["Color"]:
+            for image_node in image_nodes[record["Path"]]:
+                set_solid_color(image_node, record["Color"])
+
+    updated_entries = {}
+    removed_keys = []
+    for record, (_, _, _, b_solid_color) in zip(export_report, jobs):
+        key = get_manifest_key(record["Path"])
+        if record["Error"]:
+            removed_keys.append(key)
+        else:
+            updated_entries[key] = {"Hash": record["Hash"], "SolidColor": b_solid_color, "Color": record["Color"]}
+    if export_report:
+        save_export_manifest(updated_entries, removed_keys)
+    return export_report
 
 
-def load_psd(p_psd_file: str):
+def load_psd(p_psd_file: str, b_lazy=None):
+    """
+    Open the PSD, in lazy mode the channel data stays in the file until a layer is exported.
+    Call close_psd when all the layers have been exported.
+    """
     if not os.path.exists(p_psd_file):
         return None
 
+    if b_lazy is None:
+        b_lazy = lazy_load_psd
+    if b_lazy:
+        return open_lazy_psd(p_psd_file)
+
     psd_content = PSDImage.open(p_psd_file)
     return psd_content
 
 
+def close_psd(p_psd_content: PSDImage):
+    """
+    Close the file of the PSD, the layers left by a failed parse or export are dropped
+    """
+    del pending_exports[:]
+    close_lazy_psd(p_psd_content)
+
+
 def get_layer_pos_size(p_psd_layer, parent):
     x = p_psd_layer.left
     y = p_psd_layer.top
-    if parent and "AbsX" in parent:
-        x = x - parent["AbsX"]
-    if parent and "AbsY" in parent:
-        y = y - parent["AbsY"]
+    if parent:
+        x = x - parent.AbsX
+        y = y - parent.AbsY
     width = p_psd_layer.width
     height = p_psd_layer.height
     return x, y, width, height
 
 
+def make_node(p_node_class, p_psd_layer, parent, p_name=None):
+    """
+    The layout node of the layer, placed in its parent node
+    """
+    x, y, width, height = get_layer_pos_size(p_psd_layer, parent)
+    return p_node_class(p_name, x, y, p_psd_layer.left, p_psd_layer.top, width, height)
+
+
+def get_overlay_color(p_layer: Layers.Layer):
+    """
+    The (r, g, b, a) of the multiply color overlay of the layer, None if it has none
+    """
+    overlay_color = None
+    for effect in p_layer.effects:
+        if isinstance(effect, Effects.ColorOverlay):
+            if effect.blend_mode == b"Mltp":
+                color = effect.color
+                overlay_color = (
+                    color[b'Rd  '] / 255, color[b'Grn '] / 255, color[b'Bl  '] / 255, effect.opacity / 100
+                )
+            else:
+                log_warning("UnSupported ColorOverlay Effect Blend Mode '%s' for Image '%s'" % (
+                    effect.blend_mode.decode(), p_layer.name))
+    return overlay_color
+
+
 def process_child_layer(p_child_layer, p_parent_layer):
-    if p_child_layer.kind == "group":
-        child = parse_layer(p_child_layer, p_parent_layer)
-    elif p_child_layer.kind in ("pixel", "smartobject", "shape"):
-        child = parse_image(p_child_layer, p_parent_layer)
-    elif p_child_layer.kind == "type":
-        child = parse_text(p_child_layer, p_parent_layer)
-    else:
-        unreal.log_warning("Unknown PSD Layer Type: %s" % p_child_layer.kind)
-        child = None
+    profiler.count("ParsedLayers")
+    with profiler.span("ParseLayer", {"Layer": p_child_layer.name, "Kind": p_child_layer.kind}):
+        if p_child_layer.kind == "group":
+            child = parse_layer(p_child_layer, p_parent_layer)
+        elif p_child_layer.kind in ("pixel", "smartobject", "shape"):
+            child = parse_image(p_child_layer, p_parent_layer)
+        elif p_child_layer.kind == "type":
+            child = parse_text(p_child_layer, p_parent_layer)
+        else:
+            log_warning("Unknown PSD Layer Type: %s" % p_child_layer.kind)
+            child = None
     return child
 
 
 def process_layer(p_layer_content: Layers.Layer, layer_info):
-    if "Children" not in layer_info:
-        layer_info["Children"] = []
     for layer in p_layer_content:
         child = process_child_layer(layer, layer_info)
         if child:
-            layer_info["Children"].append(child)
+            layer_info.Children.append(child)
 
 
 def parse_psd(p_psd_content: PSDImage):
-    x, y, width, height = get_layer_pos_size(p_psd_content, None)
-    layer_info = {
-        "Type": "Canvas",
-        "X": x,
-        "Y": y,
-        "AbsX": p_psd_content.left,
-        "AbsY": p_psd_content.top,
-        "Width": width,
-        "Height": height,
-        "Children": []
-    }
+    del pending_exports[:]
+    layer_info = make_node(CanvasNode, p_psd_content, None)
     process_layer(p_psd_content, layer_info)
     return layer_info
 
@@ -83,174 +458,74 @@ def parse_layer(p_layer_content: Layers.Layer, parent):
         return None
 
     layer_name = p_layer_content.name
-    x, y, width, height = get_layer_pos_size(p_layer_content, parent)
-    layer_info = {
-        "Type": "Canvas",
-        "Name": layer_name,
-        "X": x,
-        "Y": y,
-        "AbsX": p_layer_content.left,
-        "AbsY": p_layer_content.top,
-        "Width": width,
-        "Height": height,
-        "Children": []
-    }
-
     if layer_name.startswith("Button_"):
+        layer_info = make_node(ButtonNode, p_layer_content, parent, layer_name)
         parse_button(p_layer_content, layer_info)
     elif layer_name.startswith("Progress_"):
+        layer_info = make_node(ProgressBarNode, p_layer_content, parent, layer_name)
         parse_progress_bar(p_layer_content, layer_info)
     elif layer_name.startswith("List_"):
+        layer_info = make_node(ListViewNode, p_layer_content, parent, layer_name)
         parse_list(p_layer_content, layer_info, parent)
     elif layer_name.startswith("Tile_"):
+        layer_info = make_node(TileViewNode, p_layer_content, parent, layer_name)
         parse_tile(p_layer_content, layer_info, parent)
     else:
         # 其他情况均按照Canvas处理
+        layer_info = make_node(CanvasNode, p_layer_content, parent, layer_name)
         process_layer(p_layer_content, layer_info)
 
     return layer_info
 
 
-def parse_button(p_layer_content: Layers.Layer, p_button_info):
-    p_button_info["Type"] = "Button"
-    p_button_info["LinkNormal"] = None
-    p_button_info["bNormalColorOverlay"] = False
-    p_button_info["LinkNormalColorR"] = None
-    p_button_info["LinkNormalColorG"] = None
-    p_button_info["LinkNormalColorB"] = None
-    p_button_info["LinkNormalColorA"] = None
-
-    p_button_info["LinkHovered"] = None
-    p_button_info["bHoveredColorOverlay"] = False
-    p_button_info["LinkHoveredColorR"] = None
-    p_button_info["LinkHoveredColorG"] = None
-    p_button_info["LinkHoveredColorB"] = None
-    p_button_info["LinkHoveredColorA"] = None
-
-    p_button_info["LinkPressed"] = None
-    p_button_info["bPressedColorOverlay"] = False
-    p_button_info["LinkPressedColorR"] = None
-    p_button_info["LinkPressedColorG"] = None
-    p_button_info["LinkPressedColorB"] = None
-    p_button_info["LinkPressedColorA"] = None
-
-    p_button_info["LinkDisabled"] = None
-    p_button_info["bDisabledColorOverlay"] = False
-    p_button_info["LinkDisabledColorR"] = None
-    p_button_info["LinkDisabledColorG"] = None
-    p_button_info["LinkDisabledColorB"] = None
-    p_button_info["LinkDisabledColorA"] = None
-    children = []
+# Name suffix of the image layer of each button state
+button_state_suffixes = (("_normal", "Normal"), ("_hovered", "Hovered"), ("_pressed", "Pressed"),
+                         ("_disabled", "Disabled"))
+
+
+def parse_button(p_layer_content: Layers.Layer, p_button_info: ButtonNode):
     for layer in p_layer_content:
         layer_name = layer.name
-        valid_image = False
-        image_type = ""
-
+        state = None
         if layer.kind in ("pixel", "smartobject", "shape"):
-            if layer_name.endswith("_normal"):
-                p_button_info["LinkNormal"] = os.path.join(texture_src_dir, layer_name[:-7]) + ".png"
-                export_image(layer, p_button_info["LinkNormal"])
-                valid_image = True
-                image_type = "normal"
-            elif layer_name.endswith("_hovered"):
-                p_button_info["LinkHovered"] = os.path.join(texture_src_dir, layer_name[:-8]) + ".png"
-                export_image(layer, p_button_info["LinkHovered"])
-                valid_image = True
-                image_type = "hovered"
-            elif layer_name.endswith("_pressed"):
-                p_button_info["LinkPressed"] = os.path.join(texture_src_dir, layer_name[:-8]) + ".png"
-                export_image(layer, p_button_info["LinkPressed"])
-                valid_image = True
-                image_type = "pressed"
-            elif layer_name.endswith("_disabled"):
-                p_button_info["LinkDisabled"] = os.path.join(texture_src_dir, layer_name[:-9]) + ".png"
-                export_image(layer, p_button_info["LinkDisabled"])
-                valid_image = True
-                image_type = "disabled"
-
-        if not valid_image:
+            for suffix, suffix_state in button_state_suffixes:
+                if layer_name.endswith(suffix):
+                    state = suffix_state
+                    break
+
+        if not state:
             child = process_child_layer(layer, p_button_info)
             if child:
-                children.append(child)
+                p_button_info.Children.append(child)
         else:
-            effects = layer.effects
-            for effect in effects:
-                if isinstance(effect, Effects.ColorOverlay):
-                    if effect.blend_mode == b"Mltp":
-                        color = effect.color
-                        color_r = color[b'Rd  '] / 255
-                        color_g = color[b'Grn '] / 255
-                        color_b = color[b'Bl  '] / 255
-                        color_a = effect.opacity / 100
-                        if image_type == "normal":
-                            p_button_info["bNormalColorOverlay"] = True
-                            p_button_info["LinkNormalColorR"] = color_r
-                            p_button_info["LinkNormalColorG"] = color_g
-                            p_button_info["LinkNormalColorB"] = color_b
-                            p_button_info["LinkNormalColorA"] = color_a
-                        elif image_type == "hovered":
-                            p_button_info["bHoveredColorOverlay"] = True
-                            p_button_info["LinkHoveredColorR"] = color_r
-                            p_button_info["LinkHoveredColorG"] = color_g
-                            p_button_info["LinkHoveredColorB"] = color_b
-                            p_button_info["LinkHoveredColorA"] = color_a
-                        elif image_type == "pressed":
-                            p_button_info["bPressedColorOverlay"] = True
-                            p_button_info["LinkPressedColorR"] = color_r
-                            p_button_info["LinkPressedColorG"] = color_g
-                            p_button_info["LinkPressedColorB"] = color_b
-                            p_button_info["LinkPressedColorA"] = color_a
-                        elif image_type == "disabled":
-                            p_button_info["bDisabledColorOverlay"] = True
-                            p_button_info["LinkDisabledColorR"] = color_r
-                            p_button_info["LinkDisabledColorG"] = color_g
-                            p_button_info["LinkDisabledColorB"] = color_b
-                            p_button_info["LinkDisabledColorA"] = color_a
-                    else:
-                        unreal.log_warning("UnSupported ColorOverlay Effect Blend Mode '%s' for Image '%s'" % (
-                        effect.blend_mode.decode(), layer_name))
-
-    p_button_info["Children"] = children
+            link = os.path.join(texture_src_dir, layer_name[:-len(suffix)]) + ".png"
+            export_image(layer, link)
+            p_button_info.set_state(state, link, get_overlay_color(layer))
+
     return p_button_info
 
 
 def parse_image(p_image_layer: Layers.PixelLayer, parent):
-    x, y, width, height = get_layer_pos_size(p_image_layer, parent)
-
     name = p_image_layer.name
-    image_info = {
-        "Type": "Image",
-        "Name": name,
-        "X": x,
-        "Y": y,
-        "AbsX": p_image_layer.left,
-        "AbsY": p_image_layer.top,
-        "Width": width,
-        "Height": height,
-        "Link": os.path.join(texture_src_dir, name) + ".png",
-        "bColorOverlay": False,
-        "ColorOverlayR": 1.0,
-        "ColorOverlayG": 1.0,
-        "ColorOverlayB": 1.0,
-        "ColorOverlayA": 1.0
-    }
-    export_image(p_image_layer, image_info["Link"])
+    image_info = make_node(ImageNode, p_image_layer, parent, name)
 
-    # 处理颜色叠加
-    effects = p_image_layer.effects
+    # A rectangle of a solid color needs no texture
+    fill_color = get_fill_color(p_image_layer) if solid_color_images else None
+    if fill_color:
+        profiler.count("SolidColorLayers")
+        set_solid_color(image_info, fill_color)
+        return image_info
 
-    for effect in effects:
-        if isinstance(effect, Effects.ColorOverlay):
-            if effect.blend_mode == b"Mltp":
-                image_info["bColorOverlay"] = True
-                color = effect.color
-                image_info["ColorOverlayR"] = color[b'Rd  '] / 255
-                image_info["ColorOverlayG"] = color[b'Grn '] / 255
-                image_info["ColorOverlayB"] = color[b'Bl  '] / 255
-                image_info["ColorOverlayA"] = effect.opacity / 100
-            else:
-                unreal.log_warning("UnSupported ColorOverlay Effect Blend Mode '%s' for Image '%s'" % (
-                    effect.blend_mode.decode(), name))
+    image_info.Link = os.path.join(texture_src_dir, name) + ".png"
+
+    # 处理颜色叠加
+    overlay_color = get_overlay_color(p_image_layer)
+    if overlay_color:
+        image_info.bColorOverlay = True
+        image_info.ColorOverlayR, image_info.ColorOverlayG, image_info.ColorOverlayB, image_info.ColorOverlayA = \
+            overlay_color
+    # The overlay is already the tint of the image, it can not be replaced by the color of the layer
+    export_image(p_image_layer, image_info.Link, None if overlay_color else image_info)
 
     return image_info
 
@@ -259,228 +534,125 @@ def parse_text(p_psd_text_layer: Layers.TypeLayer, parent):
     if p_psd_text_layer.kind != "type":
         return None
 
-    x, y, width, height = get_layer_pos_size(p_psd_text_layer, parent)
-    text_info = {
-        "Type": "Text",
-        "Name": p_psd_text_layer.name,
-        "X": x,
-        "Y": y,
-        "AbsX": p_psd_text_layer.left,
-        "AbsY": p_psd_text_layer.top,
-        "Width": width,
-        "Height": height
-    }
+    text_info = make_node(TextNode, p_psd_text_layer, parent, p_psd_text_layer.name)
 
     text = p_psd_text_layer.text
     opacity = p_psd_text_layer.opacity
 
     resource_dict = p_psd_text_layer.resource_dict
 
-    color = resource_dict["StyleSheetSet"][0]["StyleSheetData"]["FillColor"]["Values"]
-    size = resource_dict["StyleSheetSet"][0]["StyleSheetData"]["FontSize"]
+    style_sheet = resource_dict["StyleSheetSet"][0]["StyleSheetData"]
+    color = style_sheet["FillColor"]["Values"]
+    size = style_sheet["FontSize"]
 
-    font_index = resource_dict["StyleSheetSet"][0]["StyleSheetData"]["Font"]
+    font_index = style_sheet["Font"]
     font = str(resource_dict["FontSet"][font_index]["Name"]).replace("'", "").replace("\"", "")
     # 描边 & 阴影
-    stroke = {
-        "enabled": False,
-        "color": None,
-        "size": None,
-        "opacity": None
-    }
-    drop_shadow = {
-        "enabled": False,
-        "color": None,
-        "opacity": None,
-        "distance": None,
-        "angle": None
-    }
+    stroke = None
+    drop_shadow = None
     effects = p_psd_text_layer.effects
     for effect in effects:
         if isinstance(effect, Effects.Stroke):
-            stroke["enabled"] = effect.enabled
-            stroke["color"] = effect.color
-            stroke["size"] = effect.size
-            stroke["opacity"] = effect.opacity
+            stroke = effect
         elif isinstance(effect, Effects.DropShadow):
-            drop_shadow["enabled"] = effect.enabled
-            drop_shadow["color"] = effect.color
-            drop_shadow["opacity"] = effect.opacity
-            drop_shadow["distance"] = effect.distance
-            drop_shadow["angle"] = effect.angle
+            drop_shadow = effect
 
     engine_dict = p_psd_text_layer.engine_dict
     alignment = engine_dict["ParagraphRun"]["RunArray"][0]["ParagraphSheet"]["Properties"]["Justification"]
 
-    text_info["Text"] = text
+    text_info.Text = text
 
-    text_info["ColorR"] = color[0] / 255
-    text_info["ColorG"] = color[1] / 255
-    text_info["ColorB"] = color[2] / 255
-    text_info["ColorA"] = opacity / 255
+    text_info.ColorR = color[0] / 255
+    text_info.ColorG = color[1] / 255
+    text_info.ColorB = color[2] / 255
+    text_info.ColorA = opacity / 255
     # It seems like the size of text in ue is bigger 2 than PS
-    text_info["Size"] = int(size) - 2
-    text_info["Font"] = font
-    text_info["Alignment"] = "Left"
-    text_info["StrokeEnabled"] = stroke["enabled"]
-    text_info["StrokeColorR"] = 1.0
-    text_info["StrokeColorG"] = 1.0
-    text_info["StrokeColorB"] = 1.0
-    text_info["StrokeColorA"] = 1.0
-    text_info["StrokeSize"] = 1
-    text_info["ShadowEnabled"] = drop_shadow["enabled"]
-    text_info["ShadowColorR"] = 1.0
-    text_info["ShadowColorG"] = 1.0
-    text_info["ShadowColorB"] = 1.0
-    text_info["ShadowColorA"] = 1.0
-    text_info["ShadowOffsetX"] = 0
-    text_info["ShadowOffsetY"] = 0
-
-    if stroke["enabled"]:
-        text_info["StrokeColorR"] = stroke["color"][b"Rd  "] / 255
-        text_info["StrokeColorG"] = stroke["color"][b"Grn "] / 255
-        text_info["StrokeColorB"] = stroke["color"][b"Bl  "] / 255
-        text_info["StrokeColorA"] = stroke["opacity"] / 100
-        text_info["StrokeSize"] = int(stroke["size"])
-
-    if drop_shadow["enabled"]:
-        text_info["ShadowColorR"] = drop_shadow["color"][b"Rd  "] / 255
-        text_info["ShadowColorG"] = drop_shadow["color"][b"Grn "] / 255
-        text_info["ShadowColorB"] = drop_shadow["color"][b"Bl  "] / 255
-        text_info["ShadowColorA"] = drop_shadow["opacity"] / 100
-
-        text_info["ShadowOffsetY"] = int(drop_shadow["distance"] * math.sin(drop_shadow["angle"] / 180 * math.pi))
-        text_info["ShadowOffsetX"] = -int(drop_shadow["distance"] * math.cos(drop_shadow["angle"] / 180 * math.pi))
+    text_info.Size = int(size) - 2
+    text_info.Font = font
+    text_info.StrokeEnabled = bool(stroke and stroke.enabled)
+    text_info.ShadowEnabled = bool(drop_shadow and drop_shadow.enabled)
+
+    if text_info.StrokeEnabled:
+        text_info.StrokeColorR = stroke.color[b"Rd  "] / 255
+        text_info.StrokeColorG = stroke.color[b"Grn "] / 255
+        text_info.StrokeColorB = stroke.color[b"Bl  "] / 255
+        text_info.StrokeColorA = stroke.opacity / 100
+        text_info.StrokeSize = int(stroke.size)
+
+    if text_info.ShadowEnabled:
+        text_info.ShadowColorR = drop_shadow.color[b"Rd  "] / 255
+        text_info.ShadowColorG = drop_shadow.color[b"Grn "] / 255
+        text_info.ShadowColorB = drop_shadow.color[b"Bl  "] / 255
+        text_info.ShadowColorA = drop_shadow.opacity / 100
+
+        text_info.ShadowOffsetY = int(drop_shadow.distance * math.sin(drop_shadow.angle / 180 * math.pi))
+        text_info.ShadowOffsetX = -int(drop_shadow.distance * math.cos(drop_shadow.angle / 180 * math.pi))
 
         # Fix position
-        text_info["X"] += text_info["ShadowOffsetX"] / 2
-        text_info["Y"] += text_info["ShadowOffsetY"] / 2
+        text_info.X += text_info.ShadowOffsetX / 2
+        text_info.Y += text_info.ShadowOffsetY / 2
 
     if alignment == 0:
-        text_info["Alignment"] = "Left"
+        text_info.Alignment = "Left"
     elif alignment == 1:
-        text_info["Alignment"] = "Right"
+        text_info.Alignment = "Right"
     elif alignment == 2:
-        text_info["Alignment"] = "Center"
+        text_info.Alignment = "Center"
 
     return text_info
 
 
-def parse_progress_bar(p_layer_content: Layers.Layer, p_progress_info):
-    p_progress_info["Type"] = "ProgressBar"
-    p_progress_info["BgLink"] = None
-    p_progress_info["bBgColorOverlay"] = False
-    p_progress_info["BgColorR"] = 0.0
-    p_progress_info["BgColorG"] = 0.0
-    p_progress_info["BgColorB"] = 0.0
-    p_progress_info["BgColorA"] = 0.0
-
-    p_progress_info["FLink"] = None
-    p_progress_info["bFColorOverlay"] = False
-    p_progress_info["FColorR"] = 0.0
-    p_progress_info["FColorG"] = 0.0
-    p_progress_info["FColorB"] = 0.0
-    p_progress_info["FColorA"] = 0.0
-
+def parse_progress_bar(p_layer_content: Layers.Layer, p_progress_info: ProgressBarNode):
     for layer in p_layer_content:
         layer_name = layer.name
-        valid_image = False
-        image_type = ""
-        print(layer.kind)
-        if layer.kind in ("pixel", "smartobject", "shape"):
-            if layer_name.endswith("_background"):
-                p_progress_info["BgLink"] = os.path.join(texture_src_dir, layer_name[:-11]) + ".png"
-                export_image(layer, p_progress_info["BgLink"])
-                valid_image = True
-                image_type = "background"
-            elif layer_name.endswith("_fill"):
-                p_progress_info["FLink"] = os.path.join(texture_src_dir, layer_name[:-11]) + ".png"
-                export_image(layer, p_progress_info["FLink"])
-                valid_image = True
-                image_type = "fill"
-
-        if valid_image:
-            effects = layer.effects
-            for effect in effects:
-                if isinstance(effect, Effects.ColorOverlay):
-                    if effect.blend_mode == b"Mltp":
-                        color = effect.color
-                        color_r = color[b'Rd  '] / 255
-                        color_g = color[b'Grn '] / 255
-                        color_b = color[b'Bl  '] / 255
-                        color_a = effect.opacity / 100
-                        if image_type == "background":
-                            p_progress_info["bBgColorOverlay"] = True
-                            p_progress_info["BgColorR"] = color_r
-                            p_progress_info["BgColorG"] = color_g
-                            p_progress_info["BgColorB"] = color_b
-                            p_progress_info["BgColorA"] = color_a
-                        elif image_type == "fill":
-                            p_progress_info["bFColorOverlay"] = False
-                            p_progress_info["FColorR"] = color_r
-                            p_progress_info["FColorG"] = color_g
-                            p_progress_info["FColorB"] = color_b
-                            p_progress_info["FColorA"] = color_a
+        if layer.kind not in ("pixel", "smartobject", "shape"):
+            continue
+        if layer_name.endswith("_background"):
+            p_progress_info.BgLink = os.path.join(texture_src_dir, layer_name[:-11]) + ".png"
+            export_image(layer, p_progress_info.BgLink)
+            overlay_color = get_overlay_color(layer)
+            if overlay_color:
+                p_progress_info.bBgColorOverlay = True
+                p_progress_info.BgColorR, p_progress_info.BgColorG, p_progress_info.BgColorB, \
+                    p_progress_info.BgColorA = overlay_color
+        elif layer_name.endswith("_fill"):
+            p_progress_info.FLink = os.path.join(texture_src_dir, layer_name[:-11]) + ".png"
+            export_image(layer, p_progress_info.FLink)
+            overlay_color = get_overlay_color(layer)
+            if overlay_color:
+                p_progress_info.bFColorOverlay = False
+                p_progress_info.FColorR, p_progress_info.FColorG, p_progress_info.FColorB, \
+                    p_progress_info.FColorA = overlay_color
 
     return p_progress_info
 
 
-def parse_list(p_layer_content: Layers.Layer, p_list_info, parent):
-    p_list_info["Type"] = "ListView"
-    p_list_info["Child"] = None
-
+def parse_list(p_layer_content: Layers.Layer, p_list_info: ListViewNode, parent, p_view_name="list view"):
     # The size is the same with parent
     if parent:
-        p_list_info["Width"] = parent["Width"] - p_list_info["X"] * 2
-        p_list_info["Height"] = parent["Height"] - p_list_info["Y"] * 2
+        p_list_info.Width = parent.Width - p_list_info.X * 2
+        p_list_info.Height = parent.Height - p_list_info.Y * 2
 
     child_layer = None
     for layer in p_layer_content:
         if layer.name == "child" and layer.kind == "group":
             child_layer = layer
     if not child_layer:
-        unreal.log_warning(
-            "Cannot detect the child layer of list view layer : %s."
-            "the child layer should named with 'child' and must be a group." % p_list_info["Name"]
+        log_warning(
+            "Cannot detect the child layer of %s layer : %s."
+            "the child layer should named with 'child' and must be a group." % (p_view_name, p_list_info.Name)
         )
         return p_list_info
 
     child = process_child_layer(child_layer, p_list_info)
     if child:
-        child["Name"] = p_list_info["Name"] + "_item"
-        p_list_info["Child"] = child
+        child.Name = p_list_info.Name + "_item"
+        p_list_info.Child = child
 
-        child["X"] = 0
-        child["Y"] = 0
+        child.X = 0
+        child.Y = 0
     return p_list_info
 
 
-def parse_tile(p_layer_content: Layers.Layer, p_tile_info, parent):
-    p_tile_info["Type"] = "TileView"
-    p_tile_info["Child"] = None
-
-    # The size is the same with parent
-    if parent:
-        p_tile_info["Width"] = parent["Width"] - p_tile_info["X"] * 2
-        p_tile_info["Height"] = parent["Height"] - p_tile_info["Y"] * 2
-
-    child_layer = None
-    for layer in p_layer_content:
-        if layer.name == "child" and layer.kind == "group":
-            child_layer = layer
-    if not child_layer:
-        unreal.log_warning(
-            "Cannot detect the child layer of tile view layer : %s."
-            "the child layer should named with 'child' and must be a group." % p_tile_info["Name"]
-        )
-        return p_tile_info
-
-    child = process_child_layer(child_layer, p_tile_info)
-    if child:
-        child["Name"] = p_tile_info["Name"] + "_item"
-        p_tile_info["Child"] = child
-
-        child["X"] = 0
-        child["Y"] = 0
-
-    return p_tile_info
+def parse_tile(p_layer_content: Layers.Layer, p_tile_info: TileViewNode, parent):
+    return parse_list(p_layer_content, p_tile_info, parent, "tile view")
@@ -0,0 +1,92 @@
+"""
+Vectorized RLE (PackBits) decoding of PSD channels.
+
+psd_tools decodes RLE channels one scanline at a time, with a compiled decoder that only ships
+for some platforms and a slow pure python fallback. decode_rle decodes all the scanlines of a
+channel together with numpy: every iteration reads the next run header of all the scanlines,
+then all the runs are expanded with a single repeat of the stream.
+"""
+import numpy as np
+
+from psd_tools import compression
+from psd_tools.compression import rle as python_rle
+
+# The decoder of psd_tools, used to raise the same errors for invalid data
+python_decode_rle = compression.decode_rle
+
+
+def find_runs(stream, row_start, row_end):
+    """
+    Walk the run headers of all the scanlines in lockstep, return the positions of the headers.
+    Return None if a run crosses the end of its scanline.
+    """
+    pos = row_start.copy()
+    active = np.flatnonzero(pos < row_end)
+    run_positions = []
+    while active.size:
+        header_pos = pos[active]
+        header = stream[header_pos]
+        run_positions.append(header_pos)
+        # literal: header + data, repeat: header + one byte, 128: header only
+        step = np.where(header < 128, header.astype(np.int64) + 2, np.where(header == 128, 1, 2))
+        pos[active] = header_pos + step
+        active = active[pos[active] < row_end[active]]
+
+    if np.any(pos != row_end):
+        return None
+    if not run_positions:
+        return np.empty(0, dtype=np.int64)
+    # Scanlines are stored one after another, sorting restores the order of the runs
+    return np.sort(np.concatenate(run_positions))
+
+
+def decode_rle(data, width, height, depth, version):
+    """
+    Same as psd_tools.compression.decode_rle
+    """
+    row_size = max(width * depth // 8, 1)
+    counts_dtype = (">u2", ">u4")[version - 1]
+    counts_size = np.dtype(counts_dtype).itemsize * height
+    if height == 0 or len(data) < counts_size:
+        return python_decode_rle(data, width, height, depth, version)
+
+    bytes_counts = np.frombuffer(data, dtype=counts_dtype, count=height).astype(np.int64)
+    row_end = np.cumsum(bytes_counts)
+    row_start = row_end - bytes_counts
+    stream = np.frombuffer(data, dtype=np.uint8, offset=counts_size)
+    if row_end[-1] > stream.size:
+        return python_decode_rle(data, width, height, depth, version)
+
+    run_pos = find_runs(stream, row_start, row_end)
+    if run_pos is None:
+        return python_decode_rle(data, width, height, depth, version)
+
+    header = stream[run_pos].astype(np.int64)
+    literal = header < 128
+    run_length = np.where(literal, header + 1, np.where(header > 128, 257 - header, 0))
+
+    # Every scanline must decode to exactly row_size bytes
+    run_row = np.searchsorted(row_start, run_pos, side="right") - 1
+    decoded_size = np.bincount(run_row, weights=run_length, minlength=height)
+    if np.any(decoded_size != row_size):
+        return python_decode_rle(data, width, height, depth, version)
+
+    # How many times every byte of the stream is output: headers are skipped, literal bytes are
+    # output once and the byte of a repeat run is output run_length times
+    stream = stream[:row_end[-1]]
+    literal_start = run_pos[literal] + 1
+    repeat_count = np.zeros(stream.size + 1, dtype=np.int64)
+    repeat_count[literal_start] = 1
+    repeat_count[literal_start + run_length[literal]] = -1
+    repeat_count = np.cumsum(repeat_count[:-1])
+    repeat_run = header > 128
+    repeat_count[run_pos[repeat_run] + 1] = run_length[repeat_run]
+    return np.repeat(stream, repeat_count).tobytes()
+
+
+def install_rle_decoder():
+    """
+    Decode RLE channels with decode_rle, unless psd_tools has its compiled decoder for this platform
+    """
+    if compression.rle_impl is python_rle:
+        compression.decode_rle = decode_rle
@@ -0,0 +1,119 @@
+"""
+Share the exported images of identical content between all the PSDs.
+
+Images are identified by the hash of their size and RGBA pixels, whatever encoder or image mode wrote them.
+The first image of a content is copied to the Shared folder of the texture directory as <name>_<hash>.png,
+every layout linking an image of the same content links this file instead, so it is imported once.
+The exported image is then replaced by a hard link to the shared file, so the content is stored once on disk
+while the export manifest still finds the exported image of an unchanged layer.
+The index of the shared images, {hash: file name}, is kept in AutoPSDUITextureStore.json.
+"""
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+from PIL import Image
+
+from AutoPSDUI.file_lock import locked_file
+from AutoPSDUI.layout import gather_image_links
+
+store_dir_name = "Shared"
+store_index_name = "AutoPSDUITextureStore.json"
+store_index_version = 2
+
+
+def get_pixel_hash(p_file):
+    """
+    Hash of the size and RGBA pixels of the image
+    """
+    with Image.open(p_file) as image:
+        image = image.convert("RGBA")
+        sha = hashlib.sha1(b"%dx%d:" % image.size)
+        sha.update(image.tobytes())
+    return sha.hexdigest()
+
+
+def link_shared_image(p_image_file, p_shared_file):
+    """
+    Replace the exported image by a hard link to the shared file of the same content.
+    It is kept as it is if the file system has no hard links.
+    """
+    if os.path.samefile(p_image_file, p_shared_file):
+        return
+    tmp_file = "%s.%d.tmp" % (p_image_file, os.getpid())
+    try:
+        os.link(p_shared_file, tmp_file)
+    except OSError:
+        return
+    os.replace(tmp_file, p_image_file)
+
+
+def load_store_index(p_texture_dir):
+    """
+    Load the shared image file names keyed by content hash
+    """
+    index_file = os.path.join(p_texture_dir, store_index_name)
+    if not os.path.exists(index_file):
+        return {}
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning("Ignore broken texture store index '%s': %s" % (index_file, e))
+        return {}
+    if index.get("Version") != store_index_version:
+        return {}
+    return index.get("Images", {})
+
+
+def save_store_index(p_texture_dir, p_added_images):
+    """
+    Add images to the index on disk, it is reloaded first because batch conversions may share it.
+    The reload and the replace hold the lock of the index, so that concurrent additions are not lost.
+    """
+    index_file = os.path.join(p_texture_dir, store_index_name)
+    with locked_file(index_file):
+        images = load_store_index(p_texture_dir)
+        images.update(p_added_images)
+
+        tmp_file = "%s.%d.tmp" % (index_file, os.getpid())
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"Version": store_index_version, "Images": images}, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, index_file)
+
+
+def share_layout_images(p_content, p_texture_dir):
+    """
+    Link the images of the layout to the shared images of the same content, adding the new ones to the store.
+    Return the shared images that were already in the store.
+    """
+    store_dir = os.path.join(p_texture_dir, store_dir_name)
+    if not os.path.exists(store_dir):
+        os.makedirs(store_dir)
+
+    index = load_store_index(p_texture_dir)
+    added_images = {}
+    shared_files = {}
+    unchanged_images = set()
+    for layer, key in gather_image_links(p_content, []):
+        image_file = layer[key]
+        if image_file not in shared_files:
+            image_hash = get_pixel_hash(image_file)
+            file_name = index.get(image_hash) or added_images.get(image_hash)
+            if file_name and os.path.exists(os.path.join(store_dir, file_name)):
+                if image_hash in index:
+                    unchanged_images.add(os.path.join(store_dir, file_name))
+            else:
+                base_name = os.path.splitext(os.path.basename(image_file))[0]
+                file_name = "%s_%s.png" % (base_name, image_hash[:8])
+                shutil.copyfile(image_file, os.path.join(store_dir, file_name))
+                added_images[image_hash] = file_name
+            shared_files[image_file] = os.path.join(store_dir, file_name)
+            link_shared_image(image_file, shared_files[image_file])
+        layer[key] = shared_files[image_file]
+
+    if added_images:
+        save_store_index(p_texture_dir, added_images)
+    return sorted(unchanged_images)
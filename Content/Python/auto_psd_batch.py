@@ -0,0 +1,250 @@
+"""
+Convert PSD files without the editor.
+
+Every PSD is parsed in its own process, its layer images are exported to the texture directory
+and its layout is written to the output directory. Build the WBPs of all the layouts in the editor with:
+    auto_psd_ui.py -l <output directory>
+
+Run it with the python of the engine, the dependencies in Source/ThirdParty are built for it:
+    python auto_psd_batch.py -i <psd directory or glob> -o <output directory> -t <texture directory> [-a /Game/UI]
+"""
+import os
+import sys
+import glob
+import time
+import getopt
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+plugin_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+
+if sys.platform == "win32":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Win64"))
+elif sys.platform == "darwin":
+    sys.path.append(os.path.join(plugin_dir, "Source", "ThirdParty", "Mac"))
+
+from AutoPSDUI import psd_utils
+from AutoPSDUI.layout import save_layout, load_layout, get_source_info, is_layout_current, get_layout_name
+from AutoPSDUI.layout_nodes import visit_layout
+from AutoPSDUI.atlas import pack_layout_atlases
+from AutoPSDUI.texture_store import share_layout_images
+from AutoPSDUI.nine_slice import slice_layout_images
+
+progress_prefix = "AutoPSDUI:Progress"
+
+
+def usage():
+    print(__doc__)
+    print("Options:")
+    print("  -i, --input        PSD file, directory or glob, can be repeated")
+    print("  -o, --output       Directory of the layout files")
+    print("  -t, --texture-dir  Directory of the exported images, the Texture Src Dir of the project")
+    print("  -a, --asset-dir    Game directory of the WBPs, default /Game")
+    print("  -j, --jobs         Number of PSDs converted at the same time, default one per CPU core")
+    print("  -w, --workers      Number of threads exporting the images of one PSD, default 1")
+    print("  -s, --atlas-size   Pack the images of every PSD into atlases of at most this size, default 0 (no atlas)")
+    print("  -d, --share        Share the images of identical content between all the PSDs")
+    print("  -n, --nine-slice   Slice the stretchable images to nine-slice sources drawn as boxes")
+    print("  -c, --solid-color  Draw the images of a single color with their color instead of a texture")
+    print("  -f, --force        Parse the PSDs even if their layout files are up to date")
+    print("  -p, --progress     Print the phase and exported layers of every PSD as progress lines, read by the editor")
+
+
+def parse_args():
+    """
+    Parse cmd args
+    """
+    opts, args = getopt.getopt(
+        sys.argv[1:], "hi:o:t:a:j:w:s:dncfp",
+        ["help", "input=", "output=", "texture-dir=", "asset-dir=", "jobs=", "workers=", "atlas-size=", "share",
+         "nine-slice", "solid-color", "force", "progress"]
+    )
+
+    options = {
+        "Inputs": [],
+        "Output": None,
+        "TextureDir": None,
+        "AssetDir": "/Game",
+        "Jobs": os.cpu_count() or 1,
+        "Workers": 1,
+        "AtlasSize": 0,
+        "ShareTextures": False,
+        "NineSlice": False,
+        "SolidColor": False,
+        "Force": False,
+        "Progress": False
+    }
+    for k, v in opts:
+        if k in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        elif k in ("-i", "--input"):
+            options["Inputs"].append(v)
+        elif k in ("-o", "--output"):
+            options["Output"] = os.path.abspath(v)
+        elif k in ("-t", "--texture-dir"):
+            options["TextureDir"] = os.path.abspath(v)
+        elif k in ("-a", "--asset-dir"):
+            options["AssetDir"] = v.rstrip("/")
+        elif k in ("-j", "--jobs"):
+            options["Jobs"] = max(1, int(v))
+        elif k in ("-w", "--workers"):
+            options["Workers"] = int(v)
+        elif k in ("-s", "--atlas-size"):
+            options["AtlasSize"] = max(0, int(v))
+        elif k in ("-d", "--share"):
+            options["ShareTextures"] = True
+        elif k in ("-n", "--nine-slice"):
+            options["NineSlice"] = True
+        elif k in ("-c", "--solid-color"):
+            options["SolidColor"] = True
+        elif k in ("-f", "--force"):
+            options["Force"] = True
+        elif k in ("-p", "--progress"):
+            options["Progress"] = True
+    options["Inputs"].extend(args)
+    return options
+
+
+def gather_psd_files(inputs):
+    """
+    Expand the input files, directories and globs to PSD files
+    """
+    psd_files = []
+    for input_path in inputs:
+        if os.path.isfile(input_path):
+            # Names with [ or ] are patterns for glob
+            psd_files.append(input_path)
+        elif os.path.isdir(input_path):
+            psd_files.extend(glob.glob(os.path.join(glob.escape(input_path), "*.psd")))
+        else:
+            psd_files.extend(glob.glob(input_path))
+    return sorted(set(os.path.abspath(f) for f in psd_files))
+
+
+def report_progress(psd_file, phase, done=0, total=0):
+    """
+    One progress line, the editor parses it when it runs the conversion in this process:
+        AutoPSDUI:Progress|<phase>|<done>|<total>|<psd file>
+    """
+    # One write per line, the worker processes share the output
+    sys.stdout.write("%s|%s|%d|%d|%s\n" % (progress_prefix, phase, done, total, psd_file))
+    sys.stdout.flush()
+
+
+def convert_psd(psd_file, options):
+    """
+    Parse the PSD, export its images and write its layout, run in a worker process
+    """
+    start = time.perf_counter()
+    content_name = ".".join(os.path.basename(psd_file).split(".")[:-1])
+    layout_file = os.path.join(options["Output"], get_layout_name(psd_file))
+    result = {
+        "Source": psd_file,
+        "Layout": layout_file,
+        "Images": 0,
+        "Unchanged": 0,
+        "Errors": [],
+        "Time": 0.0
+    }
+    progress = options["Progress"]
+    try:
+        source_info = get_source_info(psd_file)
+        layout_options = dict((key, options[key]) for key in ("AtlasSize", "ShareTextures", "NineSlice", "SolidColor"))
+        layout_content, layout_info = load_layout(layout_file)
+        if not options["Force"] and is_layout_current(layout_content, layout_info, psd_file, layout_options):
+            # Unchanged since the last conversion, none of its images changed since they were last ingested.
+            # The ingest still imports the images whose texture asset does not exist.
+            visitor = visit_layout(layout_content)
+            unchanged_images = sorted(visitor.images)
+            if layout_info.get("UnchangedImages") != unchanged_images:
+                layout_info["UnchangedImages"] = unchanged_images
+                save_layout(layout_file, layout_content, layout_info)
+            result["Images"] = len(visitor.images)
+            result["Unchanged"] = len(unchanged_images)
+            result["Time"] = time.perf_counter() - start
+            if progress:
+                report_progress(psd_file, "Unchanged")
+            return result
+
+        psd_utils.set_texture_src_dir(options["TextureDir"])
+        psd_utils.solid_color_images = options["SolidColor"]
+        if progress:
+            report_progress(psd_file, "Load")
+        psd = psd_utils.load_psd(psd_file)
+        # The PSD file stays open until its layers are exported, and must be closed if it fails
+        try:
+            if progress:
+                report_progress(psd_file, "Parse")
+            content = psd_utils.parse_psd(psd)
+            content["Name"] = content_name
+
+            export_progress = None
+            if progress:
+                report_progress(psd_file, "Export")
+                export_progress = lambda done, total: report_progress(psd_file, "Export", done, total)
+            export_report = psd_utils.flush_exports(options["Workers"], export_progress)
+        finally:
+            psd_utils.close_psd(psd)
+        visit_layout(content, set())
+
+        unchanged_images = [record["Path"] for record in export_report if record["Skipped"]]
+        if options["NineSlice"]:
+            unchanged_images.extend(slice_layout_images(content))
+        if options["ShareTextures"]:
+            unchanged_images.extend(share_layout_images(content, options["TextureDir"]))
+        if options["AtlasSize"]:
+            atlas_dir = os.path.join(options["TextureDir"], "Atlas")
+            unchanged_images.extend(pack_layout_atlases(content, atlas_dir, options["AtlasSize"]))
+        layout_info = dict(source_info)
+        layout_info.update(layout_options)
+        layout_info["Asset"] = "%s/WBP_%s" % (options["AssetDir"], content_name)
+        layout_info["UnchangedImages"] = unchanged_images
+        if progress:
+            report_progress(psd_file, "Layout")
+        save_layout(layout_file, content, layout_info)
+        if progress:
+            report_progress(psd_file, "Done")
+
+        result["Images"] = len(export_report)
+        result["Unchanged"] = len([record for record in export_report if record["Skipped"]])
+        result["Errors"] = ["%s: %s" % (record["Layer"], record["Error"]) for record in export_report if record["Error"]]
+    except Exception:
+        result["Layout"] = None
+        result["Errors"].append(traceback.format_exc())
+        if progress:
+            report_progress(psd_file, "Failed")
+    result["Time"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    options = parse_args()
+    if not options["Inputs"] or not options["Output"] or not options["TextureDir"]:
+        usage()
+        return 2
+
+    psd_files = gather_psd_files(options["Inputs"])
+    if not psd_files:
+        print("No PSD file found.")
+        return 1
+
+    failed_count = 0
+    with ProcessPoolExecutor(max_workers=min(options["Jobs"], len(psd_files))) as executor:
+        futures = [executor.submit(convert_psd, psd_file, options) for psd_file in psd_files]
+        for index, future in enumerate(as_completed(futures)):
+            result = future.result()
+            print("[%d/%d] %s: %d images (%d unchanged), %.2fs" % (
+                index + 1, len(psd_files), result["Source"], result["Images"], result["Unchanged"], result["Time"]))
+            for error in result["Errors"]:
+                print("    ERROR %s" % error)
+            if not result["Layout"]:
+                failed_count += 1
+            sys.stdout.flush()
+
+    print("Converted %d of %d PSD files." % (len(psd_files) - failed_count, len(psd_files)))
+    return 1 if failed_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,8 @@
 import os
 import sys
+import glob
+import json
+import time
 import getopt
 from importlib import reload
 
@@ -7,8 +10,17 @@ import unreal
 
 dst_path = "/Game"
 
-default_font = unreal.AutoPSDUISetting.get().default_font
-font_map = unreal.AutoPSDUISetting.get().font_map
+# Names of the widgets to be updated in incremental mode, None means a full rebuild
+changed_widgets = None
+
+# Textures and child WBPs loaded in this run, see AutoPSDUI.asset_cache
+asset_cache = None
+
+# Fonts of the font map of the settings, see AutoPSDUI.font_resolver
+font_resolver = None
+
+# Walk of the layout being built, with the texture asset of every image link, see AutoPSDUI.layout_nodes.LayoutVisitor
+layout_visitor = None
 
 
 # Check Whether psd_tools has been installed
@@ -34,12 +46,22 @@ def check_psd_tools():
         return download_dependencies()
 
 
+# AutoPSDUI modules in dependency order, a module is reloaded after the modules it imports names from.
+# The converter is not reloaded, it is the class registered with the C++ module for the editor session.
+reload_order = (
+    "AutoPSDUI.common", "AutoPSDUI.profiler", "AutoPSDUI.file_lock", "AutoPSDUI.deferred_imports", "AutoPSDUI.rle",
+    "AutoPSDUI.lazy_psd", "AutoPSDUI.engine_data", "AutoPSDUI.layout_nodes", "AutoPSDUI.layout", "AutoPSDUI.atlas",
+    "AutoPSDUI.texture_store", "AutoPSDUI.nine_slice", "AutoPSDUI.asset_cache", "AutoPSDUI.font_resolver",
+    "AutoPSDUI.psd_utils"
+)
+
+
 def reload_module():
     """
     For test AutoPSDUI python code without reboot engine.
     """
-    for module_name in sys.modules:
-        if module_name.startswith("AutoPSDUI"):
+    for module_name in reload_order:
+        if module_name in sys.modules:
             reload(sys.modules[module_name])
 
 
@@ -47,36 +69,32 @@ def parse_args():
     """
     Parse cmd args
     """
-    opts, args = getopt.getopt(sys.argv[1:], "i:o:", ["input=", "output="])
+    opts, args = getopt.getopt(sys.argv[1:], "i:o:l:j:", ["input=", "output=", "layout=", "job="])
 
     input_file = None
     output_asset = None
+    layout_input = None
+    job_file = None
 
     for k, v in opts:
         if k in ("-i", "--input"):
             input_file = v
         elif k in ("-o", "--output"):
             output_asset = v
-    return input_file, output_asset
+        elif k in ("-l", "--layout"):
+            layout_input = v
+        elif k in ("-j", "--job"):
+            job_file = v
+    return input_file, output_asset, layout_input, job_file
 
 
-def fix_names(psd_content, name_set):
+def get_layout_files(layout_input):
     """
-    Ensure that there is no widgets with the same name
+    A layout file, or all the layout files of a directory
     """
-    layer_name = psd_content["Name"]
-
-    index = 1
-    if layer_name in name_set:
-        layer_name = psd_content["Name"] + "_" + str(index)
-        index += 1
-
-    psd_content["Name"] = layer_name
-    name_set.add(layer_name)
-
-    if "Children" in psd_content:
-        for child in psd_content["Children"]:
-            fix_names(child, name_set)
+    if os.path.isdir(layout_input):
+        return sorted(glob.glob(os.path.join(layout_input, "*.json")))
+    return [layout_input]
 
 
 def get_image_dst_path(image_path):
@@ -90,149 +108,141 @@ def get_image_dst_path(image_path):
             base_name)
 
 
-def gather_psd_images(p_psd_content, image_list, invalid_image_list):
+def log_export_report(export_report):
     """
-    Collect all pictures in a PSD structure
+    Log the time and errors of exported layer images
     """
-    if p_psd_content["Type"] == "Image":
-        image_link = p_psd_content["Link"]
-        if os.path.exists(image_link):
-            image_list.add(image_link)
-        else:
-            invalid_image_list.add(image_link)
-    elif p_psd_content["Type"] == "Button":
-        image_link_normal = p_psd_content["LinkNormal"]
-        image_link_hovered = p_psd_content["LinkHovered"]
-        image_link_pressed = p_psd_content["LinkPressed"]
-        image_link_disabled = p_psd_content["LinkDisabled"]
-        if image_link_normal:
-            if os.path.exists(image_link_normal):
-                image_list.add(image_link_normal)
-            else:
-                invalid_image_list.add(image_link_normal)
-        if image_link_hovered:
-            if os.path.exists(image_link_hovered):
-                image_list.add(image_link_hovered)
-            else:
-                invalid_image_list.add(image_link_hovered)
-
-        if image_link_pressed:
-            if os.path.exists(image_link_pressed):
-                image_list.add(image_link_pressed)
-            else:
-                invalid_image_list.add(image_link_pressed)
-
-        if image_link_disabled:
-            if os.path.exists(image_link_disabled):
-                image_list.add(image_link_disabled)
-            else:
-                invalid_image_list.add(image_link_disabled)
-    elif p_psd_content["Type"] == "ProgressBar":
-        image_link_bg = p_psd_content["BgLink"]
-        image_link_fill = p_psd_content["FLink"]
-        if image_link_bg:
-            if os.path.exists(image_link_bg):
-                image_list.add(image_link_bg)
-            else:
-                invalid_image_list.add(image_link_bg)
-
-        if image_link_fill:
-            if os.path.exists(image_link_fill):
-                image_list.add(image_link_fill)
-            else:
-                invalid_image_list.add(image_link_fill)
-    if "Children" in p_psd_content:
-        for Child in p_psd_content["Children"]:
-            gather_psd_images(Child, image_list, invalid_image_list)
-
-    # Gather images of List and Tile View
-    if "Child" in p_psd_content:
-        if p_psd_content["Child"]:
-            gather_psd_images(p_psd_content["Child"], image_list, invalid_image_list)
-
-
-def import_images(image_list):
+    total_time = 0.0
+    skipped_count = 0
+    color_count = 0
+    for record in export_report:
+        total_time += record["Time"]
+        if record["Skipped"]:
+            skipped_count += 1
+        if record["Color"]:
+            color_count += 1
+        if record["Error"]:
+            unreal.log_warning("Export layer '%s' to '%s' failed: %s" % (
+                record["Layer"], record["Path"], record["Error"]))
+    unreal.log("Exported %d layer images (%d unchanged, %d of a single color), %.3fs layer time in total." % (
+        len(export_report), skipped_count, color_count, total_time))
+
+
+def log_import_report(import_times, save_time):
+    """
+    Log the import time of every texture and the time of the batched save
+    """
+    for image_src, import_time in import_times:
+        unreal.log("Imported '%s' in %.3fs" % (image_src, import_time))
+    unreal.log("Imported %d textures in %.3fs, saved them in %.3fs." % (
+        len(import_times), sum(import_time for _, import_time in import_times), save_time))
+
+
+def import_images(image_list, unchanged_images=()):
+    """
+    Import images as textures, unchanged images whose texture asset exists are skipped.
+    With Batch Texture Save the textures are saved together after all of them are imported.
+    Return the imported textures keyed by object path.
+    """
+    batch_save = psd_gui_setting.batch_texture_save
     tasks = []
     for image_src in image_list:
+        if image_src in unchanged_images and \
+                unreal.EditorAssetLibrary.does_asset_exist(get_image_dst_path(image_src)):
+            continue
         image_dst = psd_gui_setting.texture_asset_dir.path
         task = unreal.AssetImportTask()
 
         task.filename = image_src
         task.destination_path = image_dst
         task.automated = True
-        task.save = True
+        task.save = not batch_save
         tasks.append(task)
 
-    unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks(tasks)
-
-
-def gather_list_tile_children(p_psd_content, child_layers):
-    if "Children" in p_psd_content:
-        for child in p_psd_content["Children"]:
-            gather_list_tile_children(child, child_layers)
-
-    if p_psd_content["Type"] in ("ListView", "TileView"):
-        child = p_psd_content["Child"]
-        if child:
-            gather_list_tile_children(child, child_layers)
-        child_layers.append(child)
-
-
-def fix_image_link(p_psd_content):
-    if p_psd_content["Type"] == "Image":
-        image_link = p_psd_content["Link"]
-        fixed_link = get_image_dst_path(image_link)
-        p_psd_content["Link"] = fixed_link
-    elif p_psd_content["Type"] == "Button":
-        image_link_normal = p_psd_content["LinkNormal"]
-        image_link_hovered = p_psd_content["LinkHovered"]
-        image_link_pressed = p_psd_content["LinkPressed"]
-        image_link_disabled = p_psd_content["LinkDisabled"]
-        if image_link_normal:
-            p_psd_content["LinkNormal"] = get_image_dst_path(image_link_normal)
-        if image_link_hovered:
-            p_psd_content["LinkHovered"] = get_image_dst_path(image_link_hovered)
-        if image_link_pressed:
-            p_psd_content["LinkPressed"] = get_image_dst_path(image_link_pressed)
-        if image_link_disabled:
-            p_psd_content["LinkDisabled"] = get_image_dst_path(image_link_disabled)
-    elif p_psd_content["Type"] == "ProgressBar":
-        image_link_bg = p_psd_content["BgLink"]
-        image_link_fill = p_psd_content["FLink"]
-        if image_link_bg:
-            p_psd_content["BgLink"] = get_image_dst_path(image_link_bg)
-        if image_link_fill:
-            p_psd_content["FLink"] = get_image_dst_path(image_link_fill)
-    if "Children" in p_psd_content:
-        for Child in p_psd_content["Children"]:
-            fix_image_link(Child)
-
-    # fix image links of list view and tile view
-    if "Child" in p_psd_content:
-        if p_psd_content["Child"]:
-            fix_image_link(p_psd_content["Child"])
+    imported_assets = {}
+    if not tasks:
+        return imported_assets
+    asset_tools = unreal.AssetToolsHelpers.get_asset_tools()
+    profiler.count("ImportedTextures", len(tasks))
+    if not batch_save:
+        with profiler.span("ImportTextures"):
+            asset_tools.import_asset_tasks(tasks)
+        for task in tasks:
+            for object_path in task.imported_object_paths:
+                imported_assets[object_path] = unreal.EditorAssetLibrary.load_asset(object_path)
+        return imported_assets
+
+    import_times = []
+    with unreal.ScopedSlowTask(len(tasks), "Importing textures") as slow_task:
+        slow_task.make_dialog()
+        for task in tasks:
+            slow_task.enter_progress_frame(1, "Importing %s" % os.path.basename(task.filename))
+            start = time.perf_counter()
+            with profiler.span("ImportTexture", {"File": task.filename}):
+                asset_tools.import_asset_tasks([task])
+            import_times.append((task.filename, time.perf_counter() - start))
+            if not task.imported_object_paths:
+                unreal.log_warning("Import image '%s' failed." % task.filename)
+            for object_path in task.imported_object_paths:
+                imported_assets[object_path] = unreal.EditorAssetLibrary.load_asset(object_path)
+
+    start = time.perf_counter()
+    if imported_assets:
+        with profiler.span("SaveTextures"):
+            unreal.EditorAssetLibrary.save_loaded_assets(list(imported_assets.values()), True)
+    log_import_report(import_times, time.perf_counter() - start)
+    return imported_assets
 
 
 def process_child_layer(p_child_layer, parent_widget, wbp_obj):
-    if p_child_layer["Type"] == "Canvas":
-        create_canvas(p_child_layer, parent_widget, wbp_obj)
-    elif p_child_layer["Type"] == "Button":
-        create_button(p_child_layer, parent_widget, wbp_obj)
-    elif p_child_layer["Type"] == "Image":
-        create_image(p_child_layer, parent_widget, wbp_obj)
-    elif p_child_layer["Type"] == "Text":
-        create_text(p_child_layer, parent_widget, wbp_obj)
-    elif p_child_layer["Type"] == "ProgressBar":
-        create_progress_bar(p_child_layer, parent_widget, wbp_obj)
-    elif p_child_layer["Type"] == "ListView":
-        create_list_view(p_child_layer, parent_widget, wbp_obj)
-    elif p_child_layer["Type"] == "TileView":
-        create_tile_view(p_child_layer, parent_widget, wbp_obj)
-
-
-def process_parent_widget(p_layer, p_widget, parent_widget):
+    profiler.count("Widgets")
+    with profiler.span("CreateWidget", {"Widget": p_child_layer["Name"], "Type": p_child_layer["Type"]}):
+        if p_child_layer["Type"] == "Canvas":
+            return create_canvas(p_child_layer, parent_widget, wbp_obj)
+        elif p_child_layer["Type"] == "Button":
+            return create_button(p_child_layer, parent_widget, wbp_obj)
+        elif p_child_layer["Type"] == "Image":
+            return create_image(p_child_layer, parent_widget, wbp_obj)
+        elif p_child_layer["Type"] == "Text":
+            return create_text(p_child_layer, parent_widget, wbp_obj)
+        elif p_child_layer["Type"] == "ProgressBar":
+            return create_progress_bar(p_child_layer, parent_widget, wbp_obj)
+        elif p_child_layer["Type"] == "ListView":
+            return create_list_view(p_child_layer, parent_widget, wbp_obj)
+        elif p_child_layer["Type"] == "TileView":
+            return create_tile_view(p_child_layer, parent_widget, wbp_obj)
+    return None
+
+
+def make_widget(widget_class, wbp_object, widget_name):
+    """
+    Make a widget in the WBP, return the widget and whether its properties should be set.
+    In incremental mode the existing widget with the same name and class is reused,
+    its properties are kept if the layer did not change.
+    """
+    if changed_widgets is not None:
+        widget = unreal.AutoPSDUILibrary.find_widget_in_wbp(wbp_object, widget_name)
+        if widget:
+            if widget.get_class() == widget_class:
+                return widget, widget_name in changed_widgets
+            # The layer changed its type, the name must be freed for the new widget
+            unreal.AutoPSDUILibrary.remove_widget_from_wbp(wbp_object, widget)
+    widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(widget_class, wbp_object, widget_name)
+    return widget, True
+
+
+def process_parent_widget(p_layer, p_widget, parent_widget, b_dirty=True):
+    """
+    Add the widget to the parent widget and place it, a reused widget already in the parent is only placed if dirty
+    """
     if parent_widget:
-        slot = parent_widget.add_child(p_widget)
+        if p_widget.get_parent() == parent_widget:
+            if not b_dirty:
+                return
+            slot = p_widget.slot
+        else:
+            p_widget.remove_from_parent()
+            slot = parent_widget.add_child(p_widget)
         x = p_layer["X"]
         y = p_layer["Y"]
         width = p_layer["Width"]
@@ -242,23 +252,74 @@ def process_parent_widget(p_layer, p_widget, parent_widget):
         slot.set_size(unreal.Vector2D(width, height))
 
 
-def create_widgets_for_wbp(p_psd_content, wbp_object):
+def create_widgets_for_wbp(p_psd_content, wbp_object, p_previous_content=None):
     root_widget = create_canvas(p_psd_content, None, wbp_object)
     if root_widget:
         unreal.AutoPSDUILibrary.set_wbp_root_widget(wbp_object, root_widget)
 
+    if changed_widgets is not None and p_previous_content:
+        remove_stale_widgets(p_previous_content, p_psd_content, wbp_object)
+
+
+def remove_stale_widgets(p_previous_content, p_psd_content, wbp_object):
+    """
+    Remove the widgets built for the previous layers that no longer exist,
+    widgets added by hand are never in the previous layers and are kept
+    """
+    stale_names = gather_widget_names(p_previous_content, set()) - gather_widget_names(p_psd_content, set())
+    for widget_name in stale_names:
+        widget = unreal.AutoPSDUILibrary.find_widget_in_wbp(wbp_object, widget_name)
+        if widget:
+            unreal.AutoPSDUILibrary.remove_widget_from_wbp(wbp_object, widget)
+
+
+def get_layout_options():
+    """
+    The conversion options of the settings, see layout_options
+    """
+    return {
+        "AtlasSize": psd_gui_setting.atlas_max_size if psd_gui_setting.pack_texture_atlas else 0,
+        "ShareTextures": psd_gui_setting.share_textures,
+        "NineSlice": psd_gui_setting.nine_slice_images,
+        "SolidColor": psd_gui_setting.solid_color_images
+    }
+
+
+def get_layout_file(wbp_asset):
+    """
+    The layout of the last import of the WBP, stored with the source textures.
+    It is named after the WBP and a hash of its asset path, WBPs of the same name in other folders have their own.
+    """
+    layout_name = "%s_%s.json" % (os.path.basename(wbp_asset), get_path_hash(wbp_asset))
+    return os.path.join(psd_gui_setting.texture_src_dir.path, "Layout", layout_name)
+
+
+def load_wbp_layout(wbp_asset):
+    """
+    Load the layout of the last import of the WBP, (None, None) if there is none or it was saved for another WBP
+    """
+    content, info = load_layout(get_layout_file(wbp_asset))
+    if info is not None and info.get("Asset") != wbp_asset:
+        return None, None
+    return content, info
+
 
 def create_canvas(p_layer_content, parent_widget, wbp_object):
     if p_layer_content["Type"] != "Canvas":
         return None
 
     widget_name = p_layer_content["Name"]
-    canvas_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(unreal.CanvasPanel.static_class(), wbp_object, widget_name)
+    canvas_widget, dirty = make_widget(unreal.CanvasPanel.static_class(), wbp_object, widget_name)
 
-    process_parent_widget(p_layer_content, canvas_widget, parent_widget)
+    process_parent_widget(p_layer_content, canvas_widget, parent_widget, dirty)
 
+    child_widgets = []
     for child in p_layer_content["Children"]:
-        process_child_layer(child, canvas_widget, wbp_object)
+        child_widgets.append(process_child_layer(child, canvas_widget, wbp_object))
+
+    if changed_widgets is not None:
+        # Reused children keep their old order, restore the order of the layers
+        unreal.AutoPSDUILibrary.sort_panel_children(canvas_widget, [w for w in child_widgets if w])
     return canvas_widget
 
 
@@ -267,9 +328,11 @@ def create_text(p_text_content, parent_widget, wbp_object):
         return None
 
     widget_name = p_text_content["Name"]
-    text_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(unreal.TextBlock.static_class(), wbp_object, widget_name)
+    text_widget, dirty = make_widget(unreal.TextBlock.static_class(), wbp_object, widget_name)
 
-    process_parent_widget(p_text_content, text_widget, parent_widget)
+    process_parent_widget(p_text_content, text_widget, parent_widget, dirty)
+    if not dirty:
+        return text_widget
 
     text_widget.set_text(p_text_content["Text"])
     color_r = p_text_content["ColorR"]
@@ -281,28 +344,17 @@ def create_text(p_text_content, parent_widget, wbp_object):
 
     text_widget.set_color_and_opacity(unreal.SlateColor(unreal.LinearColor(color_r, color_g, color_b, color_a)))
 
-    font_info = unreal.SlateFontInfo()
-
     # Process Font
-    font_name = p_text_content["Font"]
-    if font_name in font_map:
-        font_info.font_object = font_map[font_name]
-    else:
-        font_info.font_object = default_font
-
-    font_info.size = size
+    outline_color = None
+    outline_size = 0
     if p_text_content["StrokeEnabled"]:
-        stroke_color_r = p_text_content["StrokeColorR"]
-        stroke_color_g = p_text_content["StrokeColorG"]
-        stroke_color_b = p_text_content["StrokeColorB"]
-        stroke_color_a = p_text_content["StrokeColorA"]
-
-        font_info.outline_settings.outline_color = unreal.LinearColor(
-            stroke_color_r, stroke_color_g, stroke_color_b, stroke_color_a
+        outline_color = (
+            p_text_content["StrokeColorR"], p_text_content["StrokeColorG"],
+            p_text_content["StrokeColorB"], p_text_content["StrokeColorA"]
         )
-        font_info.outline_settings.outline_size = p_text_content["StrokeSize"]
+        outline_size = p_text_content["StrokeSize"]
 
-    text_widget.set_font(font_info)
+    text_widget.set_font(font_resolver.get_font_info(p_text_content["Font"], size, outline_color, outline_size))
 
     # Alignment
     if alignment == "Left":
@@ -329,22 +381,49 @@ def create_text(p_text_content, parent_widget, wbp_object):
     return text_widget
 
 
+def make_brush(p_layer_content, link_key):
+    """
+    Brush of the image link, images packed into an atlas are drawn from their region of the atlas,
+    sliced images are drawn as a box
+    """
+    link = p_layer_content[link_key]
+    link_obj = asset_cache.load(layout_visitor.asset_links[link]) if link else None
+    if not link_obj:
+        return unreal.SlateBrush()
+
+    atlas_region = p_layer_content.get(link_key + "Atlas")
+    if atlas_region:
+        brush = unreal.AutoPSDUILibrary.make_atlas_brush(
+            link_obj,
+            unreal.Vector2D(*atlas_region["UVMin"]),
+            unreal.Vector2D(*atlas_region["UVMax"]),
+            unreal.Vector2D(*atlas_region["Size"])
+        )
+    else:
+        brush = unreal.SlateBrush()
+        brush.resource_object = link_obj
+        image_size = p_layer_content.get(link_key + "Size")
+        if image_size:
+            brush.image_size = unreal.Vector2D(*image_size)
+
+    margin = p_layer_content.get(link_key + "Margin")
+    if margin:
+        brush.draw_as = unreal.SlateBrushDrawType.BOX
+        brush.margin = unreal.Margin(*margin)
+    return brush
+
+
 def create_image(p_image_content, parent_widget, wbp_object):
     if p_image_content["Type"] != "Image":
         return None
     widget_name = p_image_content["Name"]
-    image_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(unreal.Image.static_class(), wbp_object, widget_name)
+    image_widget, dirty = make_widget(unreal.Image.static_class(), wbp_object, widget_name)
 
-    process_parent_widget(p_image_content, image_widget, parent_widget)
+    process_parent_widget(p_image_content, image_widget, parent_widget, dirty)
+    if not dirty:
+        return image_widget
 
-    brush = unreal.SlateBrush()
-    link_image = p_image_content["Link"]
-    if link_image:
-        link_image_obj = unreal.EditorAssetLibrary.load_asset(link_image)
-        if link_image_obj:
-
-            brush.resource_object = link_image_obj
-    image_widget.set_brush(brush)
+    image_widget.set_brush(make_brush(p_image_content, "Link"))
 
     if p_image_content["bColorOverlay"]:
         color_r = p_image_content["ColorOverlayR"]
@@ -360,100 +439,78 @@ def create_button(p_button_content, parent_widget, wbp_object):
     if p_button_content["Type"] != "Button":
         return None
     widget_name = p_button_content["Name"]
-    button_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(unreal.Button.static_class(), wbp_object, widget_name)
+    button_widget, dirty = make_widget(unreal.Button.static_class(), wbp_object, widget_name)
+
+    process_parent_widget(p_button_content, button_widget, parent_widget, dirty)
+    if dirty:
+        set_button_style(p_button_content, button_widget)
+
+    if "Children" in p_button_content:
+        children = p_button_content["Children"]
+        if len(children) != 0:
+            # Add a canvas as other widgets' parent widget
+            child_canvas_name = widget_name + "_canvas"
+            child_canvas_widget, canvas_dirty = make_widget(
+                unreal.CanvasPanel.static_class(), wbp_object, child_canvas_name
+            )
+            if child_canvas_widget.get_parent() != button_widget:
+                child_canvas_widget.remove_from_parent()
+                # A button holds a single child, drop the content left by a previous build
+                button_widget.clear_children()
+                button_slot = button_widget.add_child(child_canvas_widget)
+                button_slot.set_horizontal_alignment(unreal.HorizontalAlignment.H_ALIGN_FILL)
+                button_slot.set_vertical_alignment(unreal.VerticalAlignment.V_ALIGN_FILL)
+
+            process_child_layer(children[0], child_canvas_widget, wbp_object)
+
+    return button_widget
 
-    process_parent_widget(p_button_content, button_widget, parent_widget)
 
+def set_button_style(p_button_content, button_widget):
     # Set Style
     button_style = unreal.ButtonStyle()
 
     # Normal Brush
-    normal_brush = unreal.SlateBrush()
-    link_normal = p_button_content["LinkNormal"]
-    if link_normal:
-        link_obj = unreal.EditorAssetLibrary.load_asset(link_normal)
-        if link_obj:
-            normal_brush.resource_object = link_obj
+    normal_brush = make_brush(p_button_content, "LinkNormal")
     button_style.normal = normal_brush
 
     # hovered
-    hovered_brush = unreal.SlateBrush()
-    link_hovered = p_button_content["LinkHovered"]
-    if link_hovered:
-        link_obj = unreal.EditorAssetLibrary.load_asset(link_hovered)
-        if link_obj:
-            hovered_brush.resource_object = link_obj
+    hovered_brush = make_brush(p_button_content, "LinkHovered")
     button_style.hovered = normal_brush
 
     # pressed
-    pressed_brush = unreal.SlateBrush()
-    link_pressed = p_button_content["LinkPressed"]
-    if link_pressed:
-        link_obj = unreal.EditorAssetLibrary.load_asset(link_pressed)
-        if link_obj:
-            pressed_brush.resource_object = link_obj
+    pressed_brush = make_brush(p_button_content, "LinkPressed")
     button_style.pressed = normal_brush
 
     # disabled
-    disabled_brush = unreal.SlateBrush()
-    link_disabled = p_button_content["LinkDisabled"]
-    if link_disabled:
-        link_obj = unreal.EditorAssetLibrary.load_asset(link_disabled)
-        if link_obj:
-            disabled_brush.resource_object = link_obj
+    disabled_brush = make_brush(p_button_content, "LinkDisabled")
     button_style.disabled = normal_brush
     button_widget.set_style(button_style)
 
-    if "Children" in p_button_content:
-        children = p_button_content["Children"]
-        if len(children) != 0:
-            # Add a canvas as other widgets' parent widget
-            child_canvas_name = widget_name + "_canvas"
-            child_canvas_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(
-                unreal.CanvasPanel.static_class(), wbp_object, child_canvas_name
-            )
-            button_slot = button_widget.add_child(child_canvas_widget)
-            button_slot.set_horizontal_alignment(unreal.HorizontalAlignment.H_ALIGN_FILL)
-            button_slot.set_vertical_alignment(unreal.VerticalAlignment.V_ALIGN_FILL)
-
-            process_child_layer(children[0], child_canvas_widget, wbp_object)
-
-    return button_widget
-
 
 def create_progress_bar(p_progress_content, parent_widget, wbp_object):
     if p_progress_content["Type"] != "ProgressBar":
         return None
 
     widget_name = p_progress_content["Name"]
-    progress_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(
-        unreal.ProgressBar.static_class(), wbp_object, widget_name
-    )
-    process_parent_widget(p_progress_content, progress_widget, parent_widget)
+    progress_widget, dirty = make_widget(unreal.ProgressBar.static_class(), wbp_object, widget_name)
+    process_parent_widget(p_progress_content, progress_widget, parent_widget, dirty)
+    if not dirty:
+        return progress_widget
 
     # Set Style
     progress_style = unreal.ProgressBarStyle()
 
     # Background
-    bg_brush = unreal.SlateBrush()
-    bg_link = p_progress_content["BgLink"]
-
-    if bg_link:
-        link_obj = unreal.EditorAssetLibrary.load_asset(bg_link)
-        if link_obj:
-            bg_brush.resource_object = link_obj
+    bg_brush = make_brush(p_progress_content, "BgLink")
     progress_style.background_image = bg_brush
 
     # fill_image
-    fill_brush = unreal.SlateBrush()
-    fill_link = p_progress_content["FLink"]
-    if fill_link:
-        link_obj = unreal.EditorAssetLibrary.load_asset(fill_link)
-        if link_obj:
-            fill_brush.resource_object = link_obj
+    fill_brush = make_brush(p_progress_content, "FLink")
     progress_style.fill_image = fill_brush
 
     progress_widget.widget_style = progress_style
+    return progress_widget
 
 
 def create_list_view(p_list_content, parent_widget, wbp_object):
@@ -461,21 +518,22 @@ def create_list_view(p_list_content, parent_widget, wbp_object):
         return None
 
     widget_name = p_list_content["Name"]
-    list_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(
-        unreal.ListView.static_class(), wbp_object, widget_name
-    )
-    process_parent_widget(p_list_content, list_widget, parent_widget)
+    list_widget, dirty = make_widget(unreal.ListView.static_class(), wbp_object, widget_name)
+    process_parent_widget(p_list_content, list_widget, parent_widget, dirty)
+    if not dirty:
+        return list_widget
 
     # Set Child Class
     if p_list_content["Child"]:
         child_layer = p_list_content["Child"]
         child_wbp_asset = os.path.join(dst_path, child_layer["Name"])
         if unreal.EditorAssetLibrary.does_asset_exist(child_wbp_asset):
-            child_wbp = unreal.EditorAssetLibrary.load_asset(child_wbp_asset)
+            child_wbp = asset_cache.load(child_wbp_asset)
             if child_wbp:
                 list_widget.set_editor_property(
                     "EntryWidgetClass", unreal.AutoPSDUILibrary.get_bp_generated_class(child_wbp)
                 )
+    return list_widget
 
 
 def create_tile_view(p_tile_layer, parent_widget, wbp_object):
@@ -483,88 +541,298 @@ def create_tile_view(p_tile_layer, parent_widget, wbp_object):
         return None
 
     widget_name = p_tile_layer["Name"]
-    tile_widget = unreal.AutoPSDUILibrary.make_widget_with_wbp(
-        unreal.TileView.static_class(), wbp_object, widget_name
-    )
-    process_parent_widget(p_tile_layer, tile_widget, parent_widget)
+    tile_widget, dirty = make_widget(unreal.TileView.static_class(), wbp_object, widget_name)
+    process_parent_widget(p_tile_layer, tile_widget, parent_widget, dirty)
+    if not dirty:
+        return tile_widget
 
     # Set Child Class
     if p_tile_layer["Child"]:
         child_layer = p_tile_layer["Child"]
         child_wbp_asset = os.path.join(dst_path, child_layer["Name"])
         if unreal.EditorAssetLibrary.does_asset_exist(child_wbp_asset):
-            child_wbp = unreal.EditorAssetLibrary.load_asset(child_wbp_asset)
+            child_wbp = asset_cache.load(child_wbp_asset)
             if child_wbp:
                 tile_widget.set_editor_property(
                     "EntryWidgetClass", unreal.AutoPSDUILibrary.get_bp_generated_class(child_wbp)
                 )
                 tile_widget.set_entry_height(child_layer["Height"])
                 tile_widget.set_entry_width(child_layer["Width"])
+    return tile_widget
 
 
-def main():
-    psd_file, wbp_asset = parse_args()
-    global dst_path
-    dst_path = os.path.dirname(wbp_asset)
-
-    psd = load_psd(psd_file)
-
+def convert_psd(psd_file, wbp_asset):
     """
     1. Parse PSD File
-    2. Fix Names
-    3. Process Image and Fix Image Link
-    4. Create WBP
-    5. Create Widget for WBP
+    2. Export Images
+    3. Fix Names
+    4. Import Images
+    5. Build WBP
     """
-    image_layers = {}
+    if not os.path.exists(psd_file):
+        unreal.log_error("PSD file '%s' does not exist." % psd_file)
+        return
+
+    source_info = get_source_info(psd_file)
+    layout_options = get_layout_options()
+    source_info.update(layout_options)
+    content, info = load_wbp_layout(wbp_asset)
+    if is_layout_current(content, info, psd_file, layout_options):
+        # The PSD did not change since the last import, build from its layout without opening it
+        unreal.log("'%s' is unchanged, build '%s' from its layout." % (psd_file, wbp_asset))
+        visitor = visit_layout(content, None, get_image_dst_path)
+        with profiler.span("ImportImages", b_sample_memory=True):
+            asset_cache.add_assets(import_images(visitor.images, visitor.images))
+        with profiler.span("BuildWBP", {"Asset": wbp_asset}, b_sample_memory=True):
+            build_wbp(content, wbp_asset, source_info, visitor)
+        return
+
+    with profiler.span("LoadPSD", {"File": psd_file}, b_sample_memory=True):
+        psd = load_psd(psd_file)
+
     content_name = ".".join(os.path.basename(psd_file).split(".")[:-1])
-    content = parse_psd(psd)
-    content["Name"] = content_name
+    # The PSD file stays open until its layers are exported, and must be closed if it fails
+    try:
+        with profiler.span("ParsePSD", b_sample_memory=True):
+            content = parse_psd(psd)
+        content["Name"] = content_name
 
-    # Process Names
-    name_set = set()
-    fix_names(content, name_set)
+        # Export all layer images collected while parsing
+        with profiler.span("ExportImages", b_sample_memory=True):
+            export_report = flush_exports()
+    finally:
+        close_psd(psd)
+    log_export_report(export_report)
 
     # Process Images
+    unchanged_images = set(record["Path"] for record in export_report if record["Skipped"])
+    if layout_options["NineSlice"]:
+        with profiler.span("SliceImages", b_sample_memory=True):
+            unchanged_images.update(slice_layout_images(content))
+    if layout_options["ShareTextures"]:
+        with profiler.span("ShareTextures"):
+            unchanged_images.update(share_layout_images(content, psd_gui_setting.texture_src_dir.path))
+    if layout_options["AtlasSize"]:
+        atlas_dir = os.path.join(psd_gui_setting.texture_src_dir.path, "Atlas")
+        with profiler.span("PackAtlases", b_sample_memory=True):
+            unchanged_images.update(pack_layout_atlases(content, atlas_dir, layout_options["AtlasSize"]))
+
+    # Process Names and Images, after the links are shared or packed
+    visitor = visit_layout(content, set(), get_image_dst_path)
+    with profiler.span("ImportImages", b_sample_memory=True):
+        asset_cache.add_assets(import_images(visitor.images, unchanged_images))
+
+    with profiler.span("BuildWBP", {"Asset": wbp_asset}, b_sample_memory=True):
+        build_wbp(content, wbp_asset, source_info, visitor)
+
+
+def ingest_layouts(layout_files, wbp_assets=None):
+    """
+    Build the WBPs of the layouts written by auto_psd_batch.py,
+    the images of all the layouts are imported in one pass.
+    wbp_assets replaces the asset of some layouts, keyed by layout file.
+    """
+    layouts = []
+    for layout_file in layout_files:
+        content, info = load_layout(layout_file)
+        if content is None:
+            unreal.log_warning("Layout file '%s' does not exist." % layout_file)
+            continue
+        if wbp_assets and layout_file in wbp_assets:
+            info["Asset"] = wbp_assets[layout_file]
+        layouts.append((content, info, visit_layout(content, None, get_image_dst_path)))
+
     images = set()
-    invalid_images = set()
-    gather_psd_images(content, images, invalid_images)
-    import_images(images)
-    fix_image_link(content)
+    unchanged_images = set()
+    for content, info, visitor in layouts:
+        images.update(visitor.images)
+        unchanged_images.update(info.get("UnchangedImages", []))
+    with profiler.span("ImportImages", b_sample_memory=True):
+        asset_cache.add_assets(import_images(images, unchanged_images))
+
+    for content, info, visitor in layouts:
+        with profiler.span("BuildWBP", {"Asset": info["Asset"]}, b_sample_memory=True):
+            build_wbp(content, info["Asset"], info, visitor)
+
+
+def run_import_job(job_file):
+    """
+    Import the PSDs queued by the editor, written as {"Imports": [{"Source": psd, "Asset": wbp, "Layout": file}]}.
+    PSDs converted out of process have a layout file, they are ingested together, the others are converted here.
+    """
+    with open(job_file, "r", encoding="utf-8") as f:
+        imports = json.load(f)["Imports"]
+    unreal.log("Import job of %d PSD files." % len(imports))
+
+    wbp_assets = dict((entry["Layout"], entry["Asset"]) for entry in imports if entry.get("Layout"))
+    if wbp_assets:
+        ingest_layouts(sorted(wbp_assets), wbp_assets)
+    for entry in imports:
+        if not entry.get("Layout"):
+            convert_psd(entry["Source"], entry["Asset"])
+
+
+def build_wbp(content, wbp_asset, source_info=None, visitor=None):
+    """
+    Create or update the WBP and the child WBPs of List and Tile View from the layout,
+    the images of the layout must have been imported.
+    visitor is the walk of the layout with its texture assets, the layout is walked here if it is None.
+    The layout is saved with the source info, the next import reuses it if the PSD did not change.
+    """
+    global dst_path, layout_visitor
+    dst_path = os.path.dirname(wbp_asset)
+
+    if visitor is None:
+        visitor = visit_layout(content, None, get_image_dst_path)
+    layout_visitor = visitor
+
+    # The links of the layout stay the exported files, the next import is compared with it
+    layout = content
+    layout_file = get_layout_file(wbp_asset)
+    previous_layout, _ = load_wbp_layout(wbp_asset)
+    previous_index = index_layout(previous_layout, {}) if previous_layout else {}
+
+    global changed_widgets
+    if psd_gui_setting.incremental_update:
+        if previous_layout:
+            changed_widgets = diff_layout(previous_layout, layout)
+        else:
+            changed_widgets = set(index_layout(layout, {}).keys())
+        unreal.log("Incremental update, %d widgets changed." % len(changed_widgets))
+    else:
+        changed_widgets = None
+
+    # The child WBPs are compiled before the WBP using them, and all are saved together
+    compiled_wbps = []
 
     # Process Child Widget Blueprint
-    child_layers = []
-    gather_list_tile_children(content, child_layers)
-    for child_layer in child_layers:
+    for child_layer in visitor.list_children:
         child_wbp_asset = os.path.join(dst_path, child_layer["Name"])
 
         if unreal.EditorAssetLibrary.does_asset_exist(child_wbp_asset):
-            child_created_wbp = unreal.EditorAssetLibrary.load_asset(child_wbp_asset)
+            child_created_wbp = asset_cache.load(child_wbp_asset)
         else:
             child_created_wbp = unreal.AutoPSDUILibrary.create_wbp(child_wbp_asset)
 
-        create_widgets_for_wbp(child_layer, child_created_wbp)
+        previous_child_layer = previous_index.get(child_layer["Name"], (None, None))[0]
+        with profiler.span("CreateWidgets", {"Asset": child_wbp_asset}):
+            create_widgets_for_wbp(child_layer, child_created_wbp, previous_child_layer)
         # Apply ListEntryInterface
         unreal.AutoPSDUILibrary.apply_interface_to_bp(child_created_wbp, unreal.UserObjectListEntry.static_class())
-        unreal.AutoPSDUILibrary.compile_and_save_bp(child_created_wbp)
+        compiled_wbps.append(child_created_wbp)
 
     # Create WBP
     if unreal.EditorAssetLibrary.does_asset_exist(wbp_asset):
         created_wbp = unreal.EditorAssetLibrary.load_asset(wbp_asset)
     else:
         created_wbp = unreal.AutoPSDUILibrary.create_wbp(wbp_asset)
-    create_widgets_for_wbp(content, created_wbp)
-    unreal.AutoPSDUILibrary.compile_and_save_bp(created_wbp)
+    with profiler.span("CreateWidgets", {"Asset": wbp_asset}):
+        create_widgets_for_wbp(content, created_wbp, previous_layout)
+    compiled_wbps.append(created_wbp)
+    with profiler.span("CompileAndSave", {"Asset": wbp_asset, "Blueprints": len(compiled_wbps)}):
+        unreal.AutoPSDUILibrary.compile_and_save_bp_batch(compiled_wbps)
 
+    layout_info = {"Asset": wbp_asset}
+    for key in ("Source", "SourceSize", "SourceMTime") + layout_options:
+        if source_info and key in source_info:
+            layout_info[key] = source_info[key]
+    save_layout(layout_file, layout, layout_info)
 
-if __name__ == "__main__":
-    reload_module()
+
+def save_profile():
+    """
+    Write the trace of the import to the Profile folder of the source textures and log its summary
+    """
+    trace_file = os.path.join(psd_gui_setting.texture_src_dir.path, "Profile",
+                              "AutoPSDUI_%s.json" % time.strftime("%Y%m%d_%H%M%S"))
+    profiler.save_trace(trace_file)
+    for line in profiler.get_summary_lines():
+        unreal.log(line)
+    unreal.log("Import trace written to '%s'." % trace_file)
+
+
+def load_settings():
+    """
+    Read the settings before every import, they may change during the editor session
+    """
+    global font_resolver
+    setting = unreal.AutoPSDUISetting.get()
+    font_resolver = FontResolver(setting.font_map, setting.default_font)
+    psd_utils.load_settings()
+
+
+def run(psd_file=None, wbp_asset=None, layout_input=None, job_file=None):
+    """
+    Import a PSD, the layouts written by auto_psd_batch.py or an import job of the editor
+    """
+    global asset_cache
+    load_settings()
+    asset_cache = AssetCache()
+    if psd_gui_setting.profile_import:
+        profiler.start_profile()
+
+    with profiler.span("Import", b_sample_memory=True):
+        if job_file:
+            run_import_job(job_file)
+        elif layout_input:
+            layout_files = get_layout_files(layout_input)
+            wbp_assets = {layout_files[0]: wbp_asset} if wbp_asset and len(layout_files) == 1 else None
+            ingest_layouts(layout_files, wbp_assets)
+        else:
+            convert_psd(psd_file, wbp_asset)
+    asset_cache.log_stats()
+    font_resolver.log_stats()
+    for line in deferred_imports.get_import_report():
+        unreal.log("Deferred import: %s" % line)
+
+    if profiler.enabled:
+        save_profile()
+        profiler.stop_profile()
+
+
+def load_dependencies():
+    """
+    Import the AutoPSDUI modules, return False if psd_tools is missing and was not downloaded.
+    The script does it on every run, the converter of the editor once per session.
+    """
+    global common, download_dependencies, psd_gui_setting, psd_utils, load_psd, parse_psd, flush_exports, close_psd
+    global AssetCache, FontResolver, profiler, pack_layout_atlases, share_layout_images, slice_layout_images
+    global save_layout, load_layout, index_layout, diff_layout, gather_widget_names
+    global get_source_info, is_layout_current, get_path_hash, layout_options, visit_layout, deferred_imports
+
+    start = time.perf_counter()
     # this must be front of other AutoPSDUI module
     from AutoPSDUI import common
     from AutoPSDUI.common import download_dependencies
 
-    if check_psd_tools():
-        from AutoPSDUI.common import psd_gui_setting
-        from AutoPSDUI.psd_utils import load_psd
-        from AutoPSDUI.psd_utils import parse_psd
+    if not check_psd_tools():
+        return False
+    from AutoPSDUI.common import psd_gui_setting
+    from AutoPSDUI import psd_utils
+    from AutoPSDUI.psd_utils import load_psd
+    from AutoPSDUI.psd_utils import parse_psd
+    from AutoPSDUI.psd_utils import flush_exports
+    from AutoPSDUI.psd_utils import close_psd
+    from AutoPSDUI.asset_cache import AssetCache
+    from AutoPSDUI.font_resolver import FontResolver
+    from AutoPSDUI import profiler
+    from AutoPSDUI.atlas import pack_layout_atlases
+    from AutoPSDUI.texture_store import share_layout_images
+    from AutoPSDUI.nine_slice import slice_layout_images
+    from AutoPSDUI.layout import save_layout, load_layout, index_layout, diff_layout, gather_widget_names
+    from AutoPSDUI.layout import get_source_info, is_layout_current, get_path_hash, layout_options
+    from AutoPSDUI.layout_nodes import visit_layout
+    from AutoPSDUI import deferred_imports
+    unreal.log("AutoPSDUI modules imported in %.2fs, scipy and skimage are imported when a layer needs them."
+               % (time.perf_counter() - start))
+    return True
+
+
+def main():
+    run(*parse_args())
+
+
+if __name__ == "__main__":
+    reload_module()
+    if load_dependencies():
         main()
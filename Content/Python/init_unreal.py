@@ -0,0 +1,6 @@
+"""
+Run by the editor at startup, registers the AutoPSDUI converter of the session, see AutoPSDUI/converter.py
+"""
+from AutoPSDUI.converter import register_converter
+
+register_converter()
@@ -45,6 +45,7 @@ public class AutoPSDUI : ModuleRules
 				"UMG",
 				"AssetRegistry",
 				"EditorScriptingUtilities",
+				"Json",
 				// ... add private dependencies that you statically link with here ...	
 			}
 			);
@@ -4,14 +4,100 @@
 #include "Editor.h"
 #include "Subsystems/ImportSubsystem.h"
 #include "EditorFramework/AssetImportData.h"
+#include "Misc/MonitoredProcess.h"
+#include "Async/Async.h"
+#include "Framework/Notifications/NotificationManager.h"
+#include "Widgets/Notifications/SNotificationList.h"
+#include "Containers/Ticker.h"
+#include "Misc/FileHelper.h"
+#include "Misc/SecureHash.h"
+#include "Dom/JsonObject.h"
+#include "Serialization/JsonSerializer.h"
 
 #include "AutoPSDUISetting.h"
 #include "AutoPSDUILibrary.h"
+#include "AutoPSDUIConverter.h"
 
 #include "AssetRegistryModule.h"
 
 #define LOCTEXT_NAMESPACE "FAutoPSDUIModule"
 
+DEFINE_LOG_CATEGORY_STATIC(LogAutoPSDUI, Log, All);
+
+namespace AutoPSDUI
+{
+	/* Start of the progress lines printed by auto_psd_batch.py -p: AutoPSDUI:Progress|<phase>|<done>|<total>|<psd file> */
+	const TCHAR* ProgressPrefix = TEXT("AutoPSDUI:Progress|");
+
+	FString GetPluginDir()
+	{
+		return FPaths::ConvertRelativePathToFull(FPaths::ProjectPluginsDir() / TEXT("AutoPSDUI"));
+	}
+
+	FString GetPythonExecutable()
+	{
+#if PLATFORM_WINDOWS
+		return FPaths::ConvertRelativePathToFull(FPaths::EngineDir() / TEXT("Binaries/ThirdParty/Python3/Win64/python.exe"));
+#elif PLATFORM_MAC
+		return FPaths::ConvertRelativePathToFull(FPaths::EngineDir() / TEXT("Binaries/ThirdParty/Python3/Mac/bin/python3"));
+#else
+		return FPaths::ConvertRelativePathToFull(FPaths::EngineDir() / TEXT("Binaries/ThirdParty/Python3/Linux/bin/python3"));
+#endif
+	}
+
+	/* psd_tools downloaded by AutoPSDUI.common, the python of the engine finds it there */
+	bool HasDependencies()
+	{
+#if PLATFORM_WINDOWS
+		const FString PlatformDir = TEXT("Win64");
+#elif PLATFORM_MAC
+		const FString PlatformDir = TEXT("Mac");
+#else
+		const FString PlatformDir = TEXT("Linux");
+#endif
+		return FPaths::DirectoryExists(GetPluginDir() / TEXT("Source/ThirdParty") / PlatformDir / TEXT("psd_tools"));
+	}
+
+	FString GetIntermediateDir()
+	{
+		return FPaths::ConvertRelativePathToFull(FPaths::ProjectIntermediateDir() / TEXT("AutoPSDUI"));
+	}
+
+	/* Layout file written by auto_psd_batch.py for a PSD, named like get_layout_name of layout.py */
+	FString GetLayoutFile(const FString& LayoutDir, const FString& SrcFile)
+	{
+		FString PathKey = FPaths::ConvertRelativePathToFull(SrcFile);
+		FPaths::NormalizeFilename(PathKey);
+		PathKey.ToLowerInline();
+		const FTCHARToUTF8 PathUtf8(*PathKey);
+		uint8 Hash[FSHA1::DigestSize];
+		FSHA1::HashBuffer(PathUtf8.Get(), PathUtf8.Length(), Hash);
+		return LayoutDir / FString::Printf(TEXT("%s_%s.json"), *FPaths::GetBaseFilename(SrcFile), *BytesToHex(Hash, 4).ToLower());
+	}
+
+	FText GetProgressText(const FString& SrcFile, int32 Index, int32 Count, const FString& Phase, int32 Done, int32 Total)
+	{
+		FText FileName = FText::FromString(FPaths::GetCleanFilename(SrcFile));
+		if (Count > 1)
+		{
+			FileName = FText::Format(LOCTEXT("BatchFileName", "{0} ({1}/{2})"), FileName, Index, Count);
+		}
+		if (Phase == TEXT("Export") && Total > 0)
+		{
+			return FText::Format(LOCTEXT("ExportProgress", "Converting {0}: exporting layers {1}/{2}"), FileName, Done, Total);
+		}
+		if (Phase == TEXT("Parse"))
+		{
+			return FText::Format(LOCTEXT("ParseProgress", "Converting {0}: parsing layers"), FileName);
+		}
+		if (Phase == TEXT("Layout"))
+		{
+			return FText::Format(LOCTEXT("LayoutProgress", "Converting {0}: writing layout"), FileName);
+		}
+		return FText::Format(LOCTEXT("LoadProgress", "Converting {0}"), FileName);
+	}
+}
+
 void FAutoPSDUIModule::StartupModule()
 {
 	UImportSubsystem* ImportSubsystem = GEditor->GetEditorSubsystem<UImportSubsystem>();
@@ -22,6 +108,21 @@ void FAutoPSDUIModule::ShutdownModule()
 {
 	// This function may be called during shutdown to clean up your module.  For modules that support dynamic reloading,
 	// we call this function before unloading the module.
+	if (TickerHandle.IsValid())
+	{
+		FTicker::GetCoreTicker().RemoveTicker(TickerHandle);
+		TickerHandle.Reset();
+	}
+	PendingImports.Empty();
+	if (Conversion.IsValid())
+	{
+		// The delegates capture the module, they must not run while it is unloaded
+		Conversion->Process->OnOutput().Unbind();
+		Conversion->Process->OnCompleted().Unbind();
+		Conversion->Process->Cancel(true);
+		Conversion.Reset();
+	}
+	UAutoPSDUIConverter::UnregisterConverter();
 }
 
 
@@ -56,18 +157,269 @@ void FAutoPSDUIModule::OnPSDImport(UObject* PSDTextureAsset)
 	int LastDotIndex;
 	TexturePath.FindLastChar(TCHAR('.'), LastDotIndex);
 	TexturePath = TexturePath.Mid(0, LastDotIndex);
-	
+
 	const FString DstFile = FPaths::Combine(
 		FPaths::GetPath(TexturePath), TEXT("WBP_")
 		+ FPaths::GetBaseFilename(TexturePath)
 	);
 
+	// Reimporting many PSDs sends one event per PSD, they are imported together when the events stop
+	PendingImports.Add(SrcFile, DstFile);
+	LastImportTime = FPlatformTime::Seconds();
+	if (!TickerHandle.IsValid())
+	{
+		TickerHandle = FTicker::GetCoreTicker().AddTicker(FTickerDelegate::CreateRaw(this, &FAutoPSDUIModule::TickImportQueue), 0.1f);
+	}
+}
+
+bool FAutoPSDUIModule::TickImportQueue(float DeltaTime)
+{
+	if (PendingImports.Num() == 0)
+	{
+		TickerHandle.Reset();
+		return false;
+	}
+	// The PSDs queued while a conversion is running wait for it, they may share its files
+	if (Conversion.IsValid() || FPlatformTime::Seconds() - LastImportTime < UAutoPSDUISetting::Get()->ReimportDelay)
+	{
+		return true;
+	}
+
+	const TMap<FString, FString> Imports = MoveTemp(PendingImports);
+	PendingImports.Reset();
+	TickerHandle.Reset();
+	RunImports(Imports);
+	return false;
+}
+
+void FAutoPSDUIModule::RunImports(const TMap<FString, FString>& Imports)
+{
+	UE_LOG(LogAutoPSDUI, Log, TEXT("Importing %d PSD files."), Imports.Num());
+	if (UAutoPSDUISetting::Get()->bConvertOutOfProcess && ConvertOutOfProcess(Imports))
+	{
+		return;
+	}
+	RunImportJob(Imports, TMap<FString, FString>());
+}
+
+void FAutoPSDUIModule::RunImportJob(const TMap<FString, FString>& Imports, const TMap<FString, FString>& LayoutFiles)
+{
+	TArray<TSharedPtr<FJsonValue>> Entries;
+	for (const auto& Import : Imports)
+	{
+		TSharedPtr<FJsonObject> Entry = MakeShared<FJsonObject>();
+		Entry->SetStringField(TEXT("Source"), Import.Key);
+		Entry->SetStringField(TEXT("Asset"), Import.Value);
+		if (const FString* LayoutFile = LayoutFiles.Find(Import.Key))
+		{
+			Entry->SetStringField(TEXT("Layout"), *LayoutFile);
+		}
+		Entries.Add(MakeShared<FJsonValueObject>(Entry));
+	}
+	TSharedRef<FJsonObject> Job = MakeShared<FJsonObject>();
+	Job->SetArrayField(TEXT("Imports"), Entries);
+
+	FString JobText;
+	const TSharedRef<TJsonWriter<>> Writer = TJsonWriterFactory<>::Create(&JobText);
+	FJsonSerializer::Serialize(Job, Writer);
+	const FString JobFile = AutoPSDUI::GetIntermediateDir() / TEXT("ImportJob.json");
+	if (!FFileHelper::SaveStringToFile(JobText, *JobFile, FFileHelper::EEncodingOptions::ForceUTF8WithoutBOM))
+	{
+		UE_LOG(LogAutoPSDUI, Error, TEXT("Cannot write the import job '%s'."), *JobFile);
+		return;
+	}
+
+	// The converter of the session keeps the python modules loaded between the jobs
+	if (UAutoPSDUIConverter* Converter = UAutoPSDUIConverter::Get())
+	{
+		Converter->ImportJob(JobFile);
+		return;
+	}
+
+	// Python modules and settings are loaded once for all the PSDs
 	const FString PyFile = FPaths::ProjectPluginsDir() / TEXT("AutoPSDUI/Content/Python/auto_psd_ui.py");
-	FString PyCmd = FString::Printf(TEXT("%s -i %s -o %s"), *PyFile, *SrcFile, *DstFile);
+	FString PyCmd = FString::Printf(TEXT("%s -j %s"), *PyFile, *JobFile);
 
 	UAutoPSDUILibrary::RunPyCmd(PyCmd);
 }
 
+bool FAutoPSDUIModule::ConvertOutOfProcess(const TMap<FString, FString>& Imports)
+{
+	const FString PythonExecutable = AutoPSDUI::GetPythonExecutable();
+	if (!FPaths::FileExists(PythonExecutable) || !AutoPSDUI::HasDependencies())
+	{
+		// The import in the editor checks the dependencies and offers to download them
+		return false;
+	}
+
+	const UAutoPSDUISetting* Setting = UAutoPSDUISetting::Get();
+	// Apart from the import job of the same directory
+	const FString LayoutDir = AutoPSDUI::GetIntermediateDir() / TEXT("Layouts");
+	// One PSD uses the export threads of the setting, many PSDs are converted one per process
+	FString Params = FString::Printf(
+		TEXT("-u \"%s\" -p -o \"%s\" -t \"%s\" -j %d -w %d"),
+		*(AutoPSDUI::GetPluginDir() / TEXT("Content/Python/auto_psd_batch.py")),
+		*LayoutDir,
+		*FPaths::ConvertRelativePathToFull(Setting->TextureSrcDir.Path),
+		FMath::Min(Imports.Num(), FPlatformMisc::NumberOfCores()),
+		Imports.Num() == 1 ? Setting->ExportWorkers : 1
+	);
+	if (Setting->bPackTextureAtlas)
+	{
+		Params += FString::Printf(TEXT(" -s %d"), Setting->AtlasMaxSize);
+	}
+	if (Setting->bShareTextures)
+	{
+		Params += TEXT(" -d");
+	}
+	if (Setting->bNineSliceImages)
+	{
+		Params += TEXT(" -n");
+	}
+	if (Setting->bSolidColorImages)
+	{
+		Params += TEXT(" -c");
+	}
+
+	TSharedPtr<FPSDConversion> NewConversion = MakeShared<FPSDConversion>();
+	NewConversion->Imports = Imports;
+	for (const auto& Import : Imports)
+	{
+		Params += FString::Printf(TEXT(" -i \"%s\""), *Import.Key);
+		NewConversion->LayoutFiles.Add(Import.Key, AutoPSDUI::GetLayoutFile(LayoutDir, Import.Key));
+	}
+
+	TSharedPtr<FMonitoredProcess> Process = MakeShareable(new FMonitoredProcess(PythonExecutable, Params, true));
+	const FMonitoredProcess* ProcessKey = Process.Get();
+	NewConversion->Process = Process;
+
+	// The process calls back on its own thread, the conversion is handled on the game thread
+	Process->OnOutput().BindLambda([this, ProcessKey](const FString Output)
+	{
+		AsyncTask(ENamedThreads::GameThread, [this, ProcessKey, Output]()
+		{
+			if (Conversion.IsValid() && Conversion->Process.Get() == ProcessKey)
+			{
+				OnConversionOutput(Output);
+			}
+		});
+	});
+	Process->OnCompleted().BindLambda([this, ProcessKey](int32 ReturnCode)
+	{
+		AsyncTask(ENamedThreads::GameThread, [this, ProcessKey, ReturnCode]()
+		{
+			if (Conversion.IsValid() && Conversion->Process.Get() == ProcessKey)
+			{
+				OnConversionCompleted(ReturnCode);
+			}
+		});
+	});
+
+	// Set before the launch, the callbacks check it
+	Conversion = NewConversion;
+	if (!Process->Launch())
+	{
+		UE_LOG(LogAutoPSDUI, Warning, TEXT("Cannot start '%s', convert the PSD files in the editor."), *PythonExecutable);
+		Conversion.Reset();
+		return false;
+	}
+
+	TArray<FString> SrcFiles;
+	Imports.GetKeys(SrcFiles);
+	FNotificationInfo Info(AutoPSDUI::GetProgressText(SrcFiles[0], 1, Imports.Num(), TEXT("Load"), 0, 0));
+	Info.bFireAndForget = false;
+	Info.ExpireDuration = 3.0f;
+	Conversion->Notification = FSlateNotificationManager::Get().AddNotification(Info);
+	if (Conversion->Notification.IsValid())
+	{
+		Conversion->Notification->SetCompletionState(SNotificationItem::CS_Pending);
+	}
+
+	UE_LOG(LogAutoPSDUI, Log, TEXT("Converting %d PSD files out of process: %s %s"), Imports.Num(), *PythonExecutable, *Params);
+	return true;
+}
+
+void FAutoPSDUIModule::OnConversionOutput(const FString& Output)
+{
+	if (!Output.StartsWith(AutoPSDUI::ProgressPrefix))
+	{
+		if (Output.Contains(TEXT("ERROR")) || Output.Contains(TEXT("Traceback")))
+		{
+			UE_LOG(LogAutoPSDUI, Error, TEXT("%s"), *Output);
+		}
+		else
+		{
+			UE_LOG(LogAutoPSDUI, Log, TEXT("%s"), *Output);
+		}
+		return;
+	}
+
+	TArray<FString> Fields;
+	Output.ParseIntoArray(Fields, TEXT("|"), false);
+	if (Fields.Num() < 5)
+	{
+		return;
+	}
+	const FString& Phase = Fields[1];
+	FString SrcFile = Fields[4];
+	FPaths::NormalizeFilename(SrcFile);
+	if (Phase == TEXT("Done") || Phase == TEXT("Unchanged") || Phase == TEXT("Failed"))
+	{
+		Conversion->FinishedCount++;
+		if (Phase != TEXT("Failed"))
+		{
+			Conversion->ConvertedFiles.Add(SrcFile);
+		}
+		return;
+	}
+	if (Conversion->Notification.IsValid())
+	{
+		Conversion->Notification->SetText(AutoPSDUI::GetProgressText(
+			SrcFile, FMath::Min(Conversion->FinishedCount + 1, Conversion->Imports.Num()), Conversion->Imports.Num(),
+			Phase, FCString::Atoi(*Fields[2]), FCString::Atoi(*Fields[3])
+		));
+	}
+}
+
+void FAutoPSDUIModule::OnConversionCompleted(int32 ReturnCode)
+{
+	const TSharedPtr<FPSDConversion> Completed = Conversion;
+	Conversion.Reset();
+
+	TMap<FString, FString> Imports;
+	TMap<FString, FString> LayoutFiles;
+	for (const auto& Import : Completed->Imports)
+	{
+		const FString& LayoutFile = Completed->LayoutFiles[Import.Key];
+		if (Completed->ConvertedFiles.Contains(Import.Key) && FPaths::FileExists(LayoutFile))
+		{
+			Imports.Add(Import.Key, Import.Value);
+			LayoutFiles.Add(Import.Key, LayoutFile);
+		}
+		else
+		{
+			UE_LOG(LogAutoPSDUI, Error, TEXT("Conversion of '%s' failed."), *Import.Key);
+		}
+	}
+
+	const bool bSucceeded = ReturnCode == 0 && Imports.Num() == Completed->Imports.Num();
+	if (Completed->Notification.IsValid())
+	{
+		Completed->Notification->SetText(bSucceeded
+			? FText::Format(LOCTEXT("ConvertSucceeded", "Converted {0} PSD files, building their WBPs"), Imports.Num())
+			: FText::Format(LOCTEXT("ConvertFailed", "Failed to convert {0} of {1} PSD files, see the output log"),
+				Completed->Imports.Num() - Imports.Num(), Completed->Imports.Num()));
+		Completed->Notification->SetCompletionState(bSucceeded ? SNotificationItem::CS_Success : SNotificationItem::CS_Fail);
+		Completed->Notification->ExpireAndFadeout();
+	}
+
+	// Only the assets are made in the editor: import the exported images and build the WBPs from the layouts
+	if (Imports.Num() > 0)
+	{
+		RunImportJob(Imports, LayoutFiles);
+	}
+}
+
 #undef LOCTEXT_NAMESPACE
-	
+
 IMPLEMENT_MODULE(FAutoPSDUIModule, AutoPSDUI)
@@ -0,0 +1,29 @@
+// Copyright 2018-2021 - John snow wind
+
+#include "AutoPSDUIConverter.h"
+
+UAutoPSDUIConverter* UAutoPSDUIConverter::RegisteredConverter = nullptr;
+
+void UAutoPSDUIConverter::RegisterConverter(UAutoPSDUIConverter* Converter)
+{
+	UnregisterConverter();
+	if (Converter)
+	{
+		Converter->AddToRoot();
+		RegisteredConverter = Converter;
+	}
+}
+
+UAutoPSDUIConverter* UAutoPSDUIConverter::Get()
+{
+	return IsValid(RegisteredConverter) ? RegisteredConverter : nullptr;
+}
+
+void UAutoPSDUIConverter::UnregisterConverter()
+{
+	if (RegisteredConverter)
+	{
+		RegisteredConverter->RemoveFromRoot();
+		RegisteredConverter = nullptr;
+	}
+}
@@ -10,6 +10,7 @@
 #include "IAssetTools.h"
 #include "AssetToolsModule.h"
 #include "Kismet2/KismetEditorUtilities.h"
+#include "Kismet2/BlueprintEditorUtils.h"
 #include "EditorAssetLibrary.h"
 
 #include "Blueprint/UserWidget.h"
@@ -17,6 +18,7 @@
 
 #include "Components/Widget.h"
 #include "Components/CanvasPanel.h"
+#include "Components/PanelWidget.h"
 
 void UAutoPSDUILibrary::RunPyCmd(const FString& PyCmd)
 {
@@ -55,12 +57,113 @@ void UAutoPSDUILibrary::SetWBPRootWidget(UWidgetBlueprint* ParentWBP, UWidget* W
 	WidgetTree->RootWidget = Widget;
 }
 
+UWidget* UAutoPSDUILibrary::FindWidgetInWBP(UWidgetBlueprint* ParentWBP, const FString& WidgetName)
+{
+	UWidgetTree* WidgetTree = ParentWBP->WidgetTree;
+	return WidgetTree->FindWidget(FName(*WidgetName));
+}
+
+bool UAutoPSDUILibrary::RemoveWidgetFromWBP(UWidgetBlueprint* ParentWBP, UWidget* Widget)
+{
+	UWidgetTree* WidgetTree = ParentWBP->WidgetTree;
+	const bool bRemoved = WidgetTree->RemoveWidget(Widget);
+
+	// Move it out of the widget tree, so that a new widget can take its name
+	Widget->Rename(nullptr, GetTransientPackage(), REN_DontCreateRedirectors);
+	return bRemoved;
+}
+
+void UAutoPSDUILibrary::SortPanelChildren(UPanelWidget* Panel, const TArray<UWidget*>& Children)
+{
+	int32 Index = 0;
+	for (UWidget* Child : Children)
+	{
+		if (Child && Child->GetParent() == Panel)
+		{
+			Panel->ShiftChild(Index++, Child);
+		}
+	}
+}
+
+FSlateBrush UAutoPSDUILibrary::MakeAtlasBrush(UObject* Texture, FVector2D UVMin, FVector2D UVMax, FVector2D ImageSize)
+{
+	FSlateBrush Brush;
+	Brush.SetResourceObject(Texture);
+	Brush.SetUVRegion(FBox2D(UVMin, UVMax));
+	Brush.ImageSize = ImageSize;
+	return Brush;
+}
+
 void UAutoPSDUILibrary::CompileAndSaveBP(UBlueprint* BPObject)
 {
 	FKismetEditorUtilities::CompileBlueprint(BPObject);
 	UEditorAssetLibrary::SaveLoadedAsset(BPObject);
 }
 
+void UAutoPSDUILibrary::CompileAndSaveBPBatch(const TArray<UBlueprint*>& BPObjects)
+{
+	// Blueprints of the batch each blueprint depends on
+	TMap<UBlueprint*, TSet<UBlueprint*>> BatchDependencies;
+	for (UBlueprint* BPObject : BPObjects)
+	{
+		if (!BPObject || BatchDependencies.Contains(BPObject))
+		{
+			continue;
+		}
+		TSet<TWeakObjectPtr<UBlueprint>> Dependencies;
+		TSet<TWeakObjectPtr<UStruct>> StructDependencies;
+		FBlueprintEditorUtils::GatherDependencies(BPObject, Dependencies, StructDependencies);
+
+		TSet<UBlueprint*>& InBatch = BatchDependencies.Add(BPObject);
+		for (UBlueprint* Other : BPObjects)
+		{
+			if (Other && Other != BPObject && Dependencies.Contains(Other))
+			{
+				InBatch.Add(Other);
+			}
+		}
+	}
+
+	// Compile a blueprint once the blueprints it depends on are compiled, a dependency cycle is compiled in batch order
+	TArray<UBlueprint*> CompileOrder;
+	while (CompileOrder.Num() < BatchDependencies.Num())
+	{
+		UBlueprint* Next = nullptr;
+		for (const TPair<UBlueprint*, TSet<UBlueprint*>>& Pair : BatchDependencies)
+		{
+			if (CompileOrder.Contains(Pair.Key))
+			{
+				continue;
+			}
+			if (!Next)
+			{
+				Next = Pair.Key;
+			}
+			bool bReady = true;
+			for (UBlueprint* Dependency : Pair.Value)
+			{
+				bReady &= CompileOrder.Contains(Dependency);
+			}
+			if (bReady)
+			{
+				Next = Pair.Key;
+				break;
+			}
+		}
+		CompileOrder.Add(Next);
+	}
+
+	TArray<UObject*> Assets;
+	for (int32 Index = 0; Index < CompileOrder.Num(); ++Index)
+	{
+		const bool bLast = Index == CompileOrder.Num() - 1;
+		FKismetEditorUtilities::CompileBlueprint(CompileOrder[Index],
+			bLast ? EBlueprintCompileOptions::None : EBlueprintCompileOptions::SkipGarbageCollection);
+		Assets.Add(CompileOrder[Index]);
+	}
+	UEditorAssetLibrary::SaveLoadedAssets(Assets, false);
+}
+
 bool UAutoPSDUILibrary::ApplyInterfaceToBP(UBlueprint* BPObject, UClass* InterfaceClass)
 {
 	TArray<struct FBPInterfaceDescription> InterfaceDescription;
@@ -8,6 +8,18 @@ UAutoPSDUISetting::UAutoPSDUISetting()
 	bEnabled = true;
 	TextureSrcDir.Path =  FPaths::ProjectDir() / TEXT("Art/UI/Texture");
 	TextureAssetDir.Path = TEXT("/Game/Widgets/Texture");
+	ExportWorkers = 0;
+	bIncrementalUpdate = false;
+	bLazyLoadPSD = true;
+	bBatchTextureSave = true;
+	bPackTextureAtlas = false;
+	AtlasMaxSize = 2048;
+	bShareTextures = false;
+	bNineSliceImages = false;
+	bSolidColorImages = false;
+	bProfileImport = false;
+	bConvertOutOfProcess = true;
+	ReimportDelay = 0.5f;
 }
 
 UAutoPSDUISetting* UAutoPSDUISetting::Get()
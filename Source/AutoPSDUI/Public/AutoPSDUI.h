@@ -5,6 +5,9 @@
 #include "CoreMinimal.h"
 #include "Modules/ModuleManager.h"
 
+class FMonitoredProcess;
+class SNotificationItem;
+
 class FAutoPSDUIModule : public IModuleInterface
 {
 public:
@@ -15,4 +18,33 @@ public:
 
 protected:
 	void OnPSDImport(UObject* PSDTextureAsset);
+
+	/* Start the queued imports once no import event came for ReimportDelay seconds and no conversion is running */
+	bool TickImportQueue(float DeltaTime);
+	void RunImports(const TMap<FString, FString>& Imports);
+
+	/* Run auto_psd_ui.py once for all the imports, LayoutFiles holds the layouts of the PSDs converted out of process */
+	void RunImportJob(const TMap<FString, FString>& Imports, const TMap<FString, FString>& LayoutFiles);
+
+	/* Parse the PSDs and export their images with auto_psd_batch.py in a python process, return false if it cannot be started */
+	bool ConvertOutOfProcess(const TMap<FString, FString>& Imports);
+	void OnConversionOutput(const FString& Output);
+	void OnConversionCompleted(int32 ReturnCode);
+
+	/* WBP of every PSD to import, keyed by PSD file, the same PSD is imported once */
+	TMap<FString, FString> PendingImports;
+	double LastImportTime = 0.0;
+	FDelegateHandle TickerHandle;
+
+	/* PSDs converted out of process, their WBPs are built from the layout files when the process is done */
+	struct FPSDConversion
+	{
+		TSharedPtr<FMonitoredProcess> Process;
+		TSharedPtr<SNotificationItem> Notification;
+		TMap<FString, FString> Imports;
+		TMap<FString, FString> LayoutFiles;
+		TSet<FString> ConvertedFiles;
+		int32 FinishedCount = 0;
+	};
+	TSharedPtr<FPSDConversion> Conversion;
 };
@@ -0,0 +1,30 @@
+// Copyright 2018-2021 - John snow wind
+#pragma once
+#include "CoreMinimal.h"
+#include "UObject/Object.h"
+#include "AutoPSDUIConverter.generated.h"
+
+
+/* The converter of the editor session, implemented in python (AutoPSDUI/converter.py) and registered at startup */
+UCLASS(Blueprintable)
+class AUTOPSDUI_API UAutoPSDUIConverter : public UObject
+{
+	GENERATED_BODY()
+
+public:
+	/* Import the PSDs of an import job file written by the module */
+	UFUNCTION(BlueprintImplementableEvent, Category = "AutoPSDUIConverter")
+	void ImportJob(const FString& JobFile);
+
+	/* Keep the converter until another one is registered */
+	UFUNCTION(BlueprintCallable, Category = "AutoPSDUIConverter")
+	static void RegisterConverter(UAutoPSDUIConverter* Converter);
+
+	/* The registered converter, null if init_unreal.py did not run */
+	static UAutoPSDUIConverter* Get();
+
+	static void UnregisterConverter();
+
+private:
+	static UAutoPSDUIConverter* RegisteredConverter;
+};
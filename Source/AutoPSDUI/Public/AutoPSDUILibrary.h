@@ -2,9 +2,11 @@
 #pragma once
 #include "CoreMinimal.h"
 #include "Kismet/BlueprintFunctionLibrary.h"
+#include "Styling/SlateBrush.h"
 #include "AutoPSDUILibrary.generated.h"
 
 class UWidget;
+class UPanelWidget;
 class UWidgetBlueprint;
 
 
@@ -29,9 +31,29 @@ public:
 	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
 	static void SetWBPRootWidget(UWidgetBlueprint* ParentWBP, UWidget* Widget);
 
+	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
+	static UWidget* FindWidgetInWBP(UWidgetBlueprint* ParentWBP, const FString& WidgetName);
+
+	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
+	static bool RemoveWidgetFromWBP(UWidgetBlueprint* ParentWBP, UWidget* Widget);
+
+	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
+	static void SortPanelChildren(UPanelWidget* Panel, const TArray<UWidget*>& Children);
+
+	/* Brush drawing the UV region of an atlas texture, UVs are normalized */
+	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
+	static FSlateBrush MakeAtlasBrush(UObject* Texture, FVector2D UVMin, FVector2D UVMax, FVector2D ImageSize);
+
 	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
 	static void CompileAndSaveBP(UBlueprint* BPObject);
 
+	/*
+	 * Compile the blueprints in dependency order, a blueprint depending on another of the batch is compiled after it,
+	 * the others keep their order. Garbage is collected once after the last compile, then all the packages are saved.
+	 */
+	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
+	static void CompileAndSaveBPBatch(const TArray<UBlueprint*>& BPObjects);
+
 	UFUNCTION(BlueprintCallable, Category = "AutoPSDUILibrary")
 	static bool ApplyInterfaceToBP(UBlueprint* BPObject, UClass* InterfaceClass);
 
@@ -35,6 +35,54 @@ public:
 	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting", meta = (LongPackageName))
 	TSoftObjectPtr<UFont> DefaultFont;
 
+	/* Number of threads exporting layer images, 0 means one per CPU core */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting", meta = (ClampMin = "0"))
+	int32 ExportWorkers;
+
+	/* Update only the widgets whose layers changed since the last import, instead of rebuilding the whole WBP */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bIncrementalUpdate;
+
+	/* Read the channel data of a layer from the PSD file only when the layer is exported, instead of loading the whole PSD into memory */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bLazyLoadPSD;
+
+	/* Import the textures without saving them one by one, all the imported textures are saved together at the end */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bBatchTextureSave;
+
+	/* Pack the layer images of a PSD into texture atlases, widgets draw their region of the atlas */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bPackTextureAtlas;
+
+	/* Max width and height of a texture atlas, larger images keep their own texture */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting", meta = (ClampMin = "64", EditCondition = "bPackTextureAtlas"))
+	int32 AtlasMaxSize;
+
+	/* Export the layer images of identical content once for all the PSDs, their widgets share one texture */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bShareTextures;
+
+	/* Cut the identical rows and columns of stretchable layer images down to a nine-slice source, drawn as a box by their brush */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bNineSliceImages;
+
+	/* Draw the layers of a single color, and the rectangle shape layers of a solid fill, as Image widgets tinted with the color instead of a texture */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bSolidColorImages;
+
+	/* Record the time of every phase, layer and widget of an import, written as a Chrome trace to the Profile folder of TextureSrcDir */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bProfileImport;
+
+	/* Parse the PSD and export its images in a python process of the engine, only the WBP is built in the editor when it is done */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting")
+	bool bConvertOutOfProcess;
+
+	/* Seconds without new reimport events before the queued PSDs are imported together, a PSD reimported many times is imported once */
+	UPROPERTY(EditAnywhere, config, BlueprintReadWrite, Category = "AutoPSDUISetting", meta = (ClampMin = "0.0"))
+	float ReimportDelay;
+
 	UFUNCTION(BlueprintCallable, Category = "AutoPSDUISetting")
 	static UAutoPSDUISetting* Get();
 };
\ No newline at end of file